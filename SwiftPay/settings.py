@@ -38,6 +38,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'mywebsite.querybudget.QueryBudgetMiddleware',
 ]
 
 CSRF_TRUSTED_ORIGINS = [
@@ -72,12 +73,57 @@ AUTH_USER_MODEL = 'mywebsite.CustomUser'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+#
+# DB_ENGINE=postgresql selects PostgreSQL (DB_NAME, DB_USER, DB_PASSWORD,
+# DB_HOST, DB_PORT); anything else keeps SQLite for small installs.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE in ('postgres', 'postgresql'):
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'swiftpay'),
+            'USER': os.environ.get('DB_USER', 'swiftpay'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Each gunicorn worker keeps its connection between requests and
+            # checks it is still alive before reusing it
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            # Set DB_PGBOUNCER=1 when connecting through PgBouncer in
+            # transaction pooling mode: server-side cursors (.iterator())
+            # do not survive from one transaction to the next there
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_PGBOUNCER') == '1',
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', '5')),
+            },
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            # django.db.backends.sqlite3 plus BEGIN IMMEDIATE and SQLITE_PRAGMAS
+            'ENGINE': 'SwiftPay.sqlite_backend',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # Seconds a writer waits for the write lock before failing
+                # with "database is locked"
+                'timeout': 20,
+            },
+        }
+    }
+
+# PRAGMAs run on every new SQLite connection (see SwiftPay/sqlite_backend).
+# WAL lets requests keep reading while another worker writes, and
+# synchronous=NORMAL is durable in WAL mode without an fsync per commit.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'temp_store': 'MEMORY',
+    'cache_size': -20000,  # 20 MB
 }
 
 
@@ -135,3 +181,72 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Number of processes used to render payslips for bulk ZIP export (None = CPU count)
+PAYSLIP_EXPORT_WORKERS = None
+
+# How payslip PDFs are drawn: 'html' renders receipt_payslip.html through
+# xhtml2pdf, 'reportlab' draws the same receipt straight onto a canvas
+PAYSLIP_RENDERER = os.environ.get('PAYSLIP_RENDERER', 'html')
+
+# Processes hashing the default password of employees created by a bulk
+# import (None = CPU count)
+EMPLOYEE_IMPORT_HASH_WORKERS = None
+
+# Keyset pagination for list views (?page_size= is capped at the maximum)
+PAGINATION_PAGE_SIZE = 50
+PAGINATION_MAX_PAGE_SIZE = 500
+
+# Query budgets: views declare a maximum with @query_budget(n); views without
+# one fall back to QUERY_BUDGET_DEFAULT (None = unchecked). Over-budget
+# requests are logged, or raise QueryBudgetExceeded when strict (tests).
+QUERY_BUDGET_DEFAULT = None
+QUERY_BUDGET_STRICT = False
+
+# Attendance device ingestion: tokens accepted in 'Authorization: Token <token>'
+ATTENDANCE_INGEST_TOKENS = [token for token in os.environ.get('ATTENDANCE_INGEST_TOKENS', '').split(',') if token]
+ATTENDANCE_INGEST_MAX_EVENTS = 50000
+
+# Attendance analytics: a check-in later than ATTENDANCE_DAY_START plus the
+# grace period counts as late, hours beyond the standard day as overtime
+ATTENDANCE_DAY_START = '08:00'
+ATTENDANCE_LATE_GRACE_MINUTES = 15
+ATTENDANCE_STANDARD_HOURS = 8
+
+# Working-day calendar: weekdays (Monday=0) the company works unless a
+# department sets its own, on top of the Kenyan public holidays and any
+# CalendarOverride. Compiled calendars are reloaded after this many seconds.
+WORKING_WEEKDAYS = '01234'
+WORK_CALENDAR_MAX_AGE = 300
+
+# Cache used for dashboard metrics. Local memory by default, which is only
+# right for a single process (runserver, tests): every web worker then has
+# its own copy, invalidations from run_job_worker do not reach it (metrics
+# refresh after their TTL) and dashboard_cache_stats refuses to run. In
+# production point these at a shared cache, e.g.
+# django.core.cache.backends.redis.RedisCache / redis://host:6379 or
+# django.core.cache.backends.filebased.FileBasedCache / a directory.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'swiftpay'),
+    }
+}
+DASHBOARD_CACHE_ALIAS = 'default'
+# Per-metric TTL overrides in seconds, e.g. {'employees_present_today': 30}
+DASHBOARD_METRIC_TTLS = {}
+# Record cache hits and misses for one dashboard load in this many (0 = never);
+# dashboard_cache_stats scales the sampled counts back up
+DASHBOARD_STATS_SAMPLE_RATE = 100
+
+# Background jobs (PDF reports, payroll runs) are queued in the database and
+# run by `manage.py run_job_worker`. With JOB_QUEUE_ASYNC=0 jobs run inside
+# the request that queued them, for development without a worker.
+JOB_QUEUE_ASYNC = os.environ.get('JOB_QUEUE_ASYNC', '1') == '1'
+# Seconds without a heartbeat before a RUNNING job's worker is taken for dead
+# and the job is picked up again; workers send one every JOB_HEARTBEAT_INTERVAL
+JOB_TIMEOUT = 30 * 60
+JOB_HEARTBEAT_INTERVAL = 60
+# Delay before the first retry of a failed job, doubled for each further one
+JOB_RETRY_DELAY = 30
+JOB_MAX_ATTEMPTS = 3
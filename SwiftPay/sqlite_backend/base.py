@@ -0,0 +1,24 @@
+# base.py
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend tuned for several gunicorn workers sharing one file.
+
+    Transactions start with BEGIN IMMEDIATE, so a transaction that reads
+    and then writes takes the write lock up front and waits for it
+    (busy_timeout) instead of failing with "database is locked" when its
+    read snapshot turns out to be stale. This is Django 5.1's
+    OPTIONS['transaction_mode'] = 'IMMEDIATE'. SQLITE_PRAGMAS are applied
+    to every new connection.
+    """
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute("BEGIN IMMEDIATE")
@@ -1,14 +1,24 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 from .models import (
     Department, EmployeeRole, CustomUser, Attendance, LeaveType, 
-    LeaveApplication, Salary, PaySlip, TaxDeclaration
+    LeaveApplication, Salary, PaySlip, TaxDeclaration, PayrollRun,
+    AttendanceIngestBatch, LeaveBalance, PaymentBatch, Job, YearToDateLedger, ReceiptSequence,
+    CalendarOverride
 )
+from .jobs import enqueue
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
-    list_display = ('name', 'description')
+    list_display = ('name', 'description', 'working_weekdays')
     search_fields = ('name',)
 
+@admin.register(CalendarOverride)
+class CalendarOverrideAdmin(admin.ModelAdmin):
+    list_display = ('date', 'name', 'department', 'is_working_day')
+    list_filter = ('is_working_day', 'department')
+    date_hierarchy = 'date'
+
 @admin.register(EmployeeRole)
 class EmployeeRoleAdmin(admin.ModelAdmin):
     list_display = ('title', 'base_salary', 'department')
@@ -27,6 +37,13 @@ class AttendanceAdmin(admin.ModelAdmin):
     search_fields = ('employee__username', 'date')
     list_filter = ('is_present', 'is_leave')
 
+@admin.register(AttendanceIngestBatch)
+class AttendanceIngestBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'source', 'received_on', 'events_received', 'events_rejected', 'unknown_employees',
+                    'rows_created', 'rows_updated', 'duration_ms', 'events_per_second')
+    list_filter = ('source',)
+    date_hierarchy = 'received_on'
+
 @admin.register(LeaveType)
 class LeaveTypeAdmin(admin.ModelAdmin):
     list_display = ('name', 'max_days_per_year')
@@ -37,16 +54,83 @@ class LeaveApplicationAdmin(admin.ModelAdmin):
     list_filter = ('status', 'leave_type')
     search_fields = ('employee__username',)
 
+@admin.register(LeaveBalance)
+class LeaveBalanceAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'leave_type', 'year', 'days_pending', 'days_approved', 'updated_on')
+    list_filter = ('year', 'leave_type')
+    search_fields = ('employee__username',)
+
+@admin.register(YearToDateLedger)
+class YearToDateLedgerAdmin(admin.ModelAdmin):
+    list_display = ('employee', 'year', 'month_count', 'total_gross', 'total_tax', 'total_net', 'updated_on')
+    list_filter = ('year',)
+    search_fields = ('employee__username',)
+
 @admin.register(Salary)
 class SalaryAdmin(admin.ModelAdmin):
     list_display = ('employee', 'month', 'year', 'net_salary')
     search_fields = ('employee__username', 'month', 'year')
 
+@admin.register(PayrollRun)
+class PayrollRunAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'deduction_method', 'tax_rate', 'status', 'salaries_created', 'skipped_count', 'rows_per_second', 'finished_at')
+    list_filter = ('status', 'year', 'month')
+    readonly_fields = ('status', 'created_by', 'started_at', 'finished_at', 'employee_count',
+                       'salaries_created', 'skipped_count', 'rows_per_second', 'error')
+    actions = ['execute_runs']
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description="Execute selected payroll runs")
+    def execute_runs(self, request, queryset):
+        # Runs are executed by the job worker, off the request
+        for run in queryset.exclude(status__in=['RUNNING', 'COMPLETED']):
+            job = enqueue('payroll_run', {'run_id': run.pk}, created_by=request.user)
+            if job.status == 'FAILED':
+                self.message_user(request, f"{run}: {job.error}", messages.ERROR)
+            else:
+                self.message_user(request, f"{run}: job {job.pk} {job.get_status_display().lower()}", messages.SUCCESS)
+
+@admin.register(PaymentBatch)
+class PaymentBatchAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'file_format', 'bank_count', 'record_count', 'total_amount', 'skipped_count',
+                    'duration_ms', 'created_by', 'created_on')
+    list_filter = ('year', 'month', 'file_format')
+    readonly_fields = ('month', 'year', 'file_format', 'created_by', 'bank_count', 'record_count',
+                       'total_amount', 'skipped_count', 'checksum', 'duration_ms')
+
+    def has_add_permission(self, request):
+        # Batches are created by generating the files
+        return False
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'kind', 'status', 'attempts', 'created_by', 'created_on', 'finished_at', 'worker')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('kind', 'params', 'status', 'attempts', 'created_by', 'started_at', 'finished_at',
+                       'worker', 'result', 'result_file', 'result_name', 'error')
+    actions = ['retry_jobs']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Retry selected failed jobs")
+    def retry_jobs(self, request, queryset):
+        retried = queryset.filter(status='FAILED').update(status='QUEUED', run_after=timezone.now(), attempts=0)
+        self.message_user(request, f"{retried} jobs queued again", messages.SUCCESS)
+
 @admin.register(PaySlip)
 class PaySlipAdmin(admin.ModelAdmin):
     list_display = ('salary', 'issue_date', 'receipt_number', 'total_working_days', 'days_present')
     search_fields = ('salary__employee__username', 'receipt_number')
 
+@admin.register(ReceiptSequence)
+class ReceiptSequenceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'next_value')
+
 @admin.register(TaxDeclaration)
 class TaxDeclarationAdmin(admin.ModelAdmin):
     list_display = ('employee', 'financial_year', 'total_investment', 'tax_exemption_claimed', 'is_verified')
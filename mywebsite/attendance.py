@@ -0,0 +1,88 @@
+# attendance.py
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import dashboard_metrics
+from .models import Attendance, CustomUser
+from .work_calendar import working_dates
+
+BATCH_SIZE = 2000
+
+STATUS_FLAGS = {
+    'LEAVE': {'is_present': False, 'is_leave': True},
+    'PRESENT': {'is_present': True, 'is_leave': False},
+    'ABSENT': {'is_present': False, 'is_leave': False},
+}
+
+
+def date_range(start_date, end_date):
+    """
+    Every date from start_date to end_date inclusive
+    """
+    return [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+
+
+def employees_in_scope(department=None):
+    """
+    Active employees in a department, or in the whole company when no
+    department is given
+    """
+    employees = CustomUser.objects.filter(is_active_employee=True)
+    if department is not None:
+        employees = employees.filter(department=department)
+    return employees
+
+
+def mark_attendance(employees, start_date, end_date, status='LEAVE', working_days_only=False):
+    """
+    Upsert one Attendance row per employee (a CustomUser queryset) per day
+    in the range with the flags for status, or only per working day of the
+    employee's department calendar with working_days_only. Existing rows
+    only have their flags changed. Returns (created, updated) counts.
+
+    Existing (employee, date) rows are counted in a single query and all
+    rows are written with one bulk upsert on the unique (employee, date)
+    key inside a single transaction, instead of a get_or_create per day.
+    """
+    flags = STATUS_FLAGS[status]
+    if working_days_only:
+        department_dates = {}
+        days_by_employee = []
+        for employee_id, department_id in employees.values_list('id', 'department_id'):
+            if department_id not in department_dates:
+                department_dates[department_id] = working_dates(start_date, end_date, department_id)
+            days_by_employee.append((employee_id, department_dates[department_id]))
+    else:
+        dates = date_range(start_date, end_date)
+        days_by_employee = [(employee_id, dates) for employee_id in employees.values_list('id', flat=True)]
+    if not any(days for _, days in days_by_employee):
+        return 0, 0
+
+    rows = []
+    for employee_id, days in days_by_employee:
+        for day in days:
+            check_in = timezone.make_aware(datetime.combine(day, time.min))
+            rows.append(Attendance(employee_id=employee_id, date=day, check_in=check_in, **flags))
+
+    with transaction.atomic():
+        existing = Attendance.objects.filter(
+            date__range=(start_date, end_date),
+            employee__in=employees.values('id')
+        )
+        if working_days_only:
+            keys = {(row.employee_id, row.date) for row in rows}
+            updated = sum(1 for key in existing.values_list('employee_id', 'date').iterator() if key in keys)
+        else:
+            updated = existing.count()
+
+        Attendance.objects.bulk_create(
+            rows,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['employee', 'date'],
+            update_fields=list(flags),
+        )
+        dashboard_metrics.invalidate('employees_present_today')
+    return len(rows) - updated, updated
@@ -0,0 +1,312 @@
+# attendance_analytics.py
+"""
+Monthly attendance analytics on NumPy employee x day matrices.
+
+load_month() reads a month of Attendance with one query into a MonthMatrix:
+a status code, hours worked and check-in time per employee per day. Every
+statistic is then an array operation over the whole matrix, so the per
+employee and per department figures for a 10k employee company take a few
+milliseconds once the rows are loaded.
+"""
+import calendar
+import math
+import warnings
+from datetime import date, datetime
+
+import numpy as np
+from django.conf import settings
+from django.db import connections
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .models import Attendance, CustomUser
+from .work_calendar import month_mask
+
+# Status codes in MonthMatrix.status
+NO_RECORD, ABSENT, PRESENT, LEAVE = 0, 1, 2, 3
+
+# One row of load_month()'s attendance query
+ATTENDANCE_ROW = [
+    ('employee_id', np.int64), ('is_present', bool), ('is_leave', bool),
+    ('date', 'S10'), ('check_in', 'S19'), ('check_out', 'S19'),
+]
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _setting_minutes(value):
+    hours, minutes = value.split(':')
+    return int(hours) * 60 + int(minutes)
+
+
+def _as_text(name):
+    # Dates and datetimes are selected as text ("YYYY-MM-DD HH:MM:SS..." in
+    # UTC with USE_TZ, as every backend returns them) and parsed a whole
+    # column at a time, which is far cheaper than the per-value converters
+    # of a date or datetime column.
+    return Cast(name, CharField())
+
+
+def _digits(text, start, end):
+    # The number in characters start:end of a fixed-width bytes array
+    text = np.ascontiguousarray(text)
+    chars = text.view(np.uint8).reshape(len(text), text.itemsize)[:, start:end].astype(np.int64) - ord('0')
+    return chars @ (10 ** np.arange(end - start - 1, -1, -1))
+
+
+def _seconds(text):
+    """
+    Seconds since the epoch of an 'S19' array of _as_text() datetimes,
+    NaN for empty ones. Only the few distinct dates are parsed in Python; the
+    time of day is read straight from the digits.
+    """
+    dates, inverse = np.unique(text.astype('S10'), return_inverse=True)
+    midnights = np.array([
+        (datetime.fromisoformat(day.decode()) - _EPOCH).total_seconds() if day else np.nan for day in dates
+    ])
+    clock = _digits(text, 11, 13) * 3600 + _digits(text, 14, 16) * 60 + _digits(text, 17, 19)
+    return midnights[inverse.ravel()] + clock
+
+
+def _day_starts(year, month, days):
+    # Local midnight of each day in _seconds() terms, so that times of day
+    # need no per-row timezone conversion
+    if not settings.USE_TZ:
+        return np.array([(datetime(year, month, day) - _EPOCH).total_seconds() for day in range(1, days + 1)])
+    tz = timezone.get_current_timezone()
+    return np.array([datetime(year, month, day, tzinfo=tz).timestamp() for day in range(1, days + 1)])
+
+
+def _fetch(queryset):
+    """
+    Rows of a values_list() queryset as the database driver returns them,
+    without the ORM's per-value converters
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _plain(value):
+    value = value.item()
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+class MonthMatrix:
+    """
+    A month of attendance for a set of employees. Rows follow
+    employee_ids (sorted), columns are the days of the month.
+
+    status:   uint8 NO_RECORD / ABSENT / PRESENT / LEAVE
+    hours:    float32 hours between check-in and check-out, NaN without
+              a check-out
+    check_in: float32 check-in as minutes after local midnight, NaN
+              without a record
+    working:  bool, the employee's working days (see work_calendar)
+    """
+    def __init__(self, year, month, employee_ids, department_ids, status, hours, check_in):
+        self.year = year
+        self.month = month
+        self.employee_ids = employee_ids
+        self.department_ids = department_ids
+        self.status = status
+        self.hours = hours
+        self.check_in = check_in
+        # Working days per employee, from their department's calendar
+        departments, groups = np.unique(department_ids, return_inverse=True)
+        masks = np.array([
+            month_mask(year, month, None if department_id < 0 else int(department_id))
+            for department_id in departments
+        ], dtype=bool).reshape(len(departments), status.shape[1])
+        self.working = masks[groups.ravel()]
+
+    @property
+    def shape(self):
+        return self.status.shape
+
+    @property
+    def working_days(self):
+        # Per employee
+        return self.working.sum(axis=1)
+
+    @property
+    def present(self):
+        return self.status == PRESENT
+
+    @property
+    def leave(self):
+        return self.status == LEAVE
+
+    @property
+    def absent(self):
+        # A working day with neither presence nor leave, recorded or not
+        return self.working & ~self.present & ~self.leave
+
+    @property
+    def late(self):
+        start = _setting_minutes(getattr(settings, 'ATTENDANCE_DAY_START', '08:00'))
+        grace = getattr(settings, 'ATTENDANCE_LATE_GRACE_MINUTES', 15)
+        with np.errstate(invalid='ignore'):
+            return self.present & (self.check_in > start + grace)
+
+    @property
+    def overtime(self):
+        standard = getattr(settings, 'ATTENDANCE_STANDARD_HOURS', 8)
+        return np.clip(np.nan_to_num(self.hours) - standard, 0, None) * self.present
+
+    def index_of(self, employee_id):
+        position = np.searchsorted(self.employee_ids, employee_id)
+        if position < len(self.employee_ids) and self.employee_ids[position] == employee_id:
+            return int(position)
+        return None
+
+    def employee_stats(self):
+        """
+        Per-employee arrays, aligned with employee_ids
+        """
+        present = self.present
+        leave = self.leave
+        days_present = present.sum(axis=1)
+        leave_days = (leave & self.working).sum(axis=1)
+        expected = self.working_days - leave_days
+        worked = np.where(present, np.nan_to_num(self.hours), 0).sum(axis=1)
+        check_ins = np.where(present, self.check_in, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            # Employees never present average to NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            average_check_in = np.nanmean(check_ins, axis=1) if check_ins.size else np.zeros(0)
+            rate = np.where(expected > 0, (present & self.working).sum(axis=1) / expected, np.nan)
+        return {
+            'days_present': days_present,
+            'leave_days': leave_days,
+            'absent_days': self.absent.sum(axis=1),
+            'late_days': self.late.sum(axis=1),
+            'hours_worked': worked,
+            'overtime_hours': self.overtime.sum(axis=1),
+            'attendance_rate': rate,
+            'average_check_in': average_check_in,
+        }
+
+    def department_stats(self, stats=None):
+        """
+        One dict per department (None for employees without one), with
+        head count, total days and hours, and the mean attendance rate
+        """
+        stats = stats or self.employee_stats()
+        departments, groups = np.unique(self.department_ids, return_inverse=True)
+        count = len(departments)
+        heads = np.bincount(groups, minlength=count)
+        rate = stats['attendance_rate']
+        rated = ~np.isnan(rate)
+        rate_sum = np.bincount(groups[rated], weights=rate[rated], minlength=count)
+        rate_count = np.bincount(groups[rated], minlength=count)
+        totals = {
+            name: np.bincount(groups, weights=stats[name], minlength=count)
+            for name in ('days_present', 'leave_days', 'absent_days', 'late_days', 'hours_worked', 'overtime_hours')
+        }
+        result = []
+        for position, department_id in enumerate(departments):
+            result.append({
+                'department_id': None if department_id < 0 else int(department_id),
+                'employees': int(heads[position]),
+                'attendance_rate': float(rate_sum[position] / rate_count[position]) if rate_count[position] else None,
+                **{name: float(values[position]) for name, values in totals.items()},
+            })
+        return result
+
+    def rows(self, positions, stats=None):
+        """
+        employee_stats() as one dict of plain Python values (None for NaN)
+        per position, with the employee's id
+        """
+        stats = stats or self.employee_stats()
+        return [
+            {'employee_id': int(self.employee_ids[position]),
+             **{name: _plain(values[position]) for name, values in stats.items()}}
+            for position in positions
+        ]
+
+    def lowest_attendance(self, limit=None, stats=None):
+        """
+        Row positions by attendance rate, lowest first; employees who were
+        not expected at work at all come last
+        """
+        stats = stats or self.employee_stats()
+        order = np.argsort(np.nan_to_num(stats['attendance_rate'], nan=np.inf), kind='stable')
+        return order[:limit] if limit is not None else order
+
+    def employee(self, employee_id):
+        """
+        One employee's employee_stats() and the month's working days as a
+        dict, or None if the employee has no row
+        """
+        position = self.index_of(employee_id)
+        if position is None:
+            return None
+        return {**self.rows([position])[0], 'working_days': int(self.working_days[position])}
+
+
+def load_month(year, month, department=None, employees=None):
+    """
+    Build the MonthMatrix of a month for the active employees (of a
+    department, or the given CustomUser queryset) plus anyone else with
+    attendance that month. Two queries.
+    """
+    days = calendar.monthrange(year, month)[1]
+    start, end = date(year, month, 1), date(year, month, days)
+    attendance = Attendance.objects.filter(date__range=(start, end))
+    if employees is None:
+        employees = CustomUser.objects.filter(
+            Q(is_active_employee=True) | Q(pk__in=attendance.values('employee_id'))
+        )
+    else:
+        attendance = attendance.filter(employee__in=employees.values('pk'))
+    if department is not None:
+        employees = employees.filter(department=department)
+        attendance = attendance.filter(employee__department=department)
+
+    # Plain columns come first: the SQL selects them ahead of expressions
+    people = np.array(
+        _fetch(employees.order_by('pk').values_list('pk', Coalesce('department_id', Value(-1)))),
+        dtype=[('id', np.int64), ('department_id', np.int64)]
+    )
+    rows = np.array(
+        _fetch(attendance.values_list(
+            'employee_id', 'is_present', 'is_leave', _as_text('date'), _as_text('check_in'),
+            Coalesce(_as_text('check_out'), Value('')),
+        )),
+        dtype=ATTENDANCE_ROW
+    )
+    employee_ids = people['id']
+    status = np.zeros((len(employee_ids), days), np.uint8)
+    hours = np.full((len(employee_ids), days), np.nan, np.float32)
+    check_in = np.full((len(employee_ids), days), np.nan, np.float32)
+    if len(rows) and len(employee_ids):
+        positions = np.searchsorted(employee_ids, rows['employee_id'])
+        known = positions < len(employee_ids)
+        known[known] = employee_ids[positions[known]] == rows['employee_id'][known]
+        rows, positions = rows[known], positions[known]
+        row_days = _digits(rows['date'], 8, 10) - 1
+
+        # Leave wins over presence when a row has both flags
+        status[positions, row_days] = np.where(
+            rows['is_leave'], LEAVE, np.where(rows['is_present'], PRESENT, ABSENT)
+        )
+        checked_in = _seconds(rows['check_in'])
+        worked = (_seconds(rows['check_out']) - checked_in) / 3600
+        worked[worked < 0] = np.nan
+        hours[positions, row_days] = worked
+        check_in[positions, row_days] = (checked_in - _day_starts(year, month, days)[row_days]) / 60
+
+    return MonthMatrix(year, month, employee_ids, people['department_id'], status, hours, check_in)
+
+
+def employee_month(employee, year, month):
+    """
+    One employee's attendance figures for a month (see
+    MonthMatrix.employee_stats), or None if they have no matrix row
+    """
+    matrix = load_month(year, month, employees=CustomUser.objects.filter(pk=employee.pk))
+    return matrix.employee(employee.pk)
@@ -0,0 +1,258 @@
+# bankfiles.py
+import csv
+import hashlib
+import io
+import re
+import time
+import unicodedata
+import zipfile
+from collections import namedtuple
+from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import PaymentBatch, Salary
+
+RECORD_WIDTH = 120
+HASH_MODULUS = 10 ** 18
+
+# Widths of the fixed-width detail fields, in row order. A row that does
+# not fit is reported as an exception rather than cut short, since a bank
+# would pay a truncated account number to someone else.
+DETAIL_FIELDS = (
+    ('branch', 20),
+    ('account number', 20),
+    ('account name', 35),
+    ('amount', 15),
+    ('reference', 20),
+)
+
+BankFile = namedtuple('BankFile', 'name bank content records total hash_total sha256')
+
+COLUMNS = (
+    'id', 'net_salary', 'employee__employee_id', 'employee__first_name', 'employee__last_name',
+    'employee__bank', 'employee__bank_branch', 'employee__bank_account_name', 'employee__bank_account_number',
+)
+
+
+def payment_rows(month, year):
+    """
+    Every salary of the period with the employee's bank details, in one
+    query joined to the employee
+    """
+    return Salary.objects.filter(month=month, year=year).values_list(*COLUMNS).order_by(
+        'employee__bank', 'employee__bank_branch', 'employee__employee_id'
+    )
+
+
+def _ascii(value):
+    """
+    Bank formats only take plain ASCII, upper case
+    """
+    text = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode()
+    return re.sub(r'\s+', ' ', text).strip().upper()
+
+
+def _text(value, width):
+    text = _ascii(value)
+    if len(text) > width:
+        raise ValueError(f"{text!r} does not fit in {width} characters")
+    return text.ljust(width)
+
+
+def _number(value, width):
+    text = str(value)
+    if len(text) > width or not text.isdigit():
+        raise ValueError(f"{text} does not fit in {width} digits")
+    return text.rjust(width, '0')
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).quantize(Decimal('1')))
+
+
+def format_cents(cents):
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+def account_digits(account_number):
+    return int(re.sub(r'\D', '', account_number or '') or 0)
+
+
+def _skip_reason(bank, account_number, net_salary):
+    if not _ascii(bank):
+        return 'missing bank'
+    if not re.sub(r'\D', '', _ascii(account_number)):
+        return 'missing account number'
+    if net_salary is None or net_salary <= 0:
+        return 'no net pay'
+    return None
+
+
+def _fixed_width_problem(row):
+    """
+    Why a detail row cannot be written to the fixed-width file in full, or
+    None if every field fits
+    """
+    for (label, width), value in zip(DETAIL_FIELDS, row):
+        if len(str(value)) > width:
+            return f"{label} longer than {width} characters"
+    return None
+
+
+def _fixed_width(bank, rows, month, year, reference, created):
+    """
+    Fixed-width EFT file. Every line is 120 characters plus CRLF; text is
+    left-aligned and space padded, numbers right-aligned and zero padded.
+
+        Header   H | bank name 35 | period YYYYMM | created YYYYMMDD | batch ref 12
+        Detail   D | sequence 6 | branch 20 | account no 20 | account name 35 | amount in cents 15 | reference 20
+        Trailer  T | record count 6 | total cents 18 | account hash total 18
+
+    The hash total is the sum of the digits-only account numbers as written
+    in the detail records, modulo 10^18, so the bank can detect altered
+    account numbers as well as altered amounts. Rows must already have
+    passed _fixed_width_problem(); a value that does not fit raises
+    ValueError instead of being cut.
+    """
+    # The bank name in the header is informational only
+    lines = [
+        ('H' + _text(_ascii(bank)[:35], 35) + f"{year:04d}{month:02d}" + created.strftime('%Y%m%d')
+         + _text(reference, 12))
+    ]
+    total = hash_total = 0
+    for sequence, (branch, account_number, account_name, cents, employee_ref) in enumerate(rows, 1):
+        account_field = _text(account_number, 20)
+        lines.append(
+            'D' + _number(sequence, 6) + _text(branch, 20) + account_field
+            + _text(account_name, 35) + _number(cents, 15) + _text(employee_ref, 20)
+        )
+        total += cents
+        hash_total = (hash_total + account_digits(account_field)) % HASH_MODULUS
+    lines.append('T' + _number(len(rows), 6) + _number(total, 18) + _number(hash_total, 18))
+    content = ''.join(line.ljust(RECORD_WIDTH) + '\r\n' for line in lines)
+    return content, total, hash_total
+
+
+def _csv(bank, rows, month, year, reference, created):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['branch', 'account_number', 'account_name', 'amount', 'reference'])
+    total = hash_total = 0
+    for branch, account_number, account_name, cents, employee_ref in rows:
+        writer.writerow([branch, account_number, account_name, format_cents(cents), employee_ref])
+        total += cents
+        hash_total = (hash_total + account_digits(account_number)) % HASH_MODULUS
+    writer.writerow(['TOTAL', len(rows), '', format_cents(total), hash_total])
+    return output.getvalue(), total, hash_total
+
+
+# format -> (writer, file extension, check that returns why a row cannot be written)
+WRITERS = {
+    'fixed': (_fixed_width, 'txt', _fixed_width_problem),
+    'csv': (_csv, 'csv', lambda row: None),
+}
+
+
+def build_bank_files(month, year, file_format='fixed', reference=''):
+    """
+    Return (bank_files, skipped) for the period, one file per bank, from a
+    single pass over payment_rows(). skipped is a list of (employee_id,
+    reason) for salaries without usable bank details or pay, or whose
+    details do not fit the file format. Text is normalised to the ASCII
+    the files are written in before it is checked, so control totals are
+    computed from exactly what the bank receives.
+    """
+    write, extension, problem = WRITERS[file_format]
+    created = timezone.localdate()
+    banks = {}
+    skipped = []
+
+    for _, net_salary, employee_id, first_name, last_name, bank, branch, account_name, account_number in (
+        payment_rows(month, year).iterator(chunk_size=5000)
+    ):
+        reason = _skip_reason(bank, account_number, net_salary)
+        if reason:
+            skipped.append((employee_id, reason))
+            continue
+        row = (
+            _ascii(branch), _ascii(account_number), _ascii(account_name or f"{first_name} {last_name}"),
+            to_cents(net_salary), _ascii(employee_id),
+        )
+        reason = problem(row)
+        if reason:
+            skipped.append((employee_id, reason))
+            continue
+        # Normalised so 'KCB' and 'kcb ' end up in the same file
+        banks.setdefault(_ascii(bank), []).append(row)
+
+    files = []
+    used_names = set()
+    for bank, rows in banks.items():
+        content, total, hash_total = write(bank, rows, month, year, reference, created)
+        data = content.encode('ascii')
+        name = f"{slugify(bank) or 'bank'}_{year}{month:02d}"
+        if name in used_names:
+            name = f"{name}_{len(used_names)}"
+        used_names.add(name)
+        files.append(BankFile(
+            name=f"{name}.{extension}",
+            bank=bank,
+            content=data,
+            records=len(rows),
+            total=total,
+            hash_total=hash_total,
+            sha256=hashlib.sha256(data).hexdigest(),
+        ))
+    return files, skipped
+
+
+def bank_files_zip(files, skipped):
+    """
+    ZIP the bank files with summary.csv (control totals) and exceptions.csv
+    """
+    summary = io.StringIO()
+    writer = csv.writer(summary)
+    writer.writerow(['file', 'bank', 'records', 'total', 'hash_total', 'sha256'])
+    for bank_file in files:
+        writer.writerow([
+            bank_file.name, bank_file.bank, bank_file.records, format_cents(bank_file.total),
+            bank_file.hash_total, bank_file.sha256
+        ])
+    writer.writerow([
+        'TOTAL', len(files), sum(f.records for f in files), format_cents(sum(f.total for f in files)), '', ''
+    ])
+
+    exceptions = io.StringIO()
+    writer = csv.writer(exceptions)
+    writer.writerow(['employee_id', 'reason'])
+    writer.writerows(skipped)
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for bank_file in files:
+            archive.writestr(bank_file.name, bank_file.content)
+        archive.writestr('summary.csv', summary.getvalue())
+        archive.writestr('exceptions.csv', exceptions.getvalue())
+    return buffer.getvalue()
+
+
+def generate_payment_batch(month, year, file_format='fixed', created_by=None):
+    """
+    Build the bank files for a period, record a PaymentBatch with its
+    control totals and return (batch, zip_bytes)
+    """
+    start = time.perf_counter()
+    batch = PaymentBatch.objects.create(month=month, year=year, file_format=file_format, created_by=created_by)
+    files, skipped = build_bank_files(month, year, file_format, reference=f"PB{batch.pk:010d}")
+    data = bank_files_zip(files, skipped)
+
+    batch.bank_count = len(files)
+    batch.record_count = sum(f.records for f in files)
+    batch.total_amount = Decimal(sum(f.total for f in files)) / 100
+    batch.skipped_count = len(skipped)
+    batch.checksum = hashlib.sha256(data).hexdigest()
+    batch.duration_ms = (time.perf_counter() - start) * 1000
+    batch.save()
+    return batch, data
@@ -0,0 +1,174 @@
+# dashboard_metrics.py
+import random
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Attendance, CustomUser, Department, LeaveApplication
+from .summaries import latest_period
+
+KEY_PREFIX = 'dashboard'
+
+# Seconds each metric may be served from the cache. Writes to the models a
+# metric depends on invalidate it straight away (see signals.py), so the
+# TTL only bounds staleness from writes that bypass signals.
+DEFAULT_TTLS = {
+    'total_employees': 300,
+    'total_departments': 600,
+    'employees_on_leave': 60,
+    'employees_present_today': 60,
+    'latest_payroll': 300,
+}
+
+# One dashboard load in this many records its hits and misses, weighted by
+# the rate, so the counters do not add a cache write per metric to every load
+DEFAULT_STATS_SAMPLE_RATE = 100
+
+_MISSING = object()
+
+
+def _total_employees(today):
+    return CustomUser.objects.count()
+
+
+def _total_departments(today):
+    return Department.objects.count()
+
+
+def _employees_on_leave(today):
+    return LeaveApplication.objects.filter(
+        status='APPROVED',
+        start_date__lte=today,
+        end_date__gte=today
+    ).count()
+
+
+def _employees_present_today(today):
+    return Attendance.objects.filter(
+        date=today
+    ).values_list('employee', flat=True).distinct().count()
+
+
+def _latest_payroll(today):
+    return latest_period()
+
+
+METRICS = {
+    'total_employees': _total_employees,
+    'total_departments': _total_departments,
+    'employees_on_leave': _employees_on_leave,
+    'employees_present_today': _employees_present_today,
+    'latest_payroll': _latest_payroll,
+}
+
+
+def get_cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def cache_is_shared():
+    """
+    False when the dashboard cache lives in each process's own memory
+    (LocMemCache, or no cache at all): invalidations from other processes,
+    such as a payroll run in run_job_worker, then never reach the web
+    workers, which serve their copy until its TTL runs out, and hit counts
+    are per process
+    """
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def metric_ttl(name):
+    return getattr(settings, 'DASHBOARD_METRIC_TTLS', {}).get(name, DEFAULT_TTLS[name])
+
+
+def metric_key(name, today):
+    # Date-dependent metrics roll over at midnight without an invalidation
+    return f"{KEY_PREFIX}:{name}:{today.isoformat()}"
+
+
+def _stat_key(name, outcome):
+    return f"{KEY_PREFIX}:stats:{name}:{outcome}"
+
+
+def stats_sample_rate():
+    return getattr(settings, 'DASHBOARD_STATS_SAMPLE_RATE', DEFAULT_STATS_SAMPLE_RATE)
+
+
+def _count(cache, key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # incr() raises for a missing key; add() avoids clobbering a
+        # counter another process just created
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def get_metrics(names=None):
+    """
+    Return a dict of dashboard metric values, reading them from the cache
+    in one round trip and computing (and caching) only the missing ones
+    """
+    names = list(names or METRICS)
+    today = timezone.localdate()
+    cache = get_cache()
+    keys = {name: metric_key(name, today) for name in names}
+    cached = cache.get_many(list(keys.values()))
+
+    values = {}
+    outcomes = {}
+    for name in names:
+        value = cached.get(keys[name], _MISSING)
+        if value is _MISSING:
+            outcomes[name] = 'misses'
+            value = METRICS[name](today)
+            cache.set(keys[name], value, metric_ttl(name))
+        else:
+            outcomes[name] = 'hits'
+        values[name] = value
+
+    rate = stats_sample_rate()
+    if rate and random.randrange(rate) == 0:
+        for name, outcome in outcomes.items():
+            _count(cache, _stat_key(name, outcome), rate)
+    return values
+
+
+def invalidate(*names):
+    """
+    Drop cached metrics once the current transaction commits, so a request
+    running in between cannot cache the pre-commit value again
+    """
+    keys = [metric_key(name, timezone.localdate()) for name in names]
+    transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def cache_stats():
+    """
+    Hit/miss counts and hit rate per metric, as recorded in the cache.
+    The counts are estimates scaled up from the sampled dashboard loads.
+    """
+    cache = get_cache()
+    keys = [_stat_key(name, outcome) for name in METRICS for outcome in ('hits', 'misses')]
+    counts = cache.get_many(keys)
+
+    stats = {}
+    for name in METRICS:
+        hits = counts.get(_stat_key(name, 'hits'), 0)
+        misses = counts.get(_stat_key(name, 'misses'), 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+            'ttl': metric_ttl(name),
+        }
+    return stats
+
+
+def reset_stats():
+    get_cache().delete_many([_stat_key(name, outcome) for name in METRICS for outcome in ('hits', 'misses')])
@@ -0,0 +1,418 @@
+# employee_import.py
+"""
+Bulk employee import from CSV or XLSX.
+
+The file is read as a stream and handled BATCH_SIZE rows at a time:
+values are checked with the model fields' own clean(), departments and
+roles are resolved from dicts loaded once, usernames and employee ids are
+checked against the rest of the file and with one query per batch, and
+valid rows are inserted with bulk_create. A bad row is reported with its
+line number and never stops the import.
+
+Employees are inserted with an unusable password so they can be paid
+straight away; set_default_passwords() then hashes the default password
+(a full PBKDF2 run per user) across a process pool.
+"""
+import csv
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import repeat
+from xml.etree import ElementTree
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import DateField
+
+from . import dashboard_metrics
+from .employee_search import index_employees
+from .ingest import directory
+from .models import CustomUser, Department, EmployeeRole
+
+BATCH_SIZE = 1000
+
+# What add_employee gives a new employee
+DEFAULT_PASSWORD = '12345678'
+
+# Columns the file may have: the EmployeeRegistrationForm fields, with
+# department and role given by name and the photo left out
+IMPORT_FIELDS = [
+    'username', 'first_name', 'middle_name', 'last_name', 'employee_id',
+    'date_of_birth', 'gender', 'phone_number', 'address', 'joined_date',
+    'role', 'department', 'is_active_employee', 'residential_status',
+    'national_id', 'kra_pin', 'nssf_no', 'nhif_no',
+    'basic_salary', 'bank', 'bank_account_name', 'bank_account_number',
+    'bank_branch', 'employee_personal_number', 'date_of_employment',
+    'contract_type', 'job_title', 'employee_email', 'mobile_phone',
+]
+REQUIRED_COLUMNS = ('username', 'employee_id', 'gender')
+_DATE_FIELDS = [
+    name for name in IMPORT_FIELDS
+    if name not in ('role', 'department') and isinstance(CustomUser._meta.get_field(name), DateField)
+]
+
+_XLSX_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+EXCEL_EPOCH = date(1899, 12, 30)
+
+
+class ImportResult:
+    """
+    Outcome of an import: counts, the new employees' primary keys and one
+    (line, username, employee_id, message) entry per rejected row
+    """
+    def __init__(self):
+        self.rows = 0
+        self.created_ids = []
+        self.errors = []
+        self.seconds = 0
+
+    @property
+    def created(self):
+        return len(self.created_ids)
+
+    @property
+    def failed(self):
+        return len(self.errors)
+
+    def add_error(self, line, row, message):
+        self.errors.append((line, row.get('username', ''), row.get('employee_id', ''), message))
+
+
+def load_lookups():
+    """
+    Departments by name and roles by (title, department) and by title
+    alone, case-insensitively. A title shared by several roles only
+    resolves together with a department.
+    """
+    departments = {name.casefold(): pk for pk, name in Department.objects.values_list('id', 'name')}
+    roles = {}
+    titles = {}
+    for pk, title, department_id in EmployeeRole.objects.values_list('id', 'title', 'department_id'):
+        roles[(title.casefold(), department_id)] = pk
+        titles[title.casefold()] = pk if title.casefold() not in titles else None
+    return {'departments': departments, 'roles': roles, 'role_titles': titles}
+
+
+def _choice(field, value):
+    # Accept the label ("Male", "Permanent") as well as the stored code
+    for code, label in field.choices:
+        if value.casefold() in (str(code).casefold(), str(label).casefold()):
+            return code
+    return value
+
+
+def clean_row(row, lookups):
+    """
+    Turn one CSV row into CustomUser field values; returns (values, errors)
+    """
+    values = {}
+    errors = []
+    for name in IMPORT_FIELDS:
+        raw = (row.get(name) or '').strip()
+        if name == 'department':
+            if raw:
+                values['department_id'] = lookups['departments'].get(raw.casefold())
+                if values['department_id'] is None:
+                    errors.append(f"department: unknown department '{raw}'")
+            continue
+        if name == 'role':
+            continue
+
+        field = CustomUser._meta.get_field(name)
+        if not raw:
+            if name in REQUIRED_COLUMNS:
+                errors.append(f"{name}: this field is required")
+            elif field.null:
+                values[name] = None
+            elif not field.has_default():
+                values[name] = ''
+            continue
+        if field.choices:
+            raw = _choice(field, raw)
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as e:
+            errors.append(f"{name}: {' '.join(e.messages)}")
+
+    role = (row.get('role') or '').strip()
+    if role:
+        role_id = lookups['roles'].get((role.casefold(), values.get('department_id')))
+        if role_id is None:
+            role_id = lookups['role_titles'].get(role.casefold())
+        if role_id is None:
+            errors.append(f"role: unknown or ambiguous role '{role}'")
+        values['role_id'] = role_id
+    return values, errors
+
+
+def _insert(employees, lines, rows, result):
+    """
+    Insert a batch with one bulk_create; if it collides with rows written
+    by someone else meanwhile, insert row by row to find the culprits
+    """
+    try:
+        with transaction.atomic():
+            CustomUser.objects.bulk_create(employees, batch_size=BATCH_SIZE)
+        result.created_ids.extend(employee.pk for employee in employees)
+        return
+    except IntegrityError:
+        pass
+    for employee, line, row in zip(employees, lines, rows):
+        employee.pk = None
+        try:
+            with transaction.atomic():
+                employee.save(force_insert=True)
+        except IntegrityError as e:
+            result.add_error(line, row, f"could not be saved: {e}")
+        else:
+            result.created_ids.append(employee.pk)
+
+
+def import_batch(batch, lookups, seen, result):
+    """
+    Validate and insert one batch of (line, row) pairs
+    """
+    candidates = []
+    for line, row in batch:
+        values, errors = clean_row(row, lookups)
+        for name in ('username', 'employee_id'):
+            value = values.get(name)
+            if value and value in seen[name]:
+                errors.append(f"{name}: '{value}' appears more than once in the file")
+        if errors:
+            result.add_error(line, row, '; '.join(errors))
+            continue
+        seen['username'].add(values['username'])
+        seen['employee_id'].add(values['employee_id'])
+        candidates.append((line, row, values))
+
+    # One query per column for the whole batch
+    taken = {
+        name: set(CustomUser.objects.filter(
+            **{f"{name}__in": [values[name] for _, _, values in candidates]}
+        ).values_list(name, flat=True))
+        for name in ('username', 'employee_id')
+    }
+    employees, lines, rows = [], [], []
+    for line, row, values in candidates:
+        clashes = [f"{name}: '{values[name]}' already exists" for name in taken if values[name] in taken[name]]
+        if clashes:
+            result.add_error(line, row, '; '.join(clashes))
+            continue
+        employees.append(CustomUser(password=make_password(None), **values))
+        lines.append(line)
+        rows.append(row)
+    if employees:
+        _insert(employees, lines, rows, result)
+
+
+def check_columns(fieldnames):
+    columns = set(fieldnames or ())
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    unknown = sorted(columns - set(IMPORT_FIELDS))
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(unknown)} (expected some of: {', '.join(IMPORT_FIELDS)})")
+
+
+def file_format(filename):
+    """
+    'csv' or 'xlsx' from a file name; ValueError for anything else
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in ('.csv', '.xlsx'):
+        raise ValueError("Only .csv and .xlsx files can be imported")
+    return extension[1:]
+
+
+def csv_rows(fh):
+    """
+    (line, row) pairs from a binary CSV file object
+    """
+    text = io.TextIOWrapper(fh, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.DictReader(text)
+        check_columns(reader.fieldnames)
+        for row in reader:
+            # Line numbers as a spreadsheet shows them, header included
+            yield reader.line_num, row
+    finally:
+        # Leave the caller's file open
+        text.detach()
+
+
+def _column_index(reference):
+    # "AB12" -> 27
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord('A') + 1
+    return index - 1
+
+
+def _first_sheet(archive):
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{{{_XLSX_NS}}}sheets/{{{_XLSX_NS}}}sheet')
+    rel_id = sheet.get(f'{{{_REL_NS}}}id') if sheet is not None else None
+    if rel_id and 'xl/_rels/workbook.xml.rels' in archive.namelist():
+        for rel in ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels')):
+            if rel.get('Id') == rel_id:
+                target = rel.get('Target')
+                return target.lstrip('/') if target.startswith('/') else 'xl/' + target
+    return 'xl/worksheets/sheet1.xml'
+
+
+def xlsx_rows(fh):
+    """
+    (line, row) pairs from the first sheet of a binary XLSX file object.
+    The sheet XML is parsed incrementally with the standard library, as
+    exports.stream_xlsx writes it.
+    """
+    archive = zipfile.ZipFile(fh)
+    shared = []
+    if 'xl/sharedStrings.xml' in archive.namelist():
+        with archive.open('xl/sharedStrings.xml') as strings:
+            for _, element in ElementTree.iterparse(strings):
+                if element.tag == f'{{{_XLSX_NS}}}si':
+                    shared.append(''.join(text.text or '' for text in element.iter(f'{{{_XLSX_NS}}}t')))
+                    element.clear()
+
+    header = None
+    line = 0
+    with archive.open(_first_sheet(archive)) as sheet:
+        for _, element in ElementTree.iterparse(sheet):
+            if element.tag != f'{{{_XLSX_NS}}}row':
+                continue
+            values = {}
+            for position, cell in enumerate(element.iter(f'{{{_XLSX_NS}}}c')):
+                kind = cell.get('t')
+                if kind == 'inlineStr':
+                    value = ''.join(text.text or '' for text in cell.iter(f'{{{_XLSX_NS}}}t'))
+                else:
+                    value = cell.findtext(f'{{{_XLSX_NS}}}v') or ''
+                    if kind == 's' and value:
+                        value = shared[int(value)]
+                reference = cell.get('r')
+                values[_column_index(reference) if reference else position] = value
+            line = int(element.get('r') or 0) or line + 1
+            element.clear()
+
+            if header is None:
+                header = {index: name.strip() for index, name in values.items() if name.strip()}
+                check_columns(header.values())
+                continue
+            row = {name: values.get(index, '') for index, name in header.items()}
+            if any(value.strip() for value in row.values()):
+                yield line, _excel_dates(row)
+
+
+def _excel_dates(row):
+    # Date cells are stored as days since 1899-12-30
+    for name in _DATE_FIELDS:
+        value = row.get(name, '')
+        if value.replace('.', '', 1).isdigit():
+            row[name] = (EXCEL_EPOCH + timedelta(days=int(float(value)))).isoformat()
+    return row
+
+
+def read_rows(fh, file_format='csv'):
+    """
+    (line, row) pairs from a binary CSV or XLSX file object. Raises
+    ValueError for a header without the required columns.
+    """
+    return xlsx_rows(fh) if file_format == 'xlsx' else csv_rows(fh)
+
+
+def import_employees(fh, file_format='csv', batch_size=BATCH_SIZE):
+    """
+    Import employees from a binary CSV or XLSX file object with a header
+    row of IMPORT_FIELDS names. Raises ValueError for a bad header; row
+    problems are collected in the returned ImportResult.
+    """
+    start = time.perf_counter()
+    rows = read_rows(fh, file_format)
+
+    result = ImportResult()
+    lookups = load_lookups()
+    seen = {'username': set(), 'employee_id': set()}
+    batch = []
+    for line, row in rows:
+        result.rows += 1
+        batch.append((line, row))
+        if len(batch) >= batch_size:
+            import_batch(batch, lookups, seen, result)
+            batch = []
+    if batch:
+        import_batch(batch, lookups, seen, result)
+
+    # Rows that clashed with the database are found after the rest of their batch
+    result.errors.sort(key=lambda error: error[0])
+
+    # bulk_create skips the CustomUser signals
+    if result.created:
+        directory.clear()
+        dashboard_metrics.invalidate('total_employees')
+        index_employees(result.created_ids)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def _init_worker():
+    # Needed when the pool uses the spawn start method; forked workers
+    # inherit an already configured Django.
+    if not apps.ready:
+        django.setup()
+
+
+def default_hash_workers():
+    return getattr(settings, 'EMPLOYEE_IMPORT_HASH_WORKERS', None) or os.cpu_count() or 1
+
+
+def set_default_passwords(user_ids, password=DEFAULT_PASSWORD, workers=None, batch_size=BATCH_SIZE):
+    """
+    Give the imported employees the default password, hashing it across a
+    process pool. Employees who have set a password of their own in the
+    meantime are left alone. Returns the number of passwords set.
+    """
+    workers = workers or default_hash_workers()
+    user_ids = list(user_ids)
+    updated = 0
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    try:
+        for offset in range(0, len(user_ids), batch_size):
+            ids = user_ids[offset:offset + batch_size]
+            if pool is None:
+                hashes = [make_password(password) for _ in ids]
+            else:
+                hashes = list(pool.map(make_password, repeat(password, len(ids)), chunksize=max(1, len(ids) // (workers * 4))))
+            users = list(CustomUser.objects.filter(
+                pk__in=ids, password__startswith=UNUSABLE_PASSWORD_PREFIX
+            ).only('id'))
+            by_pk = dict(zip(ids, hashes))
+            for user in users:
+                user.password = by_pk[user.pk]
+            CustomUser.objects.bulk_update(users, ['password'], batch_size=batch_size)
+            updated += len(users)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return updated
+
+
+def write_error_report(result, fh):
+    """
+    CSV of the rejected rows, for fixing and re-importing
+    """
+    writer = csv.writer(fh)
+    writer.writerow(['line', 'username', 'employee_id', 'errors'])
+    writer.writerows(result.errors)
@@ -0,0 +1,240 @@
+# employee_search.py
+"""
+Full-text search over employees by name, employee_id, national_id, KRA PIN
+and phone number.
+
+Each employee has one search document in mywebsite_employee_search: an FTS5
+table on SQLite, a tsvector column with a GIN index on PostgreSQL (created
+by migration 0017). Every word of a query is matched as a prefix, so
+"wanj 0712" finds Jane Wanjiru on 0712 345 678. The index is kept in step
+by CustomUser signals; bulk inserts call index_employees() themselves, and
+rebuild_employee_search recreates it. On other databases, or where the
+table is missing, search falls back to icontains lookups.
+"""
+import re
+
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import CustomUser
+
+INDEX_TABLE = 'mywebsite_employee_search'
+
+SEARCH_FIELDS = (
+    'first_name', 'middle_name', 'last_name', 'username', 'employee_id',
+    'national_id', 'kra_pin', 'phone_number', 'mobile_phone',
+)
+
+PHONE_FIELDS = ('phone_number', 'mobile_phone')
+
+# What the FTS5 unicode61 tokenizer treats as one word
+_WORD = re.compile(r'[^\W_]+')
+
+MAX_QUERY_WORDS = 8
+
+BATCH_SIZE = 1000
+
+_backends = {}
+
+
+def search_backend(using='default'):
+    """
+    'fts5', 'postgresql' or 'fallback' for the database alias, detected
+    once per process
+    """
+    if using not in _backends:
+        connection = connections[using]
+        backend = 'fallback'
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                if INDEX_TABLE in connection.introspection.table_names(cursor):
+                    backend = 'fts5' if connection.vendor == 'sqlite' else 'postgresql'
+        _backends[using] = backend
+    return _backends[using]
+
+
+def search_document(values):
+    """
+    The text indexed for one employee, from a dict of SEARCH_FIELDS. Phone
+    numbers are added digits-only as well, and +254 numbers also in their
+    local 07... form, so either spelling matches as a prefix.
+    """
+    parts = []
+    for name in SEARCH_FIELDS:
+        value = values.get(name)
+        if not value:
+            continue
+        parts.append(str(value))
+        if name in PHONE_FIELDS:
+            digits = re.sub(r'\D', '', value)
+            parts.append(digits)
+            if digits.startswith('254'):
+                parts.append('0' + digits[3:])
+    return ' '.join(parts)
+
+
+def query_words(text):
+    return [word.lower() for word in _WORD.findall(text or '')][:MAX_QUERY_WORDS]
+
+
+def _match_expression(words, backend, prefix=True):
+    if backend == 'fts5':
+        return ' AND '.join(f'"{word}"*' if prefix else f'"{word}"' for word in words)
+    return ' & '.join(f'{word}:*' if prefix else word for word in words)
+
+
+def _fallback_filter(words):
+    condition = Q()
+    for word in words:
+        any_field = Q()
+        for name in SEARCH_FIELDS:
+            any_field |= Q(**{f'{name}__icontains': word})
+        condition &= any_field
+    return condition
+
+
+def _matching_ids_sql(words, backend):
+    match = _match_expression(words, backend)
+    if backend == 'fts5':
+        return f"SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s", [match]
+    return f"SELECT employee_id FROM {INDEX_TABLE} WHERE document @@ to_tsquery('simple', %s)", [match]
+
+
+def filter_employees(queryset, text):
+    """
+    Narrow a CustomUser queryset to the employees matching every word of
+    text; an empty query leaves it as it is
+    """
+    words = query_words(text)
+    if not words:
+        return queryset
+    backend = search_backend(queryset.db)
+    if backend == 'fallback':
+        return queryset.filter(_fallback_filter(words))
+    return queryset.filter(pk__in=RawSQL(*_matching_ids_sql(words, backend)))
+
+
+def ranked_ids(text, limit=10, using='default'):
+    """
+    Primary keys of the best matches for text, best first
+    """
+    words = query_words(text)
+    if not words:
+        return []
+    backend = search_backend(using)
+    if backend == 'fallback':
+        return list(CustomUser.objects.using(using).filter(_fallback_filter(words)).order_by('id').values_list(
+            'id', flat=True
+        )[:limit])
+
+    if backend == 'fts5':
+        sql = f"SELECT rowid FROM {INDEX_TABLE} WHERE {INDEX_TABLE} MATCH %s ORDER BY rank LIMIT %s"
+    else:
+        sql = (
+            f"SELECT employee_id FROM {INDEX_TABLE} WHERE document @@ to_tsquery('simple', %s) "
+            f"ORDER BY ts_rank(document, to_tsquery('simple', %s)) DESC, employee_id LIMIT %s"
+        )
+    # Whole-word matches first, so "Kamau" is not buried under "Kamaul..."
+    ids = []
+    with connections[using].cursor() as cursor:
+        for prefix in (False, True):
+            match = _match_expression(words, backend, prefix)
+            cursor.execute(sql, [match, limit] if backend == 'fts5' else [match, match, limit])
+            ids.extend(pk for pk, in cursor.fetchall() if pk not in ids)
+            if len(ids) >= limit:
+                break
+    return ids[:limit]
+
+
+def autocomplete(text, limit=10, using='default'):
+    """
+    Up to limit matching employees as dicts for the autocomplete endpoint,
+    best match first. Two or three queries.
+    """
+    ids = ranked_ids(text, limit, using)
+    if not ids:
+        return []
+    rows = {
+        row['id']: row
+        for row in CustomUser.objects.using(using).filter(pk__in=ids).values(
+            'id', 'employee_id', 'first_name', 'last_name', 'username', 'department__name', 'is_active_employee'
+        )
+    }
+    return [rows[pk] for pk in ids if pk in rows]
+
+
+def _write(cursor, backend, documents):
+    ids = [pk for pk, _ in documents]
+    if backend == 'fts5':
+        cursor.execute(
+            f"DELETE FROM {INDEX_TABLE} WHERE rowid IN ({', '.join(['%s'] * len(ids))})", ids
+        )
+        cursor.executemany(f"INSERT INTO {INDEX_TABLE} (rowid, document) VALUES (%s, %s)", documents)
+    else:
+        cursor.executemany(
+            f"INSERT INTO {INDEX_TABLE} (employee_id, document) VALUES (%s, to_tsvector('simple', %s)) "
+            f"ON CONFLICT (employee_id) DO UPDATE SET document = EXCLUDED.document",
+            documents
+        )
+
+
+def index_employees(employee_ids, using='default'):
+    """
+    (Re)write the search documents of the given employees; returns how
+    many were written
+    """
+    backend = search_backend(using)
+    if backend == 'fallback':
+        return 0
+    employee_ids = list(employee_ids)
+    written = 0
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        for offset in range(0, len(employee_ids), BATCH_SIZE):
+            rows = CustomUser.objects.using(using).filter(
+                pk__in=employee_ids[offset:offset + BATCH_SIZE]
+            ).values('id', *SEARCH_FIELDS)
+            documents = [(row['id'], search_document(row)) for row in rows]
+            if documents:
+                _write(cursor, backend, documents)
+                written += len(documents)
+    return written
+
+
+def index_employee(employee):
+    """
+    Write one saved employee's search document straight from the instance
+    """
+    using = employee._state.db or 'default'
+    backend = search_backend(using)
+    if backend == 'fallback':
+        return
+    document = search_document({name: getattr(employee, name) for name in SEARCH_FIELDS})
+    with connections[using].cursor() as cursor:
+        _write(cursor, backend, [(employee.pk, document)])
+
+
+def remove_employees(employee_ids, using='default'):
+    backend = search_backend(using)
+    if backend == 'fallback' or not employee_ids:
+        return
+    column = 'rowid' if backend == 'fts5' else 'employee_id'
+    employee_ids = list(employee_ids)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {INDEX_TABLE} WHERE {column} IN ({', '.join(['%s'] * len(employee_ids))})", employee_ids
+        )
+
+
+def rebuild_index(using='default'):
+    """
+    Recreate every search document from the CustomUser table; returns the
+    number of employees indexed
+    """
+    backend = search_backend(using)
+    if backend == 'fallback':
+        return 0
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+        return index_employees(CustomUser.objects.using(using).values_list('id', flat=True), using)
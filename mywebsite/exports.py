@@ -0,0 +1,243 @@
+# exports.py
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.utils import timezone
+
+from .models import Attendance, LeaveApplication, Salary, YearToDateLedger
+from .utils import ZipStream
+
+CHUNK_SIZE = 2000
+
+CSV_CONTENT_TYPE = 'text/csv'
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# (header, field) pairs; fields are read with values_list() so no model
+# instances are built while streaming
+SALARY_COLUMNS = [
+    ('Employee ID', 'employee__employee_id'),
+    ('Username', 'employee__username'),
+    # The department the salary was paid under, as in the period summaries
+    ('Department', 'department__name'),
+    ('Month', 'month'),
+    ('Year', 'year'),
+    ('Base Salary', 'base_salary'),
+    ('Bonus', 'bonus'),
+    ('Tax Rate', 'tax_rate'),
+    ('Deduction Method', 'deduction_method'),
+    ('PAYE', 'paye'),
+    ('NSSF', 'nssf'),
+    ('SHIF/NHIF', 'shif'),
+    ('Housing Levy', 'housing_levy'),
+    ('Deductions', 'deductions'),
+    ('Net Salary', 'net_salary'),
+]
+
+ATTENDANCE_COLUMNS = [
+    ('Employee ID', 'employee__employee_id'),
+    ('Username', 'employee__username'),
+    ('Department', 'employee__department__name'),
+    ('Date', 'date'),
+    ('Check-in', 'check_in'),
+    ('Check-out', 'check_out'),
+    ('Present', 'is_present'),
+    ('On Leave', 'is_leave'),
+]
+
+LEAVE_COLUMNS = [
+    ('Employee ID', 'employee__employee_id'),
+    ('Username', 'employee__username'),
+    ('Department', 'employee__department__name'),
+    ('Leave Type', 'leave_type__name'),
+    ('Start Date', 'start_date'),
+    ('End Date', 'end_date'),
+    ('Days', 'days'),
+    ('Status', 'status'),
+    ('Reason', 'reason'),
+    ('Applied On', 'applied_on'),
+]
+
+# P9-style annual return: one row per employee from the year-to-date ledger
+ANNUAL_RETURN_COLUMNS = [
+    ('Employee ID', 'employee__employee_id'),
+    ('Username', 'employee__username'),
+    ('KRA PIN', 'employee__kra_pin'),
+    ('Department', 'employee__department__name'),
+    ('Year', 'year'),
+    ('Months Paid', 'month_count'),
+    ('Basic Salary', 'total_base'),
+    ('Bonus', 'total_bonus'),
+    ('Gross Pay', 'total_gross'),
+    ('PAYE', 'total_paye'),
+    ('NSSF', 'total_nssf'),
+    ('SHIF/NHIF', 'total_shif'),
+    ('Housing Levy', 'total_housing_levy'),
+    ('Total Deductions', 'total_tax'),
+    ('Net Pay', 'total_net'),
+]
+
+# Orderings that match the (year, month, id), (date, id), (applied_on, id)
+# and (year, employee) indexes
+EXPORTS = {
+    'salaries': (Salary, SALARY_COLUMNS, ('year', 'month', 'id')),
+    'attendance': (Attendance, ATTENDANCE_COLUMNS, ('date', 'id')),
+    'leave_applications': (LeaveApplication, LEAVE_COLUMNS, ('applied_on', 'id')),
+    'annual_tax_returns': (YearToDateLedger, ANNUAL_RETURN_COLUMNS, ('year', 'employee_id')),
+}
+
+# Spreadsheets evaluate a CSV cell starting with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Characters XML 1.0 does not allow, which a free-text field may contain
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def export_rows(queryset, columns, ordering):
+    """
+    Yield value tuples for the columns, fetched chunk by chunk
+    """
+    return queryset.order_by(*ordering).values_list(
+        *[field for _, field in columns]
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return 'Yes' if value else 'No'
+    return str(value)
+
+
+def _csv_cell(value):
+    """
+    Cell text for a CSV export. Text values that a spreadsheet would run as
+    a formula, such as a name or reason starting with '=', are prefixed
+    with an apostrophe; numbers (including negative amounts) are left alone.
+    """
+    text = _cell_text(value)
+    if isinstance(value, str) and text.startswith(FORMULA_PREFIXES):
+        return "'" + text
+    return text
+
+
+class _Echo:
+    """
+    File-like object whose write() returns the line instead of storing it
+    """
+    def write(self, value):
+        return value
+
+
+def stream_csv(header, rows):
+    """
+    Yield a CSV document in chunks of CHUNK_SIZE lines, starting with the
+    header (and a BOM, so Excel reads it as UTF-8) straight away
+    """
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(header)
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow([_csv_cell(value) for value in row]))
+        if len(lines) == CHUNK_SIZE:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines)
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_INVALID_XML.sub('', _cell_text(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(value) for value in values) + '</row>'
+
+
+def stream_xlsx(sheet_name, header, rows):
+    """
+    Yield a single-sheet XLSX workbook chunk by chunk. The worksheet is
+    written row by row into a ZIP entry with inline strings, so neither
+    the rows nor the finished file are ever held in memory.
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name[:31], {'"': '&quot;'})))
+        archive.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(header).encode())
+            for count, row in enumerate(rows, 1):
+                sheet.write(_xlsx_row(row).encode())
+                if count % CHUNK_SIZE == 0:
+                    yield stream.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield stream.drain()
+
+
+def stream_export(name, queryset, file_format):
+    """
+    Yield the chunks of a CSV or XLSX export of one of the EXPORTS
+    """
+    model, columns, ordering = EXPORTS[name]
+    header = [title for title, _ in columns]
+    rows = export_rows(queryset, columns, ordering)
+    if file_format == 'xlsx':
+        return stream_xlsx(model._meta.verbose_name_plural.title(), header, rows)
+    return stream_csv(header, rows)
@@ -0,0 +1,127 @@
+# filters.py
+from django.utils.dateparse import parse_date
+
+from .models import LeaveApplication
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _int(params, name, minimum=None, maximum=None):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        value = int(value)
+    except ValueError:
+        raise InvalidFilter(f"Invalid {name}: {params.get(name)}")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise InvalidFilter(f"Invalid {name}: {value}")
+    return value
+
+
+def _date(params, name):
+    value = params.get(name)
+    if value in (None, ''):
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise InvalidFilter(f"Invalid {name}: {value} (expected YYYY-MM-DD)")
+    return parsed
+
+
+def _employee_filters(queryset, params):
+    """
+    ?employee=<employee_id>&department=<department pk>
+    """
+    if params.get('employee'):
+        queryset = queryset.filter(employee__employee_id=params['employee'])
+    department = _int(params, 'department')
+    if department is not None:
+        queryset = queryset.filter(employee__department_id=department)
+    return queryset
+
+
+def filter_salaries(queryset, params):
+    """
+    ?year=&month= plus the employee filters
+    """
+    year = _int(params, 'year', 1900, 9999)
+    month = _int(params, 'month', 1, 12)
+    if year is not None:
+        queryset = queryset.filter(year=year)
+    if month is not None:
+        queryset = queryset.filter(month=month)
+    return _employee_filters(queryset, params)
+
+
+def filter_annual_returns(queryset, params):
+    """
+    ?year= plus the employee filters
+    """
+    year = _int(params, 'year', 1900, 9999)
+    if year is not None:
+        queryset = queryset.filter(year=year)
+    return _employee_filters(queryset, params)
+
+
+def filter_attendance(queryset, params):
+    """
+    ?start=&end= (dates, inclusive) plus the employee filters
+    """
+    start = _date(params, 'start')
+    end = _date(params, 'end')
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lte=end)
+    return _employee_filters(queryset, params)
+
+
+def _status(params):
+    status = params.get('status')
+    if not status:
+        return None
+    if status not in dict(LeaveApplication.STATUS_CHOICES):
+        raise InvalidFilter(f"Invalid status: {status}")
+    return status
+
+
+def filter_leave_applications(queryset, params):
+    """
+    ?status=&leave_type=&start=&end= (leaves overlapping the range) plus
+    the employee filters
+    """
+    status = _status(params)
+    if status is not None:
+        queryset = queryset.filter(status=status)
+    leave_type = _int(params, 'leave_type')
+    if leave_type is not None:
+        queryset = queryset.filter(leave_type_id=leave_type)
+    start = _date(params, 'start')
+    end = _date(params, 'end')
+    if start is not None:
+        queryset = queryset.filter(end_date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(start_date__lte=end)
+    return _employee_filters(queryset, params)
+
+
+def filename_suffix(params):
+    """
+    '_2025_3'-style export file name suffix from the year, month, start,
+    end and status filters. Built from the parsed values, so query text
+    never reaches the Content-Disposition header.
+    """
+    values = [
+        _int(params, 'year', 1900, 9999),
+        _int(params, 'month', 1, 12),
+        _date(params, 'start'),
+        _date(params, 'end'),
+        _status(params),
+    ]
+    return ''.join(f"_{value}" for value in values if value is not None)
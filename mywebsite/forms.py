@@ -10,6 +10,8 @@ from .models import (
 # forms.py
 from django import forms
 from .models import LeaveApplication, LeaveType
+from .leave_balances import days_used
+from .work_calendar import business_days
 from django.utils import timezone
 from datetime import timedelta
 class UserLoginForm(forms.Form):
@@ -198,6 +200,10 @@ class LeaveApplicationForm(forms.ModelForm):
         model = LeaveApplication
         fields = ['leave_type', 'start_date', 'end_date', 'reason']
 
+    def __init__(self, *args, employee=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.employee = employee
+
     def clean(self):
         cleaned_data = super().clean()
         start_date = cleaned_data.get('start_date')
@@ -209,30 +215,25 @@ class LeaveApplicationForm(forms.ModelForm):
             if start_date > end_date:
                 raise forms.ValidationError("End date must be after start date")
             
-            # Calculate number of days
-            days = (end_date - start_date).days + 1
+            # Working days only: weekends and holidays in the range are not taken
+            employee = self.employee or self.initial.get('employee')
+            days = business_days(start_date, end_date, getattr(employee, 'department_id', None))
+            if days == 0:
+                raise forms.ValidationError("The selected dates contain no working days")
             cleaned_data['days'] = days
 
-            # Check leave type annual limit
-            if leave_type:
-                current_year = timezone.now().year
-                existing_leaves = LeaveApplication.objects.filter(
-                    employee=self.initial.get('employee'),
-                    leave_type=leave_type,
-                    start_date__year=current_year,
-                    status__in=['PENDING', 'APPROVED']
-                )
-                
-                total_days = sum(leave.days for leave in existing_leaves)
-                total_days += days
+            # Check leave type annual limit against the leave ledger
+            if leave_type and employee is not None:
+                used_days = days_used(employee.pk, leave_type.pk, start_date.year)
+                total_days = used_days + days
 
                 # Detailed error message
                 if total_days > leave_type.max_days_per_year:
-                    remaining_days = leave_type.max_days_per_year - (total_days - days)
+                    remaining_days = leave_type.max_days_per_year - used_days
                     error_message = (
                         f"You have exceeded the maximum allowed {leave_type.name} days. "
                         f"Maximum allowed: {leave_type.max_days_per_year} days, "
-                        f"Already used/pending: {total_days - days} days, "
+                        f"Already used/pending: {used_days} days, "
                         f"Remaining days: {remaining_days} days"
                     )
                     raise forms.ValidationError(error_message)
@@ -274,6 +275,47 @@ class AttendanceApplicationForm(forms.ModelForm):
         return cleaned_data
 
 
+class BulkAttendanceForm(forms.Form):
+    """
+    Mark attendance for a whole department or the whole company
+    """
+    STATUS_CHOICES = [
+        ('LEAVE', 'On leave / public holiday'),
+        ('PRESENT', 'Present'),
+        ('ABSENT', 'Absent'),
+    ]
+
+    department = forms.ModelChoiceField(
+        queryset=Department.objects.all(),
+        required=False,
+        empty_label="All departments",
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+    start_date = forms.DateField(
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    end_date = forms.DateField(
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'})
+    )
+    status = forms.ChoiceField(
+        choices=STATUS_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+
+        if start_date and end_date:
+            if start_date > end_date:
+                raise forms.ValidationError("End date must be after start date")
+            if (end_date - start_date).days > 366:
+                raise forms.ValidationError("Date range cannot be longer than a year")
+
+        return cleaned_data
+
+
 class TaxDeclarationForm(forms.ModelForm):
     """
     Tax declaration form
@@ -296,10 +338,11 @@ class DepartmentForm(forms.ModelForm):
     """
     class Meta:
         model = Department
-        fields = ['name', 'description']
+        fields = ['name', 'description', 'working_weekdays']
         widgets = {
             'name': forms.TextInput(attrs={'class': 'form-control'}),
             'description': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
+            'working_weekdays': forms.TextInput(attrs={'class': 'form-control', 'placeholder': '01234'}),
         }
 
 class EmployeeRoleForm(forms.ModelForm):
@@ -439,11 +482,12 @@ class SalaryForm(forms.ModelForm):
 
     class Meta:
         model = Salary
-        fields = ['employee', 'base_salary', 'bonus', 'tax_rate', 'month', 'year']
+        fields = ['employee', 'base_salary', 'bonus', 'deduction_method', 'tax_rate', 'month', 'year']
         widgets = {
             'employee': forms.Select(attrs={'class': 'form-control'}),
             'base_salary': forms.NumberInput(attrs={'class': 'form-control'}),
             'bonus': forms.NumberInput(attrs={'class': 'form-control'}),
+            'deduction_method': forms.Select(attrs={'class': 'form-control'}),
             'tax_rate': forms.NumberInput(attrs={'class': 'form-control'}),
             'year': forms.NumberInput(attrs={'class': 'form-control'}),
         }
\ No newline at end of file
@@ -0,0 +1,176 @@
+# ingest.py
+import csv
+import io
+import json
+import threading
+import time
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import dashboard_metrics
+from .models import Attendance, AttendanceIngestBatch, CustomUser
+
+BATCH_SIZE = 2000
+
+
+class EmployeeDirectory:
+    """
+    In-memory map of employee_id strings to CustomUser primary keys, so a
+    batch of device events resolves employees without a query per event.
+    Unknown ids are looked up once per batch. The map is cleared when an
+    employee is saved or deleted in this process and reloaded after
+    max_age seconds to pick up changes made by other processes.
+    """
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._pks = None
+        self._loaded_at = 0
+
+    def clear(self):
+        with self._lock:
+            self._pks = None
+
+    def resolve(self, employee_ids):
+        with self._lock:
+            if self._pks is None or time.monotonic() - self._loaded_at > self.max_age:
+                self._pks = dict(CustomUser.objects.values_list('employee_id', 'id'))
+                self._loaded_at = time.monotonic()
+            missing = [value for value in employee_ids if value not in self._pks]
+            if missing:
+                self._pks.update(
+                    CustomUser.objects.filter(employee_id__in=missing).values_list('employee_id', 'id')
+                )
+            return {value: self._pks[value] for value in employee_ids if value in self._pks}
+
+
+directory = EmployeeDirectory()
+
+
+def parse_json_events(body):
+    """
+    Accept either a list of events or {"events": [...]}
+    """
+    data = json.loads(body)
+    if isinstance(data, dict):
+        data = data.get('events', [])
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of events")
+    return data
+
+
+def parse_csv_events(text):
+    """
+    CSV with an employee_id,timestamp[,type] header
+    """
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _normalise(event):
+    """
+    Return (employee_id, timestamp, type) for a raw event or None if invalid
+    """
+    if not isinstance(event, dict):
+        return None
+    employee_id = str(event.get('employee_id') or '').strip()
+    timestamp = parse_datetime(str(event.get('timestamp') or '').strip())
+    kind = str(event.get('type') or 'IN').strip().upper()
+    if not employee_id or timestamp is None or kind not in ('IN', 'OUT'):
+        return None
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return employee_id, timestamp, kind
+
+
+def collapse_events(events, pks):
+    """
+    Fold events into one (check_in, check_out) pair per (employee pk, date):
+    the earliest IN (or earliest event) and the latest OUT.
+    """
+    days = {}
+    for employee_id, timestamp, kind in events:
+        pk = pks.get(employee_id)
+        if pk is None:
+            continue
+        key = (pk, timezone.localdate(timestamp))
+        check_in, check_out, first_seen = days.get(key, (None, None, timestamp))
+        first_seen = min(first_seen, timestamp)
+        if kind == 'IN':
+            check_in = timestamp if check_in is None else min(check_in, timestamp)
+        else:
+            check_out = timestamp if check_out is None else max(check_out, timestamp)
+        days[key] = (check_in, check_out, first_seen)
+    return {key: (check_in or first_seen, check_out) for key, (check_in, check_out, first_seen) in days.items()}
+
+
+def upsert_attendance(days):
+    """
+    Merge collapsed check-in/out pairs with any existing rows and write them
+    with one bulk upsert on (employee, date). Returns (created, updated).
+    """
+    if not days:
+        return 0, 0
+
+    employee_pks = sorted({pk for pk, _ in days})
+    dates = [day for _, day in days]
+    rows = []
+    with transaction.atomic():
+        existing = {}
+        # Chunk the IN list to stay under the backend's parameter limit
+        for offset in range(0, len(employee_pks), 500):
+            for row in Attendance.objects.select_for_update().filter(
+                employee_id__in=employee_pks[offset:offset + 500],
+                date__range=(min(dates), max(dates))
+            ).only('id', 'employee_id', 'date', 'check_in', 'check_out', 'is_present'):
+                existing[(row.employee_id, row.date)] = row
+        updated = 0
+        for (pk, day), (check_in, check_out) in days.items():
+            current = existing.get((pk, day))
+            if current is not None:
+                updated += 1
+                # Placeholder rows (leave, holiday, absent) have no real clock-in
+                if current.is_present:
+                    check_in = min(check_in, current.check_in)
+                if current.check_out is not None:
+                    check_out = current.check_out if check_out is None else max(check_out, current.check_out)
+            # A clock-in overrides a leave or holiday placeholder for the day,
+            # so the row must not stay flagged as leave as well
+            rows.append(Attendance(
+                employee_id=pk, date=day, check_in=check_in, check_out=check_out, is_present=True, is_leave=False
+            ))
+
+        Attendance.objects.bulk_create(
+            rows,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['employee', 'date'],
+            update_fields=['check_in', 'check_out', 'is_present', 'is_leave'],
+        )
+        dashboard_metrics.invalidate('employees_present_today')
+    return len(rows) - updated, updated
+
+
+def ingest_events(raw_events, source=''):
+    """
+    Validate, de-duplicate and upsert one batch of device events and record
+    an AttendanceIngestBatch with its counts and throughput
+    """
+    start = time.perf_counter()
+    events = [event for event in map(_normalise, raw_events) if event is not None]
+    pks = directory.resolve({employee_id for employee_id, _, _ in events})
+    unknown = sum(1 for employee_id, _, _ in events if employee_id not in pks)
+    created, updated = upsert_attendance(collapse_events(events, pks))
+    elapsed = time.perf_counter() - start
+
+    return AttendanceIngestBatch.objects.create(
+        source=source[:100],
+        events_received=len(raw_events),
+        events_rejected=len(raw_events) - len(events),
+        unknown_employees=unknown,
+        rows_created=created,
+        rows_updated=updated,
+        duration_ms=elapsed * 1000,
+        events_per_second=len(raw_events) / elapsed if elapsed > 0 else 0,
+    )
@@ -0,0 +1,299 @@
+# jobs.py
+"""
+Database-backed background jobs.
+
+enqueue() stores a Job row; run_job_worker processes claim QUEUED jobs one
+at a time with a conditional UPDATE, so any number of workers (and any
+database) can share the table without a broker. A failed job is retried
+with exponential backoff until it runs out of attempts. While a job runs
+its worker refreshes Job.heartbeat_at, so a long payroll run is left alone
+and only a job whose worker died (no heartbeat for JOB_TIMEOUT) is picked
+up again; a worker only records its outcome while the job is still its
+own. Files a job produces are stored in MEDIA_ROOT through Job.result_file.
+"""
+import io
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .employee_import import file_format, import_employees, set_default_passwords, write_error_report
+from .models import CustomUser, Job, PayrollRun
+from .payroll import execute_payroll_run
+from .reports import monthly_report_pdf, tax_certificate_pdf
+
+logger = logging.getLogger(__name__)
+
+PENDING = ('QUEUED', 'RUNNING')
+
+
+def save_result_file(job, filename, data):
+    job.result_name = filename
+    job.result_file.save(filename, ContentFile(data), save=False)
+
+
+def _monthly_payroll_report_pdf(job):
+    filename, pdf = monthly_report_pdf(job.params['year'], job.params['month'])
+    if pdf is None:
+        raise RuntimeError("PDF generation failed")
+    save_result_file(job, filename, pdf)
+    return {'bytes': len(pdf)}
+
+
+def _tax_certificate_pdf(job):
+    employee = CustomUser.objects.get(pk=job.params['employee_id'])
+    filename, pdf = tax_certificate_pdf(employee, job.params['year'])
+    if pdf is None:
+        raise RuntimeError("PDF generation failed")
+    save_result_file(job, filename, pdf)
+    return {'bytes': len(pdf)}
+
+
+def _payroll_run(job):
+    run = PayrollRun.objects.get(pk=job.params['run_id'])
+    if run.status != 'COMPLETED':
+        # A retry only creates the salaries that are still missing
+        execute_payroll_run(run)
+    if run.status == 'FAILED':
+        raise RuntimeError(run.error)
+    return {
+        'salaries_created': run.salaries_created,
+        'skipped_count': run.skipped_count,
+        'rows_per_second': round(run.rows_per_second),
+    }
+
+
+def _employee_import(job):
+    path = job.params['path']
+    with default_storage.open(path, 'rb') as fh:
+        result = import_employees(fh, file_format(path))
+    # The employees exist from here on; hashing only enables their logins
+    passwords_set = set_default_passwords(result.created_ids)
+    if result.errors:
+        report = io.StringIO()
+        write_error_report(result, report)
+        save_result_file(job, 'employee_import_errors.csv', report.getvalue().encode())
+    default_storage.delete(path)
+    return {
+        'rows': result.rows,
+        'created': result.created,
+        'failed': result.failed,
+        'passwords_set': passwords_set,
+        'seconds': round(result.seconds, 2),
+    }
+
+
+# kind -> handler(job). A handler returns a JSON-serialisable result and
+# may attach a file with save_result_file(); raising marks the attempt as
+# failed.
+HANDLERS = {
+    'monthly_payroll_report_pdf': _monthly_payroll_report_pdf,
+    'tax_certificate_pdf': _tax_certificate_pdf,
+    'payroll_run': _payroll_run,
+    'employee_import': _employee_import,
+}
+
+
+def enqueue(kind, params, created_by=None):
+    """
+    Queue a job, or return the identical one the same user queued that is
+    still queued or running (only its creator and staff may see a job).
+    With JOB_QUEUE_ASYNC off the job runs straight away.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job.objects.filter(
+        kind=kind, params=params, created_by=created_by, status__in=PENDING
+    ).order_by('id').first()
+    if job is None:
+        run_inline = not getattr(settings, 'JOB_QUEUE_ASYNC', True)
+        job = Job.objects.create(
+            kind=kind, params=params, created_by=created_by,
+            # Without a worker there is nobody to retry it
+            max_attempts=1 if run_inline else getattr(settings, 'JOB_MAX_ATTEMPTS', 3),
+        )
+        if run_inline:
+            claimed = claim(job.pk, 'inline')
+            if claimed is not None:
+                run_job(claimed)
+                job.refresh_from_db()
+    return job
+
+
+def claim(job_id, worker):
+    """
+    Atomically move one runnable job to RUNNING for this worker. Returns
+    the job, or None if another worker got there first.
+    """
+    now = timezone.now()
+    claimed = Job.objects.filter(pk=job_id, status='QUEUED').update(
+        status='RUNNING', worker=worker, started_at=now, heartbeat_at=now, attempts=F('attempts') + 1
+    )
+    return Job.objects.get(pk=job_id) if claimed else None
+
+
+def claim_next(worker, batch=10):
+    """
+    Claim the oldest runnable job, or return None when there is none
+    """
+    candidates = Job.objects.filter(
+        status='QUEUED', run_after__lte=timezone.now()
+    ).order_by('run_after', 'id').values_list('id', flat=True)[:batch]
+    for job_id in candidates:
+        job = claim(job_id, worker)
+        if job is not None:
+            return job
+    return None
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=getattr(settings, 'JOB_RETRY_DELAY', 30) * 2 ** max(attempts - 1, 0))
+
+
+def beat(job):
+    """
+    Record that the worker running this attempt of the job is alive
+    """
+    try:
+        Job.objects.filter(pk=job.pk, status='RUNNING', attempts=job.attempts).update(heartbeat_at=timezone.now())
+    except DatabaseError:
+        # A missed beat only matters if they keep failing for JOB_TIMEOUT
+        logger.warning("Heartbeat for job %s failed", job.pk, exc_info=True)
+
+
+class Heartbeat:
+    """
+    Context manager that calls beat() every JOB_HEARTBEAT_INTERVAL seconds
+    from a background thread while the job's handler runs
+    """
+    def __init__(self, job):
+        self.job = job
+        self.interval = getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 60)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{job.pk}-heartbeat", daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                beat(self.job)
+        finally:
+            # Database connections are per thread
+            connections.close_all()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_job(job):
+    """
+    Execute a claimed job and record its outcome. The outcome is written
+    with a conditional UPDATE that only matches while the job still has
+    the attempt count of this claim: if requeue_stale() gave a slow job to
+    another worker, that worker's attempt owns the row and this outcome is
+    dropped (with any file it produced) instead of overwriting it.
+    """
+    start = time.perf_counter()
+    try:
+        with Heartbeat(job):
+            job.result = HANDLERS[job.kind](job) or {}
+    except Exception as e:
+        logger.exception("Job %s (%s) failed on attempt %d", job.pk, job.kind, job.attempts)
+        job.error = f"{type(e).__name__}: {e}"
+        if job.attempts < job.max_attempts:
+            job.status = 'QUEUED'
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = 'FAILED'
+            job.finished_at = timezone.now()
+    else:
+        job.status = 'SUCCEEDED'
+        job.error = ''
+        job.finished_at = timezone.now()
+        logger.info("Job %s (%s) done in %.2fs", job.pk, job.kind, time.perf_counter() - start)
+
+    # Still ours while RUNNING, or QUEUED by requeue_stale() but not yet
+    # claimed again; a new claim increments attempts
+    recorded = Job.objects.filter(pk=job.pk, status__in=PENDING, attempts=job.attempts).update(
+        status=job.status, error=job.error, result=job.result, run_after=job.run_after,
+        finished_at=job.finished_at, result_file=job.result_file.name or '', result_name=job.result_name,
+    )
+    if not recorded:
+        logger.warning("Job %s (%s) attempt %d finished after it was handed to another worker; outcome dropped",
+                       job.pk, job.kind, job.attempts)
+        if job.result_file:
+            job.result_file.delete(save=False)
+        job.refresh_from_db()
+    return job
+
+
+def requeue_stale():
+    """
+    Give RUNNING jobs whose worker has sent no heartbeat within JOB_TIMEOUT
+    back to the queue, or fail them when they have no attempts left. A job
+    that is merely slow, such as a large payroll run, keeps beating and is
+    never handed to a second worker.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'JOB_TIMEOUT', 30 * 60))
+    stale = Job.objects.filter(status='RUNNING').filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    with transaction.atomic():
+        failed = stale.filter(attempts__gte=F('max_attempts')).update(
+            status='FAILED', finished_at=timezone.now(), error='Timed out'
+        )
+        requeued = stale.update(status='QUEUED', run_after=timezone.now(), error='Timed out')
+    return requeued, failed
+
+
+def purge_finished(days):
+    """
+    Delete finished jobs (and their files) older than the given age
+    """
+    old = Job.objects.filter(status__in=['SUCCEEDED', 'FAILED'], finished_at__lt=timezone.now() - timedelta(days=days))
+    count = 0
+    for job in old.iterator():
+        if job.result_file:
+            job.result_file.delete(save=False)
+        job.delete()
+        count += 1
+    return count
+
+
+def default_worker_name(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def work(worker, burst=False, poll_interval=1.0, max_jobs=None):
+    """
+    Worker loop: claim and run jobs until stopped, or until the queue is
+    empty (burst) or max_jobs have run. Returns the number of jobs run.
+    """
+    processed = 0
+    last_stale_check = float("-inf")
+    while max_jobs is None or processed < max_jobs:
+        if time.monotonic() - last_stale_check > 60:
+            requeue_stale()
+            last_stale_check = time.monotonic()
+        job = claim_next(worker)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    return processed
@@ -0,0 +1,146 @@
+# leave_balances.py
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+
+from .models import LeaveApplication, LeaveBalance
+
+STATUS_FIELDS = {
+    'PENDING': 'days_pending',
+    'APPROVED': 'days_approved',
+}
+
+
+def application_contribution(application):
+    """
+    The (key, field, days) an application adds to the ledger, or None if
+    its status does not count against the annual limit
+    """
+    field = STATUS_FIELDS.get(application.status)
+    if field is None:
+        return None
+    key = (application.employee_id, application.leave_type_id, application.start_date.year)
+    return key, field, application.days
+
+
+def stored_contribution(application_pk):
+    """
+    The contribution of a LeaveApplication as currently stored in the
+    database, or None if it does not exist or does not count
+    """
+    stored = LeaveApplication.objects.filter(pk=application_pk).only(
+        'employee_id', 'leave_type_id', 'start_date', 'days', 'status'
+    ).first()
+    return application_contribution(stored) if stored is not None else None
+
+
+def computed_totals(employee_id, leave_type_id, year):
+    """
+    Sum pending and approved days straight from LeaveApplication, used to
+    seed a ledger row that does not exist yet
+    """
+    return LeaveApplication.objects.filter(
+        employee_id=employee_id, leave_type_id=leave_type_id, start_date__year=year
+    ).aggregate(
+        days_pending=Sum('days', filter=Q(status='PENDING'), default=0),
+        days_approved=Sum('days', filter=Q(status='APPROVED'), default=0),
+    )
+
+
+def get_balance(employee_id, leave_type_id, year, lock=False):
+    """
+    Return (balance, created) for one employee, leave type and year. A
+    missing row is created from the Sum fallback, so it already reflects
+    every application currently in the database. With lock=True the row
+    is selected FOR UPDATE and must be called inside a transaction.
+    """
+    key = {'employee_id': employee_id, 'leave_type_id': leave_type_id, 'year': year}
+    balances = LeaveBalance.objects.select_for_update() if lock else LeaveBalance.objects
+    balance = balances.filter(**key).first()
+    if balance is not None:
+        return balance, False
+
+    try:
+        with transaction.atomic():
+            return LeaveBalance.objects.create(**key, **computed_totals(employee_id, leave_type_id, year)), True
+    except IntegrityError:
+        # Another request created the row first
+        return balances.get(**key), False
+
+
+def days_used(employee_id, leave_type_id, year):
+    """
+    Pending plus approved days for the year, from the ledger
+    """
+    balance, _ = get_balance(employee_id, leave_type_id, year)
+    return balance.days_used
+
+
+def apply_change(previous, current):
+    """
+    Move an application's days from its previous ledger contribution to
+    its current one. Rows seeded from the Sum fallback during this call
+    already include the change and are left alone.
+    """
+    deltas = {}
+    for contribution, sign in ((previous, -1), (current, 1)):
+        if contribution is None:
+            continue
+        key, field, days = contribution
+        deltas.setdefault(key, {}).setdefault(field, 0)
+        deltas[key][field] += sign * days
+
+    with transaction.atomic():
+        for key, changes in deltas.items():
+            changes = {field: days for field, days in changes.items() if days}
+            if not changes:
+                continue
+            balance, created = get_balance(*key, lock=True)
+            if created:
+                continue
+            LeaveBalance.objects.filter(pk=balance.pk).update(
+                **{field: F(field) + days for field, days in changes.items()}
+            )
+
+
+def remove_contribution(contribution):
+    """
+    Take a deleted application's days off its ledger row. A missing row is
+    not seeded: the Sum fallback will already leave the application out,
+    and when the employee or leave type is being deleted the ledger rows
+    are being deleted with it.
+    """
+    if contribution is None:
+        return
+    (employee_id, leave_type_id, year), field, days = contribution
+    LeaveBalance.objects.filter(employee_id=employee_id, leave_type_id=leave_type_id, year=year).update(
+        **{field: F(field) - days}
+    )
+
+
+def rebuild_balances():
+    """
+    Recompute the whole ledger from LeaveApplication with one grouped query
+    """
+    rows = LeaveApplication.objects.filter(
+        status__in=list(STATUS_FIELDS)
+    ).values(
+        'employee_id', 'leave_type_id', 'start_date__year'
+    ).annotate(
+        days_pending=Sum('days', filter=Q(status='PENDING'), default=0),
+        days_approved=Sum('days', filter=Q(status='APPROVED'), default=0),
+    ).order_by()
+
+    balances = [
+        LeaveBalance(
+            employee_id=row['employee_id'],
+            leave_type_id=row['leave_type_id'],
+            year=row['start_date__year'],
+            days_pending=row['days_pending'],
+            days_approved=row['days_approved'],
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        LeaveBalance.objects.all().delete()
+        LeaveBalance.objects.bulk_create(balances, batch_size=1000)
+    return len(balances)
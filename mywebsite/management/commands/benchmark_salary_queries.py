@@ -0,0 +1,160 @@
+import json
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from mywebsite.models import CustomUser, Salary
+from mywebsite import ytd_ledger
+from mywebsite.summaries import rebuild_all
+
+BENCH_PREFIX = 'bench_salary_'
+
+
+def seed_salaries(rows, months_per_employee, stdout):
+    """
+    Top the Salary table up to at least `rows` rows with inactive
+    'bench_salary_' employees, each paid for months_per_employee months
+    from January 2000. Meant for a scratch database: nothing is cleaned up.
+    """
+    missing = rows - Salary.objects.count()
+    if missing <= 0:
+        return 0
+
+    existing = CustomUser.objects.filter(username__startswith=BENCH_PREFIX).count()
+    employees_needed = -(-missing // months_per_employee)
+    CustomUser.objects.bulk_create([
+        CustomUser(
+            username=f"{BENCH_PREFIX}{n}",
+            employee_id=f"BS{n:08d}",
+            password='!',
+            is_active_employee=False,
+            basic_salary=Decimal(30000 + (n * 7919) % 270000),
+        )
+        for n in range(existing, existing + employees_needed)
+    ], batch_size=2000)
+
+    periods = []
+    year, month = 2000, 1
+    for _ in range(months_per_employee):
+        periods.append((year, month))
+        month += 1
+        if month > 12:
+            year, month = year + 1, 1
+
+    employees = CustomUser.objects.filter(
+        username__startswith=BENCH_PREFIX
+    ).exclude(salary__isnull=False).values_list('id', 'basic_salary', 'department_id').order_by('id')
+
+    created = 0
+    batch = []
+    for employee_id, base_salary, department_id in employees.iterator(chunk_size=2000):
+        for year, month in periods:
+            if created + len(batch) >= missing:
+                break
+            deductions, net_salary = Salary.calculate(base_salary, Decimal('0.00'), Decimal('16.00'))
+            batch.append(Salary(
+                employee_id=employee_id, department_id=department_id, base_salary=base_salary, tax_rate=Decimal('16.00'), deduction_method='FLAT',
+                deductions=deductions, net_salary=net_salary, year=year, month=month,
+            ))
+        if len(batch) >= 20000:
+            with transaction.atomic():
+                Salary.objects.bulk_create(batch, batch_size=2000)
+            created += len(batch)
+            batch = []
+            stdout.write(f"  seeded {created} salaries")
+    if batch:
+        with transaction.atomic():
+            Salary.objects.bulk_create(batch, batch_size=2000)
+        created += len(batch)
+
+    # bulk_create skips the summary and ledger signals
+    rebuild_all()
+    ytd_ledger.rebuild_all()
+    return created
+
+
+def access_patterns(year, month, employee_id):
+    """
+    The Salary queries behind the payroll views, keyed by a short name
+    """
+    period = Salary.objects.filter(year=year, month=month)
+    return {
+        'admin_salary_list page': period.order_by('-year', '-month', '-id')[:51],
+        'latest period': Salary.objects.order_by('-year', '-month')[:1],
+        'distinct years': Salary.objects.values_list('year', flat=True).distinct().order_by('-year'),
+        'top earners': period.order_by('-net_salary')[:10],
+        'tax certificate year': Salary.objects.filter(employee_id=employee_id, year=year).order_by('month'),
+        'employee history': Salary.objects.filter(employee_id=employee_id).order_by('-year', '-month')[:3],
+        'payable employees': CustomUser.objects.exclude(
+            id__in=period.values('employee_id')
+        ).values_list('id', flat=True),
+        'period by department': period.values('department_id').annotate(
+            rows=Count('id'), total=Sum('net_salary')
+        ).order_by(),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the Salary access patterns used by the payroll views and print their "
+        "query plans for the configured database (SQLite or PostgreSQL)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed-rows', type=int, default=0,
+                            help="First top the Salary table up to this many rows (scratch databases only)")
+        parser.add_argument('--months-per-employee', type=int, default=120)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--no-plans', action='store_true', help="Only print timings")
+        parser.add_argument('--output', default=None, help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        if options['seed_rows']:
+            start = time.perf_counter()
+            created = seed_salaries(options['seed_rows'], options['months_per_employee'], self.stdout)
+            self.stdout.write(f"Seeded {created} salaries in {time.perf_counter() - start:.1f}s")
+
+        total = Salary.objects.count()
+        if not total:
+            raise CommandError("The Salary table is empty; use --seed-rows to generate data")
+        # Benchmark the busiest period and an employee from it
+        busiest = Salary.objects.values('year', 'month').annotate(rows=Count('id')).order_by('-rows').first()
+        year, month = busiest['year'], busiest['month']
+        employee_id = Salary.objects.filter(year=year, month=month).values_list('employee_id', flat=True).first()
+
+        self.stdout.write(
+            f"{connection.vendor}: {total} salary rows, benchmarking {month}/{year} "
+            f"({busiest['rows']} rows) and employee {employee_id}"
+        )
+
+        results = []
+        for name, queryset in access_patterns(year, month, employee_id).items():
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                rows = len(list(queryset.all()))
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            result = {
+                'query': name,
+                'rows': rows,
+                'median_ms': round(statistics.median(timings), 3),
+                'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+                'plan': queryset.explain(),
+            }
+            results.append(result)
+
+            self.stdout.write(self.style.SUCCESS(
+                f"\n{name}: {rows} rows, median {result['median_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms"
+            ))
+            if not options['no_plans']:
+                self.stdout.write(result['plan'])
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump({'vendor': connection.vendor, 'rows': total, 'results': results}, fh, indent=2)
+            self.stdout.write(f"\nResults written to {options['output']}")
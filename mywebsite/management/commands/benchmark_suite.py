@@ -0,0 +1,339 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template import engines
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from mywebsite import payslip_canvas, pdf_render
+from mywebsite.attendance_analytics import load_month
+from mywebsite.models import Attendance, CustomUser, LeaveApplication, PayrollRun, Salary
+from mywebsite.payroll import build_salaries
+from mywebsite.payslips import PAYSLIP_TEMPLATE, payslip_context
+from mywebsite.querybudget import count_queries
+from mywebsite.reports import (
+    MONTHLY_REPORT_PDF_TEMPLATE, TAX_CERTIFICATE_PDF_TEMPLATE, monthly_report_context, tax_certificate_context,
+)
+from mywebsite.statutory import table_for, to_cents
+from mywebsite.summaries import latest_period
+
+PERCENTILES = (50, 90, 95, 99)
+# p50 changes smaller than this (in percent) are treated as noise
+NOISE_THRESHOLD = 20
+
+
+def percentile(ordered, p):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    return ordered[min(len(ordered) - 1, max(0, -(-len(ordered) * p // 100) - 1))]
+
+
+def summarize(timings):
+    ordered = sorted(timings)
+    result = {f"p{p}_ms": round(percentile(ordered, p), 3) for p in PERCENTILES}
+    result.update({
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'min_ms': round(ordered[0], 3),
+        'max_ms': round(ordered[-1], 3),
+    })
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def view_cases(year, month, salary_id):
+    """
+    (name, url) of the hot views, all pointed at the latest payroll period
+    """
+    period = f"?year={year}&month={month}"
+    return [
+        ('dashboard', reverse('dashboard')),
+        ('admin_salary_list', reverse('admin_salary_list') + period),
+        ('monthly_payroll_report', reverse('monthly_payroll_report') + period),
+        ('generate_payslip_pdf', reverse('generate_payslip_pdf', args=[salary_id])),
+    ]
+
+
+def time_view(client, url, repeat):
+    """
+    Request a URL `repeat` times after one cold request. The cold request
+    is reported on its own since it fills the dashboard and PDF caches.
+    """
+    timings = []
+    queries = []
+    for _ in range(repeat + 1):
+        with count_queries() as counter:
+            start = time.perf_counter()
+            response = client.get(url)
+            if response.streaming:
+                size = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                size = len(response.content)
+            timings.append((time.perf_counter() - start) * 1000)
+        queries.append(len(counter))
+        if response.status_code != 200:
+            raise CommandError(f"{url} returned {response.status_code}")
+    return {
+        'url': url,
+        'bytes': size,
+        'cold_ms': round(timings[0], 3),
+        'cold_queries': queries[0],
+        'queries': int(statistics.median(queries[1:])),
+        **summarize(timings[1:]),
+    }
+
+
+def time_payroll(year, month, repeat):
+    """
+    Time build_salaries() for every active employee, for each deduction
+    method, without writing anything, plus the raw statutory engine
+    """
+    employees = list(CustomUser.objects.filter(
+        is_active_employee=True, basic_salary__isnull=False
+    ).values_list('id', 'basic_salary', 'department_id').order_by('id'))
+    if not employees:
+        return []
+
+    results = []
+    for method in ('STATUTORY', 'FLAT'):
+        run = PayrollRun(month=month, year=year, tax_rate=Decimal('16.00'), deduction_method=method)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            build_salaries(run, employees)
+            timings.append((time.perf_counter() - start) * 1000)
+        summary = summarize(timings)
+        results.append({
+            'name': f"build_salaries ({method.lower()})",
+            'rows': len(employees),
+            'rows_per_second': round(len(employees) / (summary['p50_ms'] / 1000)) if summary['p50_ms'] else None,
+            **summary,
+        })
+
+    table = table_for(year, month)
+    if table is not None:
+        grosses = [to_cents(basic) for _, basic, _ in employees]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            table.calculate_cents(grosses)
+            timings.append((time.perf_counter() - start) * 1000)
+        summary = summarize(timings)
+        results.append({
+            'name': f"statutory engine ({table.version})",
+            'rows': len(grosses),
+            'rows_per_second': round(len(grosses) / (summary['p50_ms'] / 1000)) if summary['p50_ms'] else None,
+            **summary,
+        })
+    return results
+
+
+def reset_template_loaders():
+    for loader in engines['django'].engine.template_loaders:
+        if hasattr(loader, 'reset'):
+            loader.reset()
+
+
+def time_pdf(year, month, salary, repeat):
+    """
+    Per-document latency of each PDF, rendered without the PDF cache.
+    "cold" clears the template and static resource caches before every
+    document, which is what each document cost before they were shared;
+    "warm" is the steady state of a long-running process.
+    """
+    salary = Salary.objects.select_related('employee').get(pk=salary.pk)
+    documents = [
+        ('payslip', PAYSLIP_TEMPLATE, payslip_context(salary)),
+        ('tax_certificate', TAX_CERTIFICATE_PDF_TEMPLATE, tax_certificate_context(salary.employee, year)),
+        ('monthly_report', MONTHLY_REPORT_PDF_TEMPLATE, monthly_report_context(year, month)),
+    ]
+    results = []
+    for name, template_src, context in documents:
+        # Evaluate the querysets in the context up front
+        pdf = pdf_render.render_pdf(template_src, context)
+        if pdf is None:
+            raise CommandError(f"Rendering {template_src} failed")
+        for mode in ('cold', 'warm'):
+            timings = []
+            for _ in range(repeat):
+                if mode == 'cold':
+                    reset_template_loaders()
+                    pdf_render.reset()
+                start = time.perf_counter()
+                pdf_render.render_pdf(template_src, context)
+                timings.append((time.perf_counter() - start) * 1000)
+            results.append({'name': f"{name} pdf ({mode})", 'bytes': len(pdf), **summarize(timings)})
+
+    # The same payslip drawn natively, as with PAYSLIP_RENDERER = 'reportlab'
+    payslip = documents[0][2]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pdf = payslip_canvas.payslip_pdf(payslip)
+        timings.append((time.perf_counter() - start) * 1000)
+    results.append({'name': "payslip pdf (reportlab)", 'bytes': len(pdf), **summarize(timings)})
+    return results
+
+
+def time_attendance(year, month, repeat):
+    """
+    Attendance analytics for a month: loading the employee x day matrix,
+    and computing every per-employee and per-department figure from it
+    """
+    matrix = load_month(year, month)
+    cases = [
+        ('attendance matrix load', lambda: load_month(year, month)),
+        ('attendance statistics', lambda: matrix.department_stats(matrix.employee_stats())),
+    ]
+    results = []
+    for name, case in cases:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            case()
+            timings.append((time.perf_counter() - start) * 1000)
+        results.append({'name': name, 'shape': list(matrix.shape), **summarize(timings)})
+    return results
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the hot views, payroll computation, PDF rendering and attendance analytics against the current data, recording query "
+        "counts and latency percentiles as JSON for comparison across commits"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per view after the cold one")
+        parser.add_argument('--username', default=None, help="Staff user to request the views as "
+                                                             "(default: the first superuser)")
+        parser.add_argument('--only', choices=['views', 'payroll', 'pdf', 'attendance'], default=None)
+        parser.add_argument('--label', default='', help="Free text stored with the results")
+        parser.add_argument('--output', default=None, help="Write the results to this JSON file")
+        parser.add_argument('--compare', default=None, help="Earlier results file to compare the p50s against")
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        if repeat < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        period = latest_period()
+        if period is None:
+            raise CommandError("There are no salaries; run generate_synthetic_data first")
+        year, month = period.year, period.month
+
+        results = {
+            'label': options['label'],
+            'revision': git_revision(),
+            'timestamp': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'period': f"{year}-{month:02d}",
+            'rows': {
+                'employees': CustomUser.objects.count(),
+                'salaries': Salary.objects.count(),
+                'attendance': Attendance.objects.count(),
+                'leave_applications': LeaveApplication.objects.count(),
+            },
+            'views': [],
+            'payroll': [],
+            'pdf': [],
+            'attendance': [],
+        }
+        self.stdout.write(
+            f"{connection.vendor}, revision {results['revision'] or 'unknown'}, period {results['period']}: "
+            + ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in results['rows'].items())
+        )
+
+        if options['only'] in (None, 'views'):
+            if options['username']:
+                user = CustomUser.objects.filter(username=options['username']).first()
+            else:
+                user = CustomUser.objects.filter(is_superuser=True).order_by('id').first()
+            if user is None:
+                raise CommandError("No user to request the views as; pass --username")
+            client = Client()
+            client.force_login(user)
+
+            salary_id = Salary.objects.filter(year=year, month=month).values_list('id', flat=True).first()
+            for name, url in view_cases(year, month, salary_id):
+                result = {'name': name, **time_view(client, url, repeat)}
+                results['views'].append(result)
+                self.stdout.write(
+                    f"  {name:<28} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                    f"p99 {result['p99_ms']:9.2f} ms  cold {result['cold_ms']:9.2f} ms  "
+                    f"{result['queries']} queries ({result['cold_queries']} cold)"
+                )
+
+        if options['only'] in (None, 'payroll'):
+            for result in time_payroll(year, month, repeat):
+                results['payroll'].append(result)
+                self.stdout.write(
+                    f"  {result['name']:<28} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                    f"{result['rows']} rows, {result['rows_per_second']} rows/s"
+                )
+
+        if options['only'] in (None, 'pdf'):
+            salary = Salary.objects.filter(year=year, month=month).order_by('id').first()
+            for result in time_pdf(year, month, salary, repeat):
+                results['pdf'].append(result)
+                self.stdout.write(
+                    f"  {result['name']:<28} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                    f"{result['bytes']} bytes"
+                )
+
+        if options['only'] in (None, 'attendance'):
+            for result in time_attendance(year, month, repeat):
+                results['attendance'].append(result)
+                self.stdout.write(
+                    f"  {result['name']:<28} p50 {result['p50_ms']:9.2f} ms  p95 {result['p95_ms']:9.2f} ms  "
+                    f"{result['shape'][0]} employees x {result['shape'][1]} days"
+                )
+
+        if options['compare']:
+            self.compare(results, options['compare'])
+
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def compare(self, results, path):
+        try:
+            with open(path) as fh:
+                previous = json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        before = {
+            case['name']: case
+            for section in ('views', 'payroll', 'pdf', 'attendance') for case in previous.get(section, [])
+        }
+        self.stdout.write(f"\nCompared with {previous.get('revision') or path} {previous.get('label', '')}".rstrip())
+        for case in results['views'] + results['payroll'] + results['pdf'] + results['attendance']:
+            old = before.get(case['name'])
+            if old is None:
+                continue
+            change = (case['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0
+            line = f"  {case['name']:<28} p50 {old['p50_ms']:9.2f} -> {case['p50_ms']:9.2f} ms ({change:+.1f}%)"
+            if 'queries' in case and case['queries'] != old.get('queries'):
+                line += f", queries {old.get('queries')} -> {case['queries']}"
+            style = (self.style.ERROR if change > NOISE_THRESHOLD
+                     else self.style.SUCCESS if change < -NOISE_THRESHOLD else str)
+            self.stdout.write(style(line))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.dashboard_metrics import cache_is_shared, cache_stats, reset_stats
+
+
+class Command(BaseCommand):
+    help = "Show hit rates of the cached dashboard metrics"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Clear the counters after printing them")
+
+    def handle(self, *args, **options):
+        if not cache_is_shared():
+            # The counters live in the web workers' memory, not this process's
+            raise CommandError(
+                "The dashboard cache is local to each process, so the web workers' hit counts cannot be "
+                "read from here. Set CACHE_BACKEND and CACHE_LOCATION to a shared cache (Redis, "
+                "Memcached, database or file based)."
+            )
+        stats = cache_stats()
+        self.stdout.write(f"{'metric':<26}{'ttl':>6}{'hits':>10}{'misses':>10}{'hit rate':>10}")
+        for name, row in stats.items():
+            rate = '-' if row['hit_rate'] is None else f"{row['hit_rate']:.1%}"
+            self.stdout.write(f"{name:<26}{row['ttl']:>6}{row['hits']:>10}{row['misses']:>10}{rate:>10}")
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
@@ -0,0 +1,53 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.payslips import month_salaries, stream_payslip_zip, write_payslips_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Render all payslips for a month in parallel and write them to a ZIP file, or "
+        "with --format pdf to one PDF with a payslip per page for printing"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=int, default=datetime.today().month)
+        parser.add_argument('--year', type=int, default=datetime.today().year)
+        parser.add_argument('--workers', type=int, default=None, help="Number of render processes (default: CPU count)")
+        parser.add_argument('--format', choices=['zip', 'pdf'], default='zip')
+        parser.add_argument('--output', default=None,
+                            help="File to write (default: payslips_<year>_<month>.zip or .pdf)")
+
+    def handle(self, *args, **options):
+        month = options['month']
+        year = options['year']
+        if not (1 <= month <= 12):
+            raise CommandError("Month must be between 1 and 12")
+        output = options['output'] or f"payslips_{year}_{month:02d}.{options['format']}"
+
+        salaries = month_salaries(month, year).iterator(chunk_size=500)
+        if options['format'] == 'pdf':
+            start = time.perf_counter()
+            with open(output, 'wb') as fh:
+                pages = write_payslips_pdf(salaries, fh, f"Payslips {year}-{month:02d}")
+            if not pages:
+                self.stdout.write(self.style.WARNING(f"No salaries found for {month}/{year}"))
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {pages} payslips to {output} in {time.perf_counter() - start:.2f}s"
+            ))
+            return
+
+        stats = {}
+        with open(output, 'wb') as fh:
+            for chunk in stream_payslip_zip(salaries, workers=options['workers'], stats=stats):
+                fh.write(chunk)
+
+        if not stats['documents']:
+            self.stdout.write(self.style.WARNING(f"No salaries found for {month}/{year}"))
+        rate = stats['documents'] / stats['seconds'] if stats['seconds'] else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {stats['documents']} payslips ({stats['failed']} failed) to {output} "
+            f"in {stats['seconds']:.2f}s ({rate:.1f} docs/s); per-document timings in manifest.csv"
+        ))
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.bankfiles import generate_payment_batch
+from mywebsite.models import PaymentBatch
+
+
+class Command(BaseCommand):
+    help = "Write the bank EFT payment files for a month's net salaries to a ZIP file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=int, default=datetime.today().month)
+        parser.add_argument('--year', type=int, default=datetime.today().year)
+        parser.add_argument('--format', dest='file_format', choices=[key for key, _ in PaymentBatch.FORMAT_CHOICES],
+                            default='fixed')
+        parser.add_argument('--output', default=None, help="ZIP file to write (default: bank_payments_<year>_<month>.zip)")
+
+    def handle(self, *args, **options):
+        month = options['month']
+        year = options['year']
+        if not (1 <= month <= 12):
+            raise CommandError("Month must be between 1 and 12")
+        output = options['output'] or f"bank_payments_{year}_{month:02d}.zip"
+
+        batch, data = generate_payment_batch(month, year, options['file_format'])
+        with open(output, 'wb') as fh:
+            fh.write(data)
+
+        if batch.skipped_count:
+            self.stdout.write(self.style.WARNING(
+                f"{batch.skipped_count} salaries skipped (no bank details or pay), see exceptions.csv"
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            f"Payment batch {batch.pk}: {batch.record_count} payments to {batch.bank_count} banks, "
+            f"total {batch.total_amount}, in {batch.duration_ms:.0f} ms -> {output} (sha256 {batch.checksum})"
+        ))
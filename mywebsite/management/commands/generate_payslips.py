@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.payslips import generate_payslips
+
+
+class Command(BaseCommand):
+    help = (
+        "Issue payslips for every salary of a month, with working days and days present from attendance. "
+        "Safe to re-run: only new salaries and changed attendance are written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=int, default=datetime.today().month)
+        parser.add_argument('--year', type=int, default=datetime.today().year)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        month = options['month']
+        year = options['year']
+        if not (1 <= month <= 12):
+            raise CommandError("Month must be between 1 and 12")
+
+        result = generate_payslips(month, year, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Payslips for {month}/{year}: {result['created']} issued, {result['updated']} updated, "
+            f"{result['unchanged']} unchanged in {result['seconds']:.2f}s"
+        ))
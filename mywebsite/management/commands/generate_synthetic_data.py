@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.synthetic import USERNAME_PREFIX, clear_synthetic_data, generate_synthetic_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic departments, roles, employees and years of salaries, attendance and "
+        f"leave for benchmarking. Employees are named '{USERNAME_PREFIX}<n>'; use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=500, help="0 with --clear only removes the data")
+        parser.add_argument('--departments', type=int, default=10)
+        parser.add_argument('--years', type=int, default=2, help="Years of history up to today")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed, for repeatable data sets")
+        parser.add_argument('--no-attendance', action='store_true',
+                            help="Skip attendance, by far the largest table")
+        parser.add_argument('--clear', action='store_true',
+                            help="Remove previously generated data first")
+
+    def handle(self, *args, **options):
+        if options['employees'] < 0 or options['departments'] < 1 or options['years'] < 1:
+            raise CommandError("--employees cannot be negative and --departments and --years must be at least 1")
+
+        if options['clear']:
+            removed = clear_synthetic_data()
+            self.stdout.write(f"Removed {removed} synthetic employees and their records")
+        if not options['employees']:
+            return
+
+        start = time.perf_counter()
+        counts = generate_synthetic_data(
+            employees=options['employees'],
+            departments=options['departments'],
+            years=options['years'],
+            seed=options['seed'],
+            attendance=not options['no_attendance'],
+            stdout=self.stdout,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Generated " + ", ".join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items())
+            + f" in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,47 @@
+import zipfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.employee_import import (
+    BATCH_SIZE, DEFAULT_PASSWORD, default_hash_workers, file_format, import_employees,
+    set_default_passwords, write_error_report,
+)
+
+
+class Command(BaseCommand):
+    help = "Create employees in bulk from a CSV or XLSX file, reporting rejected rows instead of stopping"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or XLSX file with a header row of employee field names")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Processes hashing passwords (default: EMPLOYEE_IMPORT_HASH_WORKERS or CPU count)")
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help="Initial password of the new employees")
+        parser.add_argument('--errors', help="Write rejected rows with their errors to this CSV file")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as fh:
+                result = import_employees(fh, file_format(options['path']), batch_size=options['batch_size'])
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            raise CommandError(str(e))
+
+        rate = result.rows / result.seconds if result.seconds else 0
+        self.stdout.write(
+            f"{result.rows} rows: {result.created} employees created, {result.failed} rejected "
+            f"in {result.seconds:.2f}s ({rate:.0f} rows/s)"
+        )
+        for line, username, employee_id, message in result.errors[:20]:
+            self.stdout.write(self.style.WARNING(f"  line {line} ({username or employee_id}): {message}"))
+        if result.failed > 20:
+            self.stdout.write(self.style.WARNING(f"  ... and {result.failed - 20} more"))
+        if options['errors'] and result.errors:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as fh:
+                write_error_report(result, fh)
+            self.stdout.write(f"Rejected rows written to {options['errors']}")
+
+        if result.created:
+            workers = options['workers'] or default_hash_workers()
+            self.stdout.write(f"Setting passwords for {result.created} employees with {workers} process(es)...")
+            updated = set_default_passwords(result.created_ids, options['password'], workers=workers)
+            self.stdout.write(self.style.SUCCESS(f"Imported {result.created} employees, {updated} passwords set"))
@@ -0,0 +1,55 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.ingest import ingest_events, parse_json_events
+
+
+class Command(BaseCommand):
+    help = "Load clock-in/clock-out events from a CSV or JSON export into Attendance in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (employee_id,timestamp[,type]) or JSON file")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--source', default='', help="Device or export name recorded on each batch")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        source = options['source'] or path
+
+        try:
+            if path.endswith('.json'):
+                with open(path, 'rb') as fh:
+                    events = parse_json_events(fh.read())
+                batches = (events[i:i + batch_size] for i in range(0, len(events), batch_size))
+                self._ingest(batches, source)
+            else:
+                with open(path, newline='', encoding='utf-8-sig') as fh:
+                    self._ingest(self._csv_batches(csv.DictReader(fh), batch_size), source)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+    def _csv_batches(self, reader, batch_size):
+        batch = []
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _ingest(self, batches, source):
+        total = seconds = 0
+        for events in batches:
+            batch = ingest_events(events, source=source)
+            total += batch.events_received
+            seconds += batch.duration_ms / 1000
+            self.stdout.write(
+                f"Batch {batch.pk}: {batch.events_received} events, {batch.rows_created} created, "
+                f"{batch.rows_updated} updated, {batch.events_rejected} rejected, "
+                f"{batch.unknown_employees} unknown employees, {batch.events_per_second:.0f} events/s"
+            )
+        rate = total / seconds if seconds else 0
+        self.stdout.write(self.style.SUCCESS(f"Ingested {total} events in {seconds:.2f}s ({rate:.0f} events/s)"))
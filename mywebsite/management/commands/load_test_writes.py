@@ -0,0 +1,123 @@
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections, transaction
+
+from mywebsite.attendance import mark_attendance
+from mywebsite.leave_balances import get_balance
+from mywebsite.models import Attendance, CustomUser, LeaveApplication, LeaveBalance, LeaveType
+
+# Writes go to a year no real record uses, so they can be removed afterwards
+LOAD_TEST_YEAR = 2099
+LOAD_TEST_REASON = 'load_test_writes'
+
+
+def _init_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def _random_day(rng):
+    return date(LOAD_TEST_YEAR, 1, 1) + timedelta(days=rng.randrange(365))
+
+
+def write_attendance(rng, employee_id):
+    """
+    A clock-in, through the same upsert as mark_attendance_for_today
+    """
+    day = _random_day(rng)
+    mark_attendance(CustomUser.objects.filter(pk=employee_id), day, day, status='PRESENT')
+
+
+def write_leave(rng, employee_id, leave_type_id):
+    """
+    A leave submission, through the same locked ledger check as apply_leave
+    """
+    start_date = _random_day(rng)
+    with transaction.atomic():
+        get_balance(employee_id, leave_type_id, start_date.year, lock=True)
+        LeaveApplication.objects.create(
+            employee_id=employee_id, leave_type_id=leave_type_id, start_date=start_date,
+            end_date=start_date, days=1, reason=LOAD_TEST_REASON,
+        )
+
+
+def run_worker(worker, seconds, employee_ids, leave_type_id):
+    """
+    Issue writes for the given number of seconds and return
+    (latencies_ms, errors) for this process
+    """
+    rng = random.Random(worker)
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        employee_id = rng.choice(employee_ids)
+        start = time.perf_counter()
+        try:
+            if rng.random() < 0.5:
+                write_attendance(rng, employee_id)
+            else:
+                write_leave(rng, employee_id, leave_type_id)
+        except OperationalError:
+            # e.g. SQLite "database is locked" once busy_timeout runs out
+            errors += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+    connections.close_all()
+    return latencies, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent write throughput: several processes (like gunicorn workers) "
+        f"submit attendance and leave for {LOAD_TEST_YEAR}, then the rows are removed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--employees', type=int, default=200, help="Number of employees to write for")
+        parser.add_argument('--keep', action='store_true', help=f"Keep the {LOAD_TEST_YEAR} rows afterwards")
+
+    def handle(self, *args, **options):
+        employee_ids = list(
+            CustomUser.objects.filter(is_active_employee=True).values_list('id', flat=True)[:options['employees']]
+        )
+        leave_type = LeaveType.objects.order_by('id').first()
+        if not employee_ids or leave_type is None:
+            raise CommandError("Need at least one active employee and one leave type")
+
+        # Forked workers must not share the parent's connection
+        connections.close_all()
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(run_worker, worker, options['seconds'], employee_ids, leave_type.pk)
+                for worker in range(options['workers'])
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        latencies = sorted(latency for worker_latencies, _ in results for latency in worker_latencies)
+        errors = sum(worker_errors for _, worker_errors in results)
+        if latencies:
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(self.style.SUCCESS(
+                f"{connection.vendor}, {options['workers']} workers: {len(latencies)} writes in {elapsed:.1f}s "
+                f"({len(latencies) / elapsed:.0f} writes/s), {errors} failed, "
+                f"latency median {statistics.median(latencies):.1f} ms, p95 {p95:.1f} ms"
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(f"No successful writes, {errors} failed"))
+
+        if not options['keep']:
+            LeaveApplication.objects.filter(reason=LOAD_TEST_REASON, start_date__year=LOAD_TEST_YEAR).delete()
+            LeaveBalance.objects.filter(year=LOAD_TEST_YEAR).delete()
+            Attendance.objects.filter(date__year=LOAD_TEST_YEAR).delete()
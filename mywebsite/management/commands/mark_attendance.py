@@ -0,0 +1,36 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.attendance import STATUS_FLAGS, employees_in_scope, mark_attendance
+from mywebsite.models import Department
+
+
+class Command(BaseCommand):
+    help = "Mark attendance for a department or the whole company over a date range, e.g. a public holiday"
+
+    def add_arguments(self, parser):
+        parser.add_argument('start_date', type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument('end_date', type=date.fromisoformat, nargs='?', help="YYYY-MM-DD (default: start date)")
+        parser.add_argument('--department', help="Department name (default: all departments)")
+        parser.add_argument('--status', choices=sorted(STATUS_FLAGS), default='LEAVE')
+
+    def handle(self, *args, **options):
+        start_date = options['start_date']
+        end_date = options['end_date'] or start_date
+        if start_date > end_date:
+            raise CommandError("End date must be after start date")
+
+        department = None
+        if options['department']:
+            try:
+                department = Department.objects.get(name=options['department'])
+            except Department.DoesNotExist:
+                raise CommandError(f"Department not found: {options['department']}")
+
+        created, updated = mark_attendance(
+            employees_in_scope(department), start_date, end_date, status=options['status']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {options['status']} from {start_date} to {end_date}: {created} created, {updated} updated"
+        ))
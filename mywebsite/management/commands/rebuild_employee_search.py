@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from mywebsite.employee_search import rebuild_index, search_backend
+
+
+class Command(BaseCommand):
+    help = "Recreate the employee full-text search index from the CustomUser table"
+
+    def handle(self, *args, **options):
+        backend = search_backend()
+        if backend == 'fallback':
+            self.stdout.write(self.style.WARNING(
+                "No search index on this database; employee search uses icontains lookups"
+            ))
+            return
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} employees ({backend})"))
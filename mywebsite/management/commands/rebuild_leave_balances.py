@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from mywebsite.leave_balances import rebuild_balances
+
+
+class Command(BaseCommand):
+    help = "Recompute the leave balance ledger from the LeaveApplication table"
+
+    def handle(self, *args, **options):
+        rows = rebuild_balances()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} leave balance rows"))
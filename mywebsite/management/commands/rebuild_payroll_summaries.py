@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite import dashboard_metrics
+from mywebsite.summaries import rebuild_all, rebuild_period
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed payroll period summaries from the Salary table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=int, help="Only rebuild this month (requires --year)")
+        parser.add_argument('--year', type=int)
+
+    def handle(self, *args, **options):
+        month = options['month']
+        year = options['year']
+
+        if month is not None or year is not None:
+            if month is None or year is None:
+                raise CommandError("--month and --year must be given together")
+            if not (1 <= month <= 12):
+                raise CommandError("Month must be between 1 and 12")
+            rows = rebuild_period(year, month)
+            dashboard_metrics.invalidate('latest_payroll')
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} summary rows for {month}/{year}"))
+            return
+
+        periods = rebuild_all()
+        dashboard_metrics.invalidate('latest_payroll')
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt payroll summaries for {len(periods)} periods"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from mywebsite.ytd_ledger import rebuild_all, rebuild_year
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-employee year-to-date payroll ledger from the Salary table"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, help="Only rebuild this year")
+
+    def handle(self, *args, **options):
+        year = options['year']
+        if year is not None:
+            rows = rebuild_year(year)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} year-to-date rows for {year}"))
+            return
+
+        years = rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the year-to-date ledger for {len(years)} years"))
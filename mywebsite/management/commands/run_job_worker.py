@@ -0,0 +1,58 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from mywebsite.dashboard_metrics import cache_is_shared
+from mywebsite.jobs import default_worker_name, purge_finished, work
+
+
+def _init_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def run_worker(index, burst, poll_interval, max_jobs):
+    return work(default_worker_name(index), burst=burst, poll_interval=poll_interval, max_jobs=max_jobs)
+
+
+class Command(BaseCommand):
+    help = "Run background jobs (PDF reports, payroll runs) from the database queue"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to run")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument('--max-jobs', type=int, default=None, help="Exit after this many jobs per process")
+        parser.add_argument('--purge-days', type=int, default=None,
+                            help="Only delete finished jobs and their files older than this many days")
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            purged = purge_finished(options['purge_days'])
+            self.stdout.write(f"Deleted {purged} finished jobs")
+            return
+
+        processes = options['processes']
+        if processes < 1:
+            raise CommandError("--processes must be at least 1")
+        worker_args = (options['burst'], options['poll_interval'], options['max_jobs'])
+        if not cache_is_shared():
+            self.stderr.write(self.style.WARNING(
+                "The dashboard cache is local to each process: the web workers will not see this worker's "
+                "invalidations and show cached metrics until their TTL expires. Use a shared CACHE_BACKEND."
+            ))
+
+        if processes == 1:
+            processed = run_worker(0, *worker_args)
+        else:
+            # Forked workers must open their own database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+                futures = [pool.submit(run_worker, index, *worker_args) for index in range(processes)]
+                processed = sum(future.result() for future in futures)
+
+        self.stdout.write(self.style.SUCCESS(f"Ran {processed} jobs"))
@@ -0,0 +1,47 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from mywebsite.payroll import DEFAULT_CHUNK_SIZE, run_payroll
+
+
+class Command(BaseCommand):
+    help = "Create Salary rows for all active employees for a month in one bulk payroll run"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', type=int, default=datetime.today().month)
+        parser.add_argument('--year', type=int, default=datetime.today().year)
+        parser.add_argument(
+            '--flat', action='store_true',
+            help="Deduct --tax-rate percent of the basic salary instead of the statutory deductions"
+        )
+        parser.add_argument(
+            '--tax-rate', default='0.00',
+            help="Tax rate in percent, used with --flat and for periods before the statutory tables"
+        )
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        month = options['month']
+        year = options['year']
+        if not (1 <= month <= 12):
+            raise CommandError("Month must be between 1 and 12")
+        try:
+            tax_rate = Decimal(options['tax_rate'])
+        except InvalidOperation:
+            raise CommandError(f"Invalid tax rate: {options['tax_rate']}")
+
+        run = run_payroll(
+            month, year, tax_rate=tax_rate, chunk_size=options['chunk_size'],
+            deduction_method='FLAT' if options['flat'] else 'STATUTORY'
+        )
+
+        if run.status == 'FAILED':
+            raise CommandError(f"Payroll run {run.pk} failed: {run.error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Payroll run {run.pk} for {run.get_month_name()} {run.year}: "
+            f"{run.salaries_created} salaries created, {run.skipped_count} skipped "
+            f"(no salary on record), {run.rows_per_second:.0f} rows/s"
+        ))
@@ -0,0 +1,78 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:14
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def build_summaries(apps, schema_editor):
+    Salary = apps.get_model('mywebsite', 'Salary')
+    PayrollPeriodSummary = apps.get_model('mywebsite', 'PayrollPeriodSummary')
+    fields = ('total_base', 'total_bonus', 'total_tax', 'total_net')
+
+    rows = Salary.objects.values('year', 'month', 'employee__department_id').annotate(
+        employee_count=Count('id'),
+        total_base=Sum('base_salary'),
+        total_bonus=Sum('bonus'),
+        total_tax=Sum('deductions'),
+        total_net=Sum('net_salary'),
+    ).order_by()
+
+    summaries = []
+    totals = {}
+    for row in rows:
+        period = (row['year'], row['month'])
+        total = totals.setdefault(period, PayrollPeriodSummary(
+            year=row['year'], month=row['month'], is_total=True, employee_count=0,
+            **{field: Decimal('0.00') for field in fields}
+        ))
+        total.employee_count += row['employee_count']
+        summary = PayrollPeriodSummary(
+            year=row['year'], month=row['month'], department_id=row['employee__department_id'],
+            employee_count=row['employee_count']
+        )
+        for field in fields:
+            setattr(summary, field, row[field] or Decimal('0.00'))
+            setattr(total, field, getattr(total, field) + (row[field] or Decimal('0.00')))
+        summaries.append(summary)
+    PayrollPeriodSummary.objects.bulk_create(summaries + list(totals.values()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0005_payrollrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayrollPeriodSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)])),
+                ('is_total', models.BooleanField(default=False)),
+                ('employee_count', models.IntegerField(default=0)),
+                ('total_base', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_bonus', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_tax', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_net', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='mywebsite.department')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['year', 'month'], name='payroll_summary_period_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='payrollperiodsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('department__isnull', False)), fields=('year', 'month', 'department'), name='unique_department_payroll_summary'),
+        ),
+        migrations.AddConstraint(
+            model_name='payrollperiodsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('department__isnull', True)), fields=('year', 'month', 'is_total'), name='unique_period_payroll_summary'),
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
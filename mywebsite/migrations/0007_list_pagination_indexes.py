@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0006_payrollperiodsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaveapplication',
+            index=models.Index(fields=['applied_on', 'id'], name='leave_applied_on_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salary',
+            index=models.Index(fields=['year', 'month', 'id'], name='salary_period_id_idx'),
+        ),
+    ]
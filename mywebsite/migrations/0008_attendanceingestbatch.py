@@ -0,0 +1,28 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0007_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceIngestBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(blank=True, max_length=100)),
+                ('received_on', models.DateTimeField(auto_now_add=True)),
+                ('events_received', models.IntegerField(default=0)),
+                ('events_rejected', models.IntegerField(default=0)),
+                ('unknown_employees', models.IntegerField(default=0)),
+                ('rows_created', models.IntegerField(default=0)),
+                ('rows_updated', models.IntegerField(default=0)),
+                ('duration_ms', models.FloatField(default=0)),
+                ('events_per_second', models.FloatField(default=0)),
+            ],
+        ),
+    ]
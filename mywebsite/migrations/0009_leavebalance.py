@@ -0,0 +1,55 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def build_balances(apps, schema_editor):
+    LeaveApplication = apps.get_model('mywebsite', 'LeaveApplication')
+    LeaveBalance = apps.get_model('mywebsite', 'LeaveBalance')
+
+    rows = LeaveApplication.objects.filter(status__in=['PENDING', 'APPROVED']).values(
+        'employee_id', 'leave_type_id', 'start_date__year'
+    ).annotate(
+        days_pending=Sum('days', filter=Q(status='PENDING'), default=0),
+        days_approved=Sum('days', filter=Q(status='APPROVED'), default=0),
+    ).order_by()
+
+    LeaveBalance.objects.bulk_create([
+        LeaveBalance(
+            employee_id=row['employee_id'],
+            leave_type_id=row['leave_type_id'],
+            year=row['start_date__year'],
+            days_pending=row['days_pending'],
+            days_approved=row['days_approved'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0008_attendanceingestbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('days_pending', models.IntegerField(default=0)),
+                ('days_approved', models.IntegerField(default=0)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('leave_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='mywebsite.leavetype')),
+            ],
+            options={
+                'unique_together': {('employee', 'leave_type', 'year')},
+            },
+        ),
+        migrations.RunPython(build_balances, migrations.RunPython.noop),
+    ]
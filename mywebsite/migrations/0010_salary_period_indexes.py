@@ -0,0 +1,41 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:24
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_salaries(apps, schema_editor):
+    """
+    Refuse to add the unique constraint over duplicate payroll records
+    rather than deleting any of them; they have to be resolved by hand.
+    """
+    Salary = apps.get_model('mywebsite', 'Salary')
+    duplicates = list(Salary.objects.values('employee_id', 'year', 'month').annotate(
+        rows=Count('id')
+    ).filter(rows__gt=1).order_by('employee_id', 'year', 'month')[:20])
+    if duplicates:
+        listing = ', '.join(
+            f"employee {row['employee_id']} {row['month']}/{row['year']} ({row['rows']} rows)" for row in duplicates
+        )
+        raise RuntimeError(
+            f"Duplicate monthly salaries must be removed before migrating: {listing}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0009_leavebalance'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_salaries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='salary',
+            index=models.Index(fields=['year', 'month', '-net_salary'], name='salary_period_net_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='salary',
+            constraint=models.UniqueConstraint(fields=('employee', 'year', 'month'), name='unique_employee_salary_period'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:44
+
+import django.core.validators
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0010_salary_period_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.IntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(12)])),
+                ('year', models.IntegerField()),
+                ('file_format', models.CharField(choices=[('fixed', 'Fixed width'), ('csv', 'CSV')], default='fixed', max_length=5)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('bank_count', models.IntegerField(default=0)),
+                ('record_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('skipped_count', models.IntegerField(default=0)),
+                ('checksum', models.CharField(blank=True, help_text='SHA-256 of the downloaded ZIP', max_length=64)),
+                ('duration_ms', models.FloatField(default=0)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='payment_batches', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
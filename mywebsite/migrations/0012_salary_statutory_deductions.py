@@ -0,0 +1,65 @@
+# Generated by Django 5.0.6 on 2026-10-18 13:47
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import F
+
+
+def record_flat_tax_as_paye(apps, schema_editor):
+    """
+    Existing salaries keep their flat tax; it becomes their PAYE line
+    """
+    Salary = apps.get_model('mywebsite', 'Salary')
+    Salary.objects.update(paye=F('deductions'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0011_paymentbatch'),
+    ]
+
+    operations = [
+        # Existing salaries and runs were calculated with the flat rate
+        migrations.AddField(
+            model_name='payrollrun',
+            name='deduction_method',
+            field=models.CharField(choices=[('STATUTORY', 'Statutory (PAYE, NSSF, SHIF, Housing Levy)'), ('FLAT', 'Flat tax rate')], default='FLAT', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='salary',
+            name='deduction_method',
+            field=models.CharField(choices=[('STATUTORY', 'Statutory (PAYE, NSSF, SHIF, Housing Levy)'), ('FLAT', 'Flat tax rate')], default='FLAT', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='salary',
+            name='housing_levy',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salary',
+            name='nssf',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salary',
+            name='paye',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='salary',
+            name='shif',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=10, verbose_name='SHIF/NHIF'),
+        ),
+        migrations.RunPython(record_flat_tax_as_paye, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='payrollrun',
+            name='deduction_method',
+            field=models.CharField(choices=[('STATUTORY', 'Statutory (PAYE, NSSF, SHIF, Housing Levy)'), ('FLAT', 'Flat tax rate')], default='STATUTORY', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='salary',
+            name='deduction_method',
+            field=models.CharField(choices=[('STATUTORY', 'Statutory (PAYE, NSSF, SHIF, Housing Levy)'), ('FLAT', 'Flat tax rate')], default='STATUTORY', max_length=10),
+        ),
+    ]
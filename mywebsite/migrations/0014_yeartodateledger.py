@@ -0,0 +1,60 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:08
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def build_ledger(apps, schema_editor):
+    Salary = apps.get_model('mywebsite', 'Salary')
+    YearToDateLedger = apps.get_model('mywebsite', 'YearToDateLedger')
+
+    rows = Salary.objects.values('employee_id', 'year').annotate(
+        month_count=Count('id'),
+        total_base=Sum('base_salary'),
+        total_bonus=Sum('bonus'),
+        total_gross=Sum(F('base_salary') + F('bonus')),
+        total_paye=Sum('paye'),
+        total_nssf=Sum('nssf'),
+        total_shif=Sum('shif'),
+        total_housing_levy=Sum('housing_levy'),
+        total_tax=Sum('deductions'),
+        total_net=Sum('net_salary'),
+    ).order_by()
+    YearToDateLedger.objects.bulk_create([YearToDateLedger(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0013_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='YearToDateLedger',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('month_count', models.IntegerField(default=0)),
+                ('total_base', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_bonus', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_gross', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_paye', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_nssf', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_shif', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_housing_levy', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_tax', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('total_net', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ytd_ledger', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='yeartodateledger',
+            constraint=models.UniqueConstraint(fields=('year', 'employee'), name='unique_ytd_ledger'),
+        ),
+        migrations.RunPython(build_ledger, migrations.RunPython.noop),
+    ]
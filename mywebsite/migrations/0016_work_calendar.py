@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:32
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0015_receiptsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='working_weekdays',
+            field=models.CharField(blank=True, help_text='Weekdays worked, Monday=0 (e.g. 012345); blank for the company default', max_length=7, validators=[django.core.validators.RegexValidator('^[0-6]*$', 'Use weekday numbers 0 (Monday) to 6 (Sunday), e.g. 01234')]),
+        ),
+        migrations.CreateModel(
+            name='CalendarOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('name', models.CharField(max_length=100)),
+                ('is_working_day', models.BooleanField(default=False)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='calendar_overrides', to='mywebsite.department')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='calendaroverride',
+            constraint=models.UniqueConstraint(fields=('date', 'department'), name='unique_department_calendar_override'),
+        ),
+        migrations.AddConstraint(
+            model_name='calendaroverride',
+            constraint=models.UniqueConstraint(condition=models.Q(('department__isnull', True)), fields=('date',), name='unique_company_calendar_override'),
+        ),
+    ]
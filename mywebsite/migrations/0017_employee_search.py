@@ -0,0 +1,77 @@
+import re
+
+from django.db import migrations
+
+INDEX_TABLE = 'mywebsite_employee_search'
+
+SEARCH_FIELDS = (
+    'first_name', 'middle_name', 'last_name', 'username', 'employee_id',
+    'national_id', 'kra_pin', 'phone_number', 'mobile_phone',
+)
+
+
+def search_document(values):
+    parts = []
+    for name in SEARCH_FIELDS:
+        value = values.get(name)
+        if not value:
+            continue
+        parts.append(str(value))
+        if name in ('phone_number', 'mobile_phone'):
+            digits = re.sub(r'\D', '', value)
+            parts.append(digits)
+            if digits.startswith('254'):
+                parts.append('0' + digits[3:])
+    return ' '.join(parts)
+
+
+def fts5_available(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(option == 'ENABLE_FTS5' for option, in cursor.fetchall())
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        if not fts5_available(connection):
+            # Search falls back to icontains lookups
+            return
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {INDEX_TABLE} USING fts5(document, tokenize='unicode61', prefix='1 2 3')"
+        )
+        insert = f"INSERT INTO {INDEX_TABLE} (rowid, document) VALUES (%s, %s)"
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE {INDEX_TABLE} ("
+            f"employee_id bigint PRIMARY KEY REFERENCES mywebsite_customuser (id) "
+            f"ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            f"document tsvector NOT NULL)"
+        )
+        schema_editor.execute(f"CREATE INDEX {INDEX_TABLE}_document_idx ON {INDEX_TABLE} USING gin (document)")
+        insert = f"INSERT INTO {INDEX_TABLE} (employee_id, document) VALUES (%s, to_tsvector('simple', %s))"
+    else:
+        return
+
+    CustomUser = apps.get_model('mywebsite', 'CustomUser')
+    rows = CustomUser.objects.values('id', *SEARCH_FIELDS).order_by('id')
+    documents = [(row['id'], search_document(row)) for row in rows.iterator(chunk_size=2000)]
+    with connection.cursor() as cursor:
+        for offset in range(0, len(documents), 1000):
+            cursor.executemany(insert, documents[offset:offset + 1000])
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {INDEX_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0016_work_calendar'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
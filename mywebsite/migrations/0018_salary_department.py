@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-18 14:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def record_current_department(apps, schema_editor):
+    """
+    Existing salaries take their employee's current department, the one
+    the payroll summaries have been grouped by so far
+    """
+    CustomUser = apps.get_model('mywebsite', 'CustomUser')
+    Salary = apps.get_model('mywebsite', 'Salary')
+    Salary.objects.update(department_id=Subquery(
+        CustomUser.objects.filter(pk=OuterRef('employee_id')).values('department_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mywebsite', '0017_employee_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salary',
+            name='department',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='mywebsite.department'),
+        ),
+        migrations.RunPython(record_current_department, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,12 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
-from django.core.validators import MinValueValidator, MaxValueValidator
+from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
 from django.utils import timezone
 from decimal import Decimal
 from datetime import datetime
 
+from .statutory import Deductions, statutory_deductions
+
 class Allowance(models.Model):
     name = models.CharField(max_length=100)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
@@ -19,6 +21,12 @@ class Department(models.Model):
     """
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
+    # Weekday numbers (Monday=0) this department works, e.g. '012345' for a
+    # six-day week; blank follows the company's WORKING_WEEKDAYS
+    working_weekdays = models.CharField(
+        max_length=7, blank=True, help_text="Weekdays worked, Monday=0 (e.g. 012345); blank for the company default",
+        validators=[RegexValidator(r'^[0-6]*$', "Use weekday numbers 0 (Monday) to 6 (Sunday), e.g. 01234")]
+    )
     
     def __str__(self):
         return self.name
@@ -96,10 +104,31 @@ class Attendance(models.Model):
     
     class Meta:
         unique_together = ('employee', 'date')
+        indexes = [
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.username} - {self.date}"
 
+class AttendanceIngestBatch(models.Model):
+    """
+    One batch of clock-in/clock-out events received from attendance
+    devices, with its outcome and throughput
+    """
+    source = models.CharField(max_length=100, blank=True)
+    received_on = models.DateTimeField(auto_now_add=True)
+    events_received = models.IntegerField(default=0)
+    events_rejected = models.IntegerField(default=0)
+    unknown_employees = models.IntegerField(default=0)
+    rows_created = models.IntegerField(default=0)
+    rows_updated = models.IntegerField(default=0)
+    duration_ms = models.FloatField(default=0)
+    events_per_second = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"Batch {self.pk} from {self.source or 'unknown'} ({self.events_received} events)"
+
 class LeaveType(models.Model):
     """
     Types of leaves available
@@ -128,10 +157,39 @@ class LeaveApplication(models.Model):
     reason = models.TextField()
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     applied_on = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['applied_on', 'id'], name='leave_applied_on_id_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.username} - {self.leave_type.name}"
 
+class LeaveBalance(models.Model):
+    """
+    Running total of leave days per employee, leave type and year, kept in
+    step with LeaveApplication changes so balance checks are a single
+    indexed lookup
+    """
+    employee = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    leave_type = models.ForeignKey(LeaveType, on_delete=models.CASCADE)
+    year = models.IntegerField()
+    days_pending = models.IntegerField(default=0)
+    days_approved = models.IntegerField(default=0)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('employee', 'leave_type', 'year')
+
+    @property
+    def days_used(self):
+        """Days that count against the annual limit (pending and approved)"""
+        return self.days_pending + self.days_approved
+
+    def __str__(self):
+        return f"{self.employee.username} - {self.leave_type.name} {self.year}"
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from datetime import datetime
@@ -141,24 +199,120 @@ from decimal import Decimal
 from django.core.validators import MinValueValidator, MaxValueValidator
 from datetime import datetime
 
+# How a Salary's deductions are worked out: the Kenyan statutory
+# deductions from statutory.RATE_TABLES, or tax_rate percent of the basic
+# salary
+DEDUCTION_METHOD_CHOICES = [
+    ('STATUTORY', 'Statutory (PAYE, NSSF, SHIF, Housing Levy)'),
+    ('FLAT', 'Flat tax rate'),
+]
+
+
+class PayrollRun(models.Model):
+    """
+    A bulk payroll run that creates Salary rows for every active employee
+    for one month/year in a single batch.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('COMPLETED', 'Completed'),
+        ('FAILED', 'Failed')
+    ]
+
+    month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)])
+    year = models.IntegerField()
+    tax_rate = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    deduction_method = models.CharField(max_length=10, choices=DEDUCTION_METHOD_CHOICES, default='STATUTORY')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    created_by = models.ForeignKey('CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='payroll_runs')
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    employee_count = models.IntegerField(default=0)
+    salaries_created = models.IntegerField(default=0)
+    skipped_count = models.IntegerField(default=0)
+    rows_per_second = models.FloatField(default=0)
+    error = models.TextField(blank=True)
+
+    def get_month_name(self):
+        return month_name[self.month]
+
+    def __str__(self):
+        return f"Payroll run {self.get_month_name()} {self.year} ({self.status})"
+
+
 class Salary(models.Model):
     employee = models.ForeignKey('CustomUser', on_delete=models.CASCADE)
+    payroll_run = models.ForeignKey(PayrollRun, on_delete=models.SET_NULL, null=True, blank=True, related_name='salaries')
+    # The employee's department when the salary was written, so moving the
+    # employee later does not move their past pay between department totals
+    department = models.ForeignKey(
+        Department, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+'
+    )
     base_salary = models.DecimalField(max_digits=10, decimal_places=2)
     bonus = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     tax_rate = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    deduction_method = models.CharField(max_length=10, choices=DEDUCTION_METHOD_CHOICES, default='STATUTORY')
+    # Breakdown of deductions; a flat tax is recorded as PAYE
+    paye = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
+    nssf = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
+    shif = models.DecimalField('SHIF/NHIF', max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
+    housing_levy = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
     deductions = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), editable=False)
     net_salary = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
     month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)], default=datetime.today().month)
     year = models.IntegerField(default=datetime.today().year)
 
+    class Meta:
+        constraints = [
+            # One salary per employee per month; also serves the per-employee
+            # history and tax certificate lookups (employee, year[, month])
+            models.UniqueConstraint(fields=['employee', 'year', 'month'], name='unique_employee_salary_period'),
+        ]
+        indexes = [
+            # Period filters, keyset pagination and the latest-period lookup
+            models.Index(fields=['year', 'month', 'id'], name='salary_period_id_idx'),
+            # Top earners of a period
+            models.Index(fields=['year', 'month', '-net_salary'], name='salary_period_net_idx'),
+        ]
+
     def get_month_name(self):
         """Convert month number to month name"""
         return month_name[self.month]  # Converts 1 → 'January', 2 → 'February', etc.
 
-    def save(self, *args, **kwargs):
-        tax_amount = (self.tax_rate / Decimal('100')) * self.base_salary
-        self.deductions = tax_amount
+    @staticmethod
+    def calculate(base_salary, bonus, tax_rate):
+        """
+        Return (deductions, net_salary) for the given figures. Shared by
+        save() and the bulk payroll run, which bypasses save().
+        """
+        deductions = (tax_rate / Decimal('100')) * base_salary
+        return deductions, base_salary + bonus - deductions
+
+    @classmethod
+    def flat_deductions(cls, base_salary, bonus, tax_rate):
+        deductions, _ = cls.calculate(base_salary, bonus, tax_rate)
+        return Deductions(paye=deductions, nssf=Decimal('0.00'), shif=Decimal('0.00'),
+                          housing_levy=Decimal('0.00'), total=deductions)
+
+    def apply_deductions(self, deductions):
+        """
+        Store a statutory.Deductions breakdown and the resulting net pay
+        """
+        self.paye, self.nssf, self.shif, self.housing_levy, self.deductions = deductions
         self.net_salary = self.base_salary + self.bonus - self.deductions
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.department_id is None:
+            self.department_id = self.employee.department_id
+        deductions = None
+        if self.deduction_method == 'STATUTORY':
+            # Falls back to the flat rate for periods before the first table
+            deductions = statutory_deductions(self.base_salary + self.bonus, self.year, self.month)
+        if deductions is None:
+            deductions = self.flat_deductions(self.base_salary, self.bonus, self.tax_rate)
+        self.apply_deductions(deductions)
         super(Salary, self).save(*args, **kwargs)
 
     def __str__(self):
@@ -166,6 +320,167 @@ class Salary(models.Model):
 
 
 
+class PayrollPeriodSummary(models.Model):
+    """
+    Precomputed payroll totals for one month. There is one company-wide
+    row per period (is_total=True) and one row per department the salaries
+    were written under, with a null department for salaries that have none. Kept up to date from Salary
+    signals and rebuilt with the rebuild_payroll_summaries command.
+    """
+    year = models.IntegerField()
+    month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)])
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True)
+    is_total = models.BooleanField(default=False)
+    employee_count = models.IntegerField(default=0)
+    total_base = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_bonus = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_tax = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_net = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['year', 'month', 'department'],
+                condition=models.Q(department__isnull=False),
+                name='unique_department_payroll_summary'
+            ),
+            models.UniqueConstraint(
+                fields=['year', 'month', 'is_total'],
+                condition=models.Q(department__isnull=True),
+                name='unique_period_payroll_summary'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['year', 'month'], name='payroll_summary_period_idx'),
+        ]
+
+    def get_month_name(self):
+        return month_name[self.month]
+
+    @property
+    def average_net(self):
+        if not self.employee_count:
+            return Decimal('0.00')
+        return self.total_net / self.employee_count
+
+    def __str__(self):
+        if self.is_total:
+            scope = 'All departments'
+        else:
+            scope = self.department.name if self.department else 'Unassigned'
+        return f"{scope} - {self.get_month_name()} {self.year}"
+
+
+class YearToDateLedger(models.Model):
+    """
+    Running payroll totals per employee and year, kept in step with Salary
+    signals (and payroll run bulk inserts) so tax certificates and annual
+    returns read one row per employee instead of aggregating a year of
+    salaries. Rebuilt with the rebuild_ytd_ledger command.
+    """
+    employee = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='ytd_ledger')
+    year = models.IntegerField()
+    month_count = models.IntegerField(default=0)
+    total_base = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_bonus = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_gross = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_paye = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_nssf = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_shif = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_housing_levy = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_tax = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    total_net = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # Year first, so a company-wide annual run is one index range scan
+            models.UniqueConstraint(fields=['year', 'employee'], name='unique_ytd_ledger'),
+        ]
+
+    @property
+    def effective_tax_rate(self):
+        if not self.total_gross:
+            return Decimal('0.00')
+        return round(self.total_tax / self.total_gross * 100, 2)
+
+    def __str__(self):
+        return f"{self.employee.username} - {self.year} YTD"
+
+
+class PaymentBatch(models.Model):
+    """
+    A set of bank EFT files generated for the net salaries of one period,
+    with the control totals that were written into them
+    """
+    FORMAT_CHOICES = [
+        ('fixed', 'Fixed width'),
+        ('csv', 'CSV')
+    ]
+
+    month = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(12)])
+    year = models.IntegerField()
+    file_format = models.CharField(max_length=5, choices=FORMAT_CHOICES, default='fixed')
+    created_by = models.ForeignKey('CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='payment_batches')
+    created_on = models.DateTimeField(auto_now_add=True)
+    bank_count = models.IntegerField(default=0)
+    record_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    skipped_count = models.IntegerField(default=0)
+    checksum = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the downloaded ZIP")
+    duration_ms = models.FloatField(default=0)
+
+    def get_month_name(self):
+        return month_name[self.month]
+
+    def __str__(self):
+        return f"Payment batch {self.get_month_name()} {self.year} ({self.record_count} payments)"
+
+
+class Job(models.Model):
+    """
+    A unit of background work (a PDF report, a payroll run) queued in the
+    database and executed by run_job_worker. See jobs.py.
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed')
+    ]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey('CustomUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_on = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last sign of life from the running worker")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    result_file = models.FileField(upload_to='jobs/%Y/%m/', blank=True)
+    result_name = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's "next runnable job" lookup
+            models.Index(fields=['status', 'run_after', 'id'], name='job_queue_idx'),
+        ]
+
+    @property
+    def is_finished(self):
+        return self.status in ('SUCCEEDED', 'FAILED')
+
+    def __str__(self):
+        return f"Job {self.pk} {self.kind} ({self.status})"
+
+
 class PaySlip(models.Model):
     """
     Monthly payslip generation
@@ -179,6 +494,45 @@ class PaySlip(models.Model):
     def __str__(self):
         return f"Payslip-{self.receipt_number}"
 
+
+class CalendarOverride(models.Model):
+    """
+    A day that differs from the working-day calendar's weekend rules and
+    statutory public holidays: an extra holiday (e.g. the gazetted Idd-ul-Fitr
+    date) or a working day, for the whole company or one department.
+    A department's override wins over a company-wide one on the same date.
+    """
+    date = models.DateField()
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name='calendar_overrides')
+    name = models.CharField(max_length=100)
+    is_working_day = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'department'], name='unique_department_calendar_override'),
+            models.UniqueConstraint(fields=['date'], condition=models.Q(department__isnull=True),
+                                    name='unique_company_calendar_override'),
+        ]
+
+    def __str__(self):
+        scope = self.department.name if self.department_id else "Company"
+        return f"{self.date} {self.name} ({scope}, {'working' if self.is_working_day else 'holiday'})"
+
+
+class ReceiptSequence(models.Model):
+    """
+    Named counters for document numbers. Callers reserve a whole block of
+    numbers with one UPDATE (see payslips.allocate_receipt_numbers) rather
+    than one per document.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
 class TaxDeclaration(models.Model):
     """
     Employee tax declarations and investments
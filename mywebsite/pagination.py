@@ -0,0 +1,150 @@
+# pagination.py
+import base64
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _encode(values):
+    data = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def _decode(cursor, fields, model):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor(cursor)
+
+    # Turn ISO strings back into dates so comparisons work on every backend
+    decoded = []
+    for name, value in zip(fields, values):
+        field = model._meta.get_field(name)
+        internal_type = field.get_internal_type()
+        if internal_type == 'DateTimeField' and value is not None:
+            value = parse_datetime(value)
+        elif internal_type == 'DateField' and value is not None:
+            value = parse_date(value)
+        decoded.append(value)
+    return decoded
+
+
+def _seek(ordering, values, forward):
+    """
+    Build the WHERE clause that selects rows strictly after (forward) or
+    before the row with the given key values, for a lexicographic ordering
+    such as ['-date', '-id'].
+    """
+    condition = Q()
+    equal = Q()
+    for term, value in zip(ordering, values):
+        name = term.lstrip('-')
+        descending = term.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def _reverse(ordering):
+    return [term[1:] if term.startswith('-') else f"-{term}" for term in ordering]
+
+
+def page_size_from(request):
+    default = getattr(settings, 'PAGINATION_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    maximum = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+    try:
+        size = int(request.GET.get('page_size', default))
+    except ValueError:
+        size = default
+    return max(1, min(size, maximum))
+
+
+class KeysetPage:
+    """
+    One page of a keyset (seek) paginated queryset. The cost of fetching a
+    page does not depend on how deep into the list it is, because the next
+    page starts from the last row's key instead of an OFFSET.
+    """
+    def __init__(self, items, request, ordering, has_next, has_previous, page_size):
+        self.items = items
+        self.ordering = ordering
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.page_size = page_size
+        self._request = request
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _key(self, obj):
+        return [getattr(obj, term.lstrip('-')) for term in self.ordering]
+
+    def _query(self, **params):
+        query = self._request.GET.copy()
+        for name in ('after', 'before'):
+            query.pop(name, None)
+        query.update(params)
+        return query.urlencode()
+
+    @property
+    def next_query(self):
+        if not self.has_next:
+            return ''
+        return self._query(after=_encode(self._key(self.items[-1])))
+
+    @property
+    def previous_query(self):
+        if not self.has_previous:
+            return ''
+        return self._query(before=_encode(self._key(self.items[0])))
+
+    @property
+    def first_query(self):
+        return self._query()
+
+
+def keyset_paginate(queryset, request, ordering):
+    """
+    Return a KeysetPage of queryset ordered by the given fields. The last
+    field must be unique (normally 'id' or '-id') so every row has a
+    distinct key. The position comes from the 'after'/'before' GET cursors.
+    """
+    page_size = page_size_from(request)
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    model = queryset.model
+    fields = [term.lstrip('-') for term in ordering]
+
+    try:
+        if before:
+            values = _decode(before, fields, model)
+            rows = list(
+                queryset.filter(_seek(ordering, values, forward=False)).order_by(*_reverse(ordering))[:page_size + 1]
+            )
+            has_previous = len(rows) > page_size
+            items = rows[:page_size][::-1]
+            return KeysetPage(items, request, ordering, True, has_previous, page_size)
+        if after:
+            queryset = queryset.filter(_seek(ordering, _decode(after, fields, model), forward=True))
+    except InvalidCursor:
+        after = None
+
+    rows = list(queryset.order_by(*ordering)[:page_size + 1])
+    return KeysetPage(rows[:page_size], request, ordering, len(rows) > page_size, bool(after), page_size)
@@ -0,0 +1,156 @@
+# payroll.py
+import logging
+import time
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import dashboard_metrics
+from .models import CustomUser, PayrollRun, Salary
+from .payslips import generate_payslips
+from .statutory import statutory_deductions_batch
+from .summaries import rebuild_period
+from .ytd_ledger import add_salaries
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def load_payable_employees(month, year):
+    """
+    Return (employee_id, base_salary, department_id) for every active
+    employee that does not already have a Salary row for the period. The
+    employee's own basic_salary wins over the role's base_salary; employees
+    with neither are returned with None so the caller can count them as
+    skipped.
+    """
+    already_paid = Salary.objects.filter(month=month, year=year).values('employee_id')
+    rows = CustomUser.objects.filter(
+        is_active_employee=True
+    ).exclude(
+        id__in=already_paid
+    ).values_list('id', 'basic_salary', 'role__base_salary', 'department_id').order_by('id')
+
+    return [
+        (pk, basic if basic is not None else role_base, department_id)
+        for pk, basic, role_base, department_id in rows
+    ]
+
+
+def build_salaries(run, employees):
+    """
+    Compute deductions and net pay for a whole batch in one pass and return
+    unsaved Salary instances ready for bulk_create. Statutory deductions for
+    the batch come from one call into the period's rate table.
+    """
+    bonus = Decimal('0.00')
+    breakdowns = None
+    if run.deduction_method == 'STATUTORY':
+        breakdowns = statutory_deductions_batch(
+            [base_salary + bonus for _, base_salary, _ in employees], run.year, run.month
+        )
+    if breakdowns is None:
+        breakdowns = [Salary.flat_deductions(base_salary, bonus, run.tax_rate) for _, base_salary, _ in employees]
+
+    salaries = []
+    for (employee_id, base_salary, department_id), deductions in zip(employees, breakdowns):
+        salary = Salary(
+            employee_id=employee_id,
+            department_id=department_id,
+            payroll_run=run,
+            base_salary=base_salary,
+            bonus=bonus,
+            tax_rate=run.tax_rate,
+            deduction_method=run.deduction_method,
+            month=run.month,
+            year=run.year,
+        )
+        salary.apply_deductions(deductions)
+        salaries.append(salary)
+    return salaries
+
+
+def refresh_period(run):
+    """
+    bulk_create skips the Salary signals: the year-to-date ledger is
+    updated per chunk, the period summaries are refreshed here in one go.
+    Called whenever a run committed salaries, including a run that failed
+    part way through, so its committed chunks are not missing from the
+    totals.
+    """
+    try:
+        rebuild_period(run.year, run.month)
+        dashboard_metrics.invalidate('latest_payroll')
+    except Exception as e:
+        logger.exception("Refreshing the summaries of payroll run %s failed", run.pk)
+        run.status = 'FAILED'
+        run.error = run.error or str(e)
+
+
+def execute_payroll_run(run, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Create Salary rows for every payable employee of the run's period.
+    Rows are written with bulk_create, one transaction per chunk, so a
+    failure part way through keeps the chunks that were already committed
+    and a re-run only picks up the employees that are still missing. The
+    period's payslips are issued (or brought up to date) at the end.
+    """
+    run.status = 'RUNNING'
+    run.started_at = timezone.now()
+    run.error = ''
+    run.save(update_fields=['status', 'started_at', 'error'])
+
+    start = time.perf_counter()
+    created = 0
+    try:
+        employees = load_payable_employees(run.month, run.year)
+        payable = [row for row in employees if row[1] is not None]
+        skipped = len(employees) - len(payable)
+
+        for offset in range(0, len(payable), chunk_size):
+            batch = build_salaries(run, payable[offset:offset + chunk_size])
+            with transaction.atomic():
+                Salary.objects.bulk_create(batch, batch_size=chunk_size)
+                add_salaries(batch)
+            created += len(batch)
+        generate_payslips(run.month, run.year, batch_size=chunk_size)
+    except Exception as e:
+        logger.exception("Payroll run %s failed", run.pk)
+        run.status = 'FAILED'
+        run.error = str(e)
+    else:
+        run.status = 'COMPLETED'
+        run.employee_count = len(employees)
+        run.skipped_count = skipped
+    finally:
+        if created:
+            refresh_period(run)
+
+    elapsed = time.perf_counter() - start
+    run.salaries_created += created
+    run.rows_per_second = created / elapsed if elapsed > 0 else 0
+    run.finished_at = timezone.now()
+    run.save()
+
+    logger.info(
+        "Payroll run %s: %d salaries in %.2fs (%.0f rows/s)",
+        run.pk, created, elapsed, run.rows_per_second
+    )
+    return run
+
+
+def run_payroll(month, year, tax_rate=Decimal('0.00'), created_by=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                deduction_method='STATUTORY'):
+    """
+    Create and execute a payroll run for the given month/year.
+    """
+    run = PayrollRun.objects.create(
+        month=month,
+        year=year,
+        tax_rate=tax_rate,
+        deduction_method=deduction_method,
+        created_by=created_by,
+    )
+    return execute_payroll_run(run, chunk_size=chunk_size)
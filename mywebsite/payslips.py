@@ -0,0 +1,263 @@
+# payslips.py
+import calendar
+import csv
+import io
+import logging
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Count, F
+
+from . import pdf_cache, pdf_render, payslip_canvas
+from .models import Attendance, PaySlip, ReceiptSequence, Salary
+from .utils import ZipStream, render_pdf_bytes
+from .work_calendar import working_days_in_month
+
+logger = logging.getLogger(__name__)
+
+PAYSLIP_TEMPLATE = 'receipt_payslip.html'
+
+RECEIPT_SEQUENCE = 'payslip'
+
+COMPANY_CONTEXT = {
+    'company_name': 'SwiftPay',
+    'company_address': 'Kenyatta Business Rd, Nairobi',
+    'logo': 'img/logo.png',  # Make sure your logo is simple and small
+}
+
+
+def payslip_context(salary):
+    """
+    Template context for receipt_payslip.html
+    """
+    return {
+        'salary': salary,
+        'gross_salary': salary.base_salary + salary.bonus,
+        'tax_amount': salary.deductions,
+        **COMPANY_CONTEXT,
+    }
+
+
+def payslip_filename(salary):
+    return f"payslip_{salary.employee.username}_{salary.month}_{salary.year}.pdf"
+
+
+def payslip_renderer():
+    renderer = getattr(settings, 'PAYSLIP_RENDERER', 'html')
+    if renderer not in ('html', 'reportlab'):
+        raise ImproperlyConfigured(f"PAYSLIP_RENDERER must be 'html' or 'reportlab', not {renderer!r}")
+    return renderer
+
+
+def payslip_pdf(salary):
+    """
+    PDF bytes of one payslip from the configured renderer, or None on error
+    """
+    context = payslip_context(salary)
+    if payslip_renderer() == 'reportlab':
+        return payslip_canvas.payslip_pdf(context)
+    return render_pdf_bytes(PAYSLIP_TEMPLATE, context)
+
+
+def payslip_cache_key(salary):
+    extra = dict(COMPANY_CONTEXT)
+    if payslip_renderer() == 'reportlab':
+        extra['renderer'] = f"reportlab-{payslip_canvas.LAYOUT_VERSION}"
+    return pdf_cache.cache_key(PAYSLIP_TEMPLATE, [salary, salary.employee], extra)
+
+
+def render_payslip(salary):
+    """
+    Render one payslip and return (filename, pdf_bytes, seconds). Runs in
+    pool workers, so it must not touch the database: the salary has to be
+    loaded with its employee already attached.
+    """
+    start = time.perf_counter()
+    pdf = payslip_pdf(salary)
+    return payslip_filename(salary), pdf, time.perf_counter() - start
+
+
+def _init_worker():
+    # Needed when the pool uses the spawn start method; forked workers
+    # inherit an already configured Django.
+    if not apps.ready:
+        django.setup()
+    pdf_render.preload()
+
+
+def default_worker_count():
+    return getattr(settings, 'PAYSLIP_EXPORT_WORKERS', None) or os.cpu_count() or 1
+
+
+def iter_rendered_payslips(salaries, workers=None):
+    """
+    Render payslips across a process pool and yield
+    (salary, filename, pdf_bytes, seconds) in order. Only a small window of
+    documents is in flight at a time, so memory stays flat no matter how
+    many payslips are rendered.
+    """
+    workers = workers or default_worker_count()
+    if workers == 1:
+        for salary in salaries:
+            yield (salary,) + render_payslip(salary)
+        return
+
+    window = workers * 2
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for salary in salaries:
+            pending.append((salary, pool.submit(render_payslip, salary)))
+            if len(pending) >= window:
+                salary, future = pending.popleft()
+                yield (salary,) + future.result()
+        while pending:
+            salary, future = pending.popleft()
+            yield (salary,) + future.result()
+
+
+def month_salaries(month, year):
+    return Salary.objects.filter(
+        month=month, year=year
+    ).select_related('employee').order_by('employee__username', 'id')
+
+
+def allocate_receipt_numbers(count, name=RECEIPT_SEQUENCE):
+    """
+    Reserve count consecutive numbers of a ReceiptSequence and return the
+    first. One UPDATE whatever the count; in a caller's transaction the row
+    stays locked, and the block is handed back on rollback, until commit.
+    """
+    if count <= 0:
+        return None
+    with transaction.atomic():
+        ReceiptSequence.objects.get_or_create(name=name)
+        ReceiptSequence.objects.filter(name=name).update(next_value=F('next_value') + count)
+        return ReceiptSequence.objects.values_list('next_value', flat=True).get(name=name) - count
+
+
+def receipt_number(year, month, number):
+    return f"PS{year}{month:02d}-{number:07d}"
+
+
+def days_present_by_employee(month, year):
+    """
+    employee_id -> days marked present (and not on leave) in the month,
+    from one grouped query
+    """
+    days = calendar.monthrange(year, month)[1]
+    return dict(
+        Attendance.objects.filter(
+            date__range=(date(year, month, 1), date(year, month, days)), is_present=True, is_leave=False
+        ).values('employee_id').annotate(days=Count('id')).values_list('employee_id', 'days').order_by()
+    )
+
+
+def generate_payslips(month, year, issue_date=None, batch_size=1000):
+    """
+    Issue a PaySlip for every Salary of the period, with the working days
+    of the calendar of the department the salary was paid under (as
+    stored on the Salary, so a later transfer does not change it), like
+    the period summaries. Idempotent: existing
+    payslips keep their receipt number and issue date and are only written
+    when their working days or days present changed. New payslips get their
+    receipt numbers from one block of the sequence. Returns a dict of
+    created / updated / unchanged counts.
+    """
+    start = time.perf_counter()
+    issue_date = issue_date or date.today()
+    present = days_present_by_employee(month, year)
+    existing = {
+        slip.salary_id: slip
+        for slip in PaySlip.objects.filter(salary__month=month, salary__year=year).only(
+            'id', 'salary_id', 'total_working_days', 'days_present'
+        )
+    }
+
+    working = {}
+    new = []
+    changed = []
+    unchanged = 0
+    for salary_id, employee_id, department_id in Salary.objects.filter(month=month, year=year).order_by(
+        'id'
+    ).values_list('id', 'employee_id', 'department_id'):
+        if department_id not in working:
+            working[department_id] = working_days_in_month(year, month, department_id)
+        working_days = working[department_id]
+        days_present = present.get(employee_id, 0)
+        slip = existing.get(salary_id)
+        if slip is None:
+            new.append(PaySlip(
+                salary_id=salary_id, issue_date=issue_date,
+                total_working_days=working_days, days_present=days_present,
+            ))
+        elif (slip.total_working_days, slip.days_present) != (working_days, days_present):
+            slip.total_working_days = working_days
+            slip.days_present = days_present
+            changed.append(slip)
+        else:
+            unchanged += 1
+
+    with transaction.atomic():
+        first = allocate_receipt_numbers(len(new))
+        for offset, slip in enumerate(new):
+            slip.receipt_number = receipt_number(year, month, first + offset)
+        PaySlip.objects.bulk_create(new, batch_size=batch_size)
+        PaySlip.objects.bulk_update(changed, ['total_working_days', 'days_present'], batch_size=batch_size)
+
+    result = {
+        'created': len(new),
+        'updated': len(changed),
+        'unchanged': unchanged,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+    logger.info("Payslips for %s/%s: %s", month, year, result)
+    return result
+
+
+def write_payslips_pdf(salaries, fh, title="Payslips"):
+    """
+    Draw every payslip on its own page of one PDF, for printing. Always
+    uses the ReportLab renderer; returns the number of pages.
+    """
+    return payslip_canvas.write_payslips_pdf((payslip_context(salary) for salary in salaries), fh, title)
+
+
+def stream_payslip_zip(salaries, workers=None, stats=None):
+    """
+    Yield a ZIP archive of payslip PDFs chunk by chunk. A manifest.csv with
+    the per-document render time and size is appended at the end. If a
+    stats dict is passed it is filled with totals once the stream is done.
+    """
+    stream = ZipStream()
+    manifest = io.StringIO()
+    writer = csv.writer(manifest)
+    writer.writerow(['salary_id', 'filename', 'render_seconds', 'bytes', 'status'])
+
+    start = time.perf_counter()
+    count = failed = 0
+    with zipfile.ZipFile(stream, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for salary, filename, pdf, seconds in iter_rendered_payslips(salaries, workers):
+            count += 1
+            if pdf is None:
+                failed += 1
+                writer.writerow([salary.pk, filename, f"{seconds:.4f}", 0, 'error'])
+                continue
+            archive.writestr(filename, pdf)
+            writer.writerow([salary.pk, filename, f"{seconds:.4f}", len(pdf), 'ok'])
+            yield stream.drain()
+        archive.writestr('manifest.csv', manifest.getvalue())
+    yield stream.drain()
+
+    elapsed = time.perf_counter() - start
+    logger.info("Exported %d payslips (%d failed) in %.2fs", count, failed, elapsed)
+    if stats is not None:
+        stats.update({'documents': count, 'failed': failed, 'seconds': elapsed})
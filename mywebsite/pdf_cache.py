@@ -0,0 +1,107 @@
+# pdf_cache.py
+"""
+Content-addressed on-disk cache for rendered PDFs.
+
+A document is stored under MEDIA_ROOT/pdf_cache/<namespace>/<sha256>.pdf,
+where the hash covers the database rows the document was built from, the
+template's modification time and any extra context (company details). A
+change to any of those produces a new key, so stale files are never
+served; invalidate() only reclaims the disk space of a namespace.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+
+from .pdf_render import template_mtime
+
+# Fields that change without affecting any document
+IGNORED_FIELDS = ('password', 'last_login')
+
+
+def cache_root():
+    return getattr(settings, 'PDF_CACHE_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'pdf_cache')
+
+
+def row_fingerprint(obj):
+    """
+    Stable text form of a model instance's concrete field values
+    """
+    values = [
+        f"{field.attname}={getattr(obj, field.attname)!r}"
+        for field in obj._meta.concrete_fields
+        if field.attname not in IGNORED_FIELDS
+    ]
+    return f"{obj._meta.label}|" + '|'.join(values)
+
+
+def cache_key(template_src, rows, extra=None):
+    """
+    Hash of the template, its mtime, the given model instances and any
+    extra context values
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{template_src}|{template_mtime(template_src)}".encode())
+    for row in rows:
+        digest.update(b'\n')
+        digest.update(row_fingerprint(row).encode())
+    for name, value in sorted((extra or {}).items()):
+        digest.update(f"\n{name}={value!r}".encode())
+    return digest.hexdigest()
+
+
+def _path(namespace, key):
+    return os.path.join(cache_root(), *namespace, f"{key}.pdf")
+
+
+def get(namespace, key):
+    """
+    Return the cached PDF bytes for key, or None on a miss
+    """
+    try:
+        with open(_path(namespace, key), 'rb') as fh:
+            return fh.read()
+    except FileNotFoundError:
+        return None
+
+
+def get_or_render(namespace, key, render):
+    """
+    Return the cached PDF bytes for key, calling render() to produce and
+    store them on a miss. Returns None if rendering fails.
+    """
+    pdf = get(namespace, key)
+    if pdf is not None:
+        return pdf
+
+    path = _path(namespace, key)
+    pdf = render()
+    if pdf is None:
+        return None
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Write to a temporary file first so concurrent readers never see a
+    # half-written PDF
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(pdf)
+    os.replace(tmp_path, path)
+    return pdf
+
+
+def invalidate(namespace):
+    """
+    Remove every cached document in a namespace
+    """
+    shutil.rmtree(os.path.join(cache_root(), *namespace), ignore_errors=True)
+
+
+def payslip_namespace(salary_id):
+    return ('payslip', str(salary_id))
+
+
+def tax_certificate_namespace(employee_id, year):
+    return ('tax_certificate', str(employee_id), str(year))
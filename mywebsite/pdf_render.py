@@ -0,0 +1,144 @@
+# pdf_render.py
+"""
+PDF rendering service shared by payslips, reports and tax certificates.
+
+xhtml2pdf documents used to pay for everything from scratch: the template
+was looked up and compiled again, and every <img>/<link>/@font-face URI
+was re-resolved and re-read from disk. Here those are per-process:
+
+- compiled templates are kept until their file changes on disk;
+- static and media files the documents reference (the logo, stylesheets,
+  fonts) are resolved through the staticfiles finders once and their
+  bytes held in memory, so link_callback hands xhtml2pdf the data without
+  touching the filesystem. preload() fills this cache up front, e.g. in
+  pool workers before the first document.
+
+The work xhtml2pdf does per document (HTML and CSS parsing, the CSS
+cascade and layout) depends on the rendered HTML and cannot be shared.
+"""
+import os
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.template.loader import get_template
+from xhtml2pdf import pisa
+
+# Static files every document set uses, loaded by preload()
+PRELOAD_STATIC = ('img/logo.png',)
+
+# Larger files are passed to xhtml2pdf by path instead of held in memory
+MAX_PRELOAD_BYTES = 2 * 1024 * 1024
+
+_lock = threading.Lock()
+_templates = {}  # template_src -> (mtime, Template)
+_resources = {}  # uri -> bytes, a file path, or None when it cannot be found
+
+
+def _mtime(template):
+    try:
+        return os.path.getmtime(template.origin.name)
+    except (OSError, TypeError):
+        return 0
+
+
+def get_pdf_template(template_src):
+    """
+    The compiled template, reused until its file is modified
+    """
+    cached = _templates.get(template_src)
+    if cached is not None:
+        mtime, template = cached
+        if mtime == _mtime(template):
+            return template
+    template = get_template(template_src)
+    with _lock:
+        _templates[template_src] = (_mtime(template), template)
+    return template
+
+
+def template_mtime(template_src):
+    get_pdf_template(template_src)
+    return _templates[template_src][0]
+
+
+def _find(uri):
+    """
+    Filesystem path for a static or media URL, or an existing file path
+    """
+    if uri.startswith(settings.MEDIA_URL):
+        path = os.path.join(settings.MEDIA_ROOT, uri[len(settings.MEDIA_URL):])
+        return path if os.path.isfile(path) else None
+    if uri.startswith(settings.STATIC_URL):
+        relative = uri[len(settings.STATIC_URL):]
+        if settings.STATIC_ROOT:
+            path = os.path.join(settings.STATIC_ROOT, relative)
+            if os.path.isfile(path):
+                return path
+        # Not collected (development): ask the finders
+        return finders.find(relative)
+    if os.path.isabs(uri) and os.path.isfile(uri):
+        return uri
+    return None
+
+
+def resource(uri):
+    """
+    Contents (or, for large files, the path) of the file a document URI
+    refers to; None if there is no such file
+    """
+    try:
+        return _resources[uri]
+    except KeyError:
+        pass
+    path = _find(uri)
+    value = path
+    if path is not None and os.path.getsize(path) <= MAX_PRELOAD_BYTES:
+        with open(path, 'rb') as fh:
+            value = fh.read()
+    with _lock:
+        _resources[uri] = value
+    return value
+
+
+def link_callback(uri, rel):
+    if uri.startswith(('data:', 'http://', 'https://')):
+        return None
+    # None makes xhtml2pdf fall back to its own lookup (and log the miss)
+    return resource(uri)
+
+
+def preload(static=PRELOAD_STATIC):
+    """
+    Load the shared static resources now rather than on the first document
+    """
+    for name in static:
+        resource(settings.STATIC_URL + name)
+
+
+def reset():
+    """
+    Forget cached templates and resources
+    """
+    with _lock:
+        _templates.clear()
+        _resources.clear()
+
+
+def html_to_pdf(html):
+    """
+    Convert rendered HTML to PDF bytes, or None on error
+    """
+    result = BytesIO()
+    pdf = pisa.pisaDocument(html, dest=result, encoding='UTF-8', link_callback=link_callback)
+    if not pdf.err:
+        return result.getvalue()
+    return None
+
+
+def render_pdf(template_src, context):
+    """
+    Render a template to PDF bytes, or None on error
+    """
+    return html_to_pdf(get_pdf_template(template_src).render(context))
@@ -0,0 +1,105 @@
+# querybudget.py
+import logging
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(limit):
+    """
+    Declare the maximum number of SQL queries a view may run, e.g.
+
+        @login_required
+        @query_budget(6)
+        def dashboard(request): ...
+    """
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+class QueryCounter:
+    """
+    Database execute wrapper that counts queries and remembers the SQL
+    """
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+
+@contextmanager
+def count_queries():
+    """
+    Count queries on every database connection inside the block. Works with
+    DEBUG off, unlike connection.queries.
+    """
+    counter = QueryCounter()
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        yield counter
+
+
+@contextmanager
+def max_queries(limit):
+    """
+    Test helper: fail if the block runs more than limit queries, e.g.
+
+        with max_queries(5):
+            self.client.get(reverse('attendance_list'))
+    """
+    with count_queries() as counter:
+        yield counter
+    if len(counter) > limit:
+        raise QueryBudgetExceeded(
+            f"{len(counter)} queries executed, budget is {limit}:\n" + '\n'.join(counter.queries)
+        )
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries each request runs and compare them with the view's
+    declared budget (or QUERY_BUDGET_DEFAULT). Over-budget views are logged;
+    with QUERY_BUDGET_STRICT enabled (e.g. in tests) they raise instead.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with count_queries() as counter:
+            response = self.get_response(request)
+
+        budget = getattr(request, '_query_budget', None)
+        if budget is not None and len(counter) > budget:
+            message = (
+                f"{request.method} {request.path} ran {len(counter)} queries, "
+                f"budget is {budget} ({request._query_budget_view})"
+            )
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message + ':\n' + '\n'.join(counter.queries))
+            logger.warning(message)
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(len(counter))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        budget = getattr(view_func, 'query_budget', None)
+        if budget is None:
+            budget = getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+        request._query_budget = budget
+        request._query_budget_view = f"{view_func.__module__}.{view_func.__name__}"
@@ -0,0 +1,155 @@
+# reports.py
+from datetime import datetime
+from decimal import Decimal
+
+from . import pdf_cache
+from .attendance_analytics import load_month
+from .models import CustomUser, Department, Salary
+from .payslips import COMPANY_CONTEXT
+from .summaries import period_report
+from .utils import render_pdf_bytes
+from .work_calendar import working_days_in_month
+from .ytd_ledger import employee_year
+
+MONTHLY_REPORT_PDF_TEMPLATE = 'reports/monthly_summary_pdf.html'
+TAX_CERTIFICATE_PDF_TEMPLATE = 'reports/tax_certificate_pdf.html'
+
+
+def monthly_report_context(year, month):
+    """
+    Context for the monthly payroll report, page and PDF
+    """
+    # Period totals and department breakdown from the precomputed summaries
+    payroll_data, department_data = period_report(year, month)
+
+    # Top earners
+    top_earners = Salary.objects.filter(
+        year=year,
+        month=month
+    ).select_related('employee__department').order_by('-net_salary')[:10]
+
+    return {
+        'report_month': month,
+        'report_year': year,
+        'month_name': datetime(year, month, 1).strftime('%B'),
+        'payroll_data': payroll_data,
+        'department_data': department_data,
+        'top_earners': top_earners,
+        'available_years': range(2020, datetime.now().year + 1),
+        'company_name': "SwiftPay",  # Add your company name
+        'company_address': "Kenyatta Business Rd, Nairobi",  # Add your address
+    }
+
+
+# Employees listed company-wide, lowest attendance rate first
+ATTENDANCE_WATCHLIST_SIZE = 25
+
+
+def attendance_report_context(year, month, department=None):
+    """
+    Context for the monthly attendance report: per-department figures and
+    per-employee rows, for one department or the company-wide watchlist
+    """
+    matrix = load_month(year, month, department=department)
+    stats = matrix.employee_stats()
+
+    all_departments = list(Department.objects.order_by('name'))
+    names = {dept.pk: dept.name for dept in all_departments}
+    departments = sorted(
+        ({**row, 'name': names.get(row['department_id'], 'No department')} for row in matrix.department_stats(stats)),
+        key=lambda row: row['name']
+    )
+
+    limit = None if department is not None else ATTENDANCE_WATCHLIST_SIZE
+    employees = matrix.rows(matrix.lowest_attendance(limit, stats), stats)
+    people = CustomUser.objects.select_related('department').in_bulk([row['employee_id'] for row in employees])
+    for row in employees:
+        row['employee'] = people.get(row['employee_id'])
+
+    present = int(stats['days_present'].sum())
+    expected = int(matrix.working_days.sum()) - int(stats['leave_days'].sum())
+    return {
+        'report_month': month,
+        'report_year': year,
+        'month_name': datetime(year, month, 1).strftime('%B'),
+        'department': department,
+        'all_departments': all_departments,
+        'working_days': working_days_in_month(year, month, department),
+        'employee_count': len(matrix.employee_ids),
+        'attendance_rate': present / expected if expected > 0 else None,
+        'late_days': int(stats['late_days'].sum()),
+        'overtime_hours': float(stats['overtime_hours'].sum()),
+        'department_rows': departments,
+        'employee_rows': employees,
+        'available_years': range(2020, datetime.now().year + 1),
+    }
+
+
+def monthly_report_pdf(year, month):
+    """
+    Render the monthly payroll report; returns (filename, pdf_bytes or None)
+    """
+    context = monthly_report_context(year, month)
+    return f"payroll_report_{year}_{month}.pdf", render_pdf_bytes(MONTHLY_REPORT_PDF_TEMPLATE, context)
+
+
+def tax_certificate_context(employee, report_year):
+    """
+    Context for an employee's tax certificate, page and PDF
+    """
+    # Monthly rows for the breakdown table
+    salaries = Salary.objects.filter(
+        employee=employee,
+        year=report_year
+    ).order_by('month')
+
+    # YTD totals from the ledger rather than aggregating the salaries
+    ledger = employee_year(employee, report_year)
+    ytd_totals = {
+        field: getattr(ledger, field) if ledger else None
+        for field in ('total_base', 'total_bonus', 'total_tax', 'total_net')
+    }
+
+    return {
+        'employee': employee,
+        'report_year': report_year,
+        'salaries': salaries,
+        'ytd_totals': ytd_totals,
+        'months_paid': ledger.month_count if ledger else 0,
+        'gross_income': ledger.total_gross if ledger else Decimal('0'),
+        'effective_tax_rate': ledger.effective_tax_rate if ledger else 0,
+        'current_year': datetime.now().year,
+        'available_years': range(2020, datetime.now().year + 1),
+    }
+
+
+def tax_certificate_filename(employee, report_year):
+    return f"Tax_Certificate_{employee.username}_{report_year}.pdf"
+
+
+def tax_certificate_cache_key(context):
+    return pdf_cache.cache_key(
+        TAX_CERTIFICATE_PDF_TEMPLATE, [context['employee'], *context['salaries']], COMPANY_CONTEXT
+    )
+
+
+def cached_tax_certificate(context):
+    """
+    (key, pdf_bytes or None) for a tax certificate already in the PDF cache
+    """
+    key = tax_certificate_cache_key(context)
+    namespace = pdf_cache.tax_certificate_namespace(context['employee'].pk, context['report_year'])
+    return key, pdf_cache.get(namespace, key)
+
+
+def tax_certificate_pdf(employee, report_year):
+    """
+    Render (or fetch from the PDF cache) an employee's tax certificate;
+    returns (filename, pdf_bytes or None)
+    """
+    context = tax_certificate_context(employee, report_year)
+    pdf = pdf_cache.get_or_render(
+        pdf_cache.tax_certificate_namespace(employee.pk, report_year), tax_certificate_cache_key(context),
+        lambda: render_pdf_bytes(TAX_CERTIFICATE_PDF_TEMPLATE, context)
+    )
+    return tax_certificate_filename(employee, report_year), pdf
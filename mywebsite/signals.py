@@ -0,0 +1,175 @@
+# signals.py
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import dashboard_metrics, employee_search, leave_balances, pdf_cache, summaries, ytd_ledger
+from .ingest import directory
+from .models import (
+    Attendance, CalendarOverride, CustomUser, Department, LeaveApplication, PayrollPeriodSummary, Salary
+)
+from .work_calendar import company_calendar
+
+
+@receiver([post_save, post_delete], sender=Salary)
+def invalidate_salary_pdfs(sender, instance, **kwargs):
+    """
+    Drop cached payslip and tax certificate PDFs built from this salary
+    """
+    pdf_cache.invalidate(pdf_cache.payslip_namespace(instance.pk))
+    pdf_cache.invalidate(pdf_cache.tax_certificate_namespace(instance.employee_id, instance.year))
+
+
+
+@receiver(pre_save, sender=Salary)
+def remember_salary_contribution(sender, instance, raw=False, **kwargs):
+    instance._previous_contribution = None
+    instance._previous_ytd_contribution = None
+    if not raw and instance.pk is not None:
+        instance._previous_contribution = summaries.stored_contribution(instance.pk)
+        instance._previous_ytd_contribution = ytd_ledger.stored_contribution(instance.pk)
+
+
+@receiver(post_save, sender=Salary)
+def update_payroll_summary_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Move this salary's amounts out of its old summary rows and into the new ones
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_contribution', None)
+    if previous:
+        summaries.apply_contribution(previous, sign=-1)
+    summaries.apply_contribution(summaries.salary_contribution(instance))
+
+
+@receiver(post_delete, sender=Salary)
+def update_payroll_summary_on_delete(sender, instance, **kwargs):
+    summaries.apply_contribution(summaries.salary_contribution(instance), sign=-1)
+
+
+@receiver(post_save, sender=Salary)
+def update_ytd_ledger_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Move this salary's amounts out of its old year-to-date row and into the new one
+    """
+    if raw:
+        return
+    previous = getattr(instance, '_previous_ytd_contribution', None)
+    if previous:
+        ytd_ledger.remove_contribution(previous)
+    ytd_ledger.add_contribution(ytd_ledger.salary_contribution(instance))
+
+
+@receiver(post_delete, sender=Salary)
+def update_ytd_ledger_on_delete(sender, instance, **kwargs):
+    ytd_ledger.remove_contribution(ytd_ledger.salary_contribution(instance))
+
+
+@receiver(pre_delete, sender=Department)
+def remember_department_periods(sender, instance, **kwargs):
+    instance._summary_periods = list(
+        PayrollPeriodSummary.objects.filter(department=instance).values_list('year', 'month')
+    )
+
+
+@receiver(post_delete, sender=Department)
+def rebuild_department_periods(sender, instance, **kwargs):
+    """
+    The department's summary rows were deleted with it and its salaries
+    now have no department; regroup them under the unassigned row
+    """
+    for year, month in getattr(instance, '_summary_periods', []):
+        summaries.rebuild_period(year, month)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def clear_employee_directory(sender, update_fields=None, **kwargs):
+    """
+    Forget cached employee_id lookups, except on saves that cannot change
+    them (e.g. the last_login update on every login)
+    """
+    if update_fields is None or 'employee_id' in update_fields:
+        directory.clear()
+
+
+@receiver(post_save, sender=CustomUser)
+def update_employee_search(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Rewrite the employee's search document, unless the save cannot have
+    changed any searchable field
+    """
+    if raw or (update_fields is not None and not set(update_fields) & set(employee_search.SEARCH_FIELDS)):
+        return
+    employee_search.index_employee(instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+def remove_employee_search(sender, instance, **kwargs):
+    employee_search.remove_employees([instance.pk], using=instance._state.db or 'default')
+
+
+@receiver(pre_save, sender=LeaveApplication)
+def remember_leave_contribution(sender, instance, raw=False, **kwargs):
+    instance._previous_contribution = None
+    if not raw and instance.pk is not None:
+        instance._previous_contribution = leave_balances.stored_contribution(instance.pk)
+
+
+@receiver(post_save, sender=LeaveApplication)
+def update_leave_balance_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Move this application's days between ledger rows when its status,
+    dates, type or length change
+    """
+    if raw:
+        return
+    leave_balances.apply_change(
+        getattr(instance, '_previous_contribution', None),
+        leave_balances.application_contribution(instance),
+    )
+
+
+@receiver(post_delete, sender=LeaveApplication)
+def update_leave_balance_on_delete(sender, instance, **kwargs):
+    leave_balances.remove_contribution(leave_balances.application_contribution(instance))
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+def invalidate_attendance_metrics(sender, **kwargs):
+    dashboard_metrics.invalidate('employees_present_today')
+
+
+@receiver([post_save, post_delete], sender=LeaveApplication)
+def invalidate_leave_metrics(sender, **kwargs):
+    dashboard_metrics.invalidate('employees_on_leave')
+
+
+@receiver([post_save, post_delete], sender=Salary)
+def invalidate_payroll_metrics(sender, **kwargs):
+    dashboard_metrics.invalidate('latest_payroll')
+
+
+@receiver([post_save, post_delete], sender=Department)
+def invalidate_department_metrics(sender, **kwargs):
+    dashboard_metrics.invalidate('total_departments')
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_employee_metrics_on_save(sender, created=False, **kwargs):
+    if created:
+        dashboard_metrics.invalidate('total_employees')
+
+
+@receiver(post_delete, sender=CustomUser)
+def invalidate_employee_metrics_on_delete(sender, **kwargs):
+    dashboard_metrics.invalidate('total_employees')
+
+
+@receiver([post_save, post_delete], sender=CalendarOverride)
+@receiver([post_save, post_delete], sender=Department)
+def clear_work_calendar(sender, **kwargs):
+    """
+    Recompile the working-day calendars after a holiday, working day or
+    department weekend change
+    """
+    company_calendar.clear()
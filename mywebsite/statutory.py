@@ -0,0 +1,273 @@
+# statutory.py
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+import numpy as np
+
+# Kenyan statutory deductions, one entry per change in the law, oldest
+# first. Amounts are monthly KES and rates are percentages. A table applies
+# from its effective (year, month) until the next one; periods before the
+# first table have no statutory table and fall back to the flat tax rate.
+#
+#   paye_bands       (upper limit of the band or None, rate)
+#   personal_relief  deducted from the tax
+#   nssf             Tier I on pay up to lower_limit, Tier II up to upper_limit
+#   health           NHIF: (lower limit of gross pay, contribution) bands;
+#                    SHIF: rate of gross pay with a minimum
+#   insurance_relief rate of the health contribution, capped, off the tax
+#   housing_levy     Affordable Housing Levy, rate of gross pay
+#   deductible       contributions subtracted from gross pay before PAYE
+RATE_TABLES = [
+    {
+        'version': 'KE-2024-02',
+        'effective_from': (2024, 2),
+        'paye_bands': [(24000, '10'), (32333, '25'), (500000, '30'), (800000, '32.5'), (None, '35')],
+        'personal_relief': 2400,
+        'nssf': {'rate': '6', 'lower_limit': 7000, 'upper_limit': 36000},
+        'health': {'scheme': 'NHIF', 'bands': [
+            (0, 150), (6000, 300), (8000, 400), (12000, 500), (15000, 600), (20000, 750),
+            (25000, 850), (30000, 900), (35000, 950), (40000, 1000), (45000, 1100), (50000, 1200),
+            (60000, 1300), (70000, 1400), (80000, 1500), (90000, 1600), (100000, 1700),
+        ]},
+        'insurance_relief': {'rate': '15', 'cap': 5000},
+        'housing_levy': '1.5',
+        'deductible': ['nssf'],
+    },
+    {
+        # SHIF replaces NHIF
+        'version': 'KE-2024-10',
+        'effective_from': (2024, 10),
+        'paye_bands': [(24000, '10'), (32333, '25'), (500000, '30'), (800000, '32.5'), (None, '35')],
+        'personal_relief': 2400,
+        'nssf': {'rate': '6', 'lower_limit': 7000, 'upper_limit': 36000},
+        'health': {'scheme': 'SHIF', 'rate': '2.75', 'minimum': 300},
+        'insurance_relief': {'rate': '15', 'cap': 5000},
+        'housing_levy': '1.5',
+        'deductible': ['nssf'],
+    },
+    {
+        # Tax Laws (Amendment) Act 2024: SHIF and the housing levy become
+        # allowable deductions instead of attracting relief
+        'version': 'KE-2024-12',
+        'effective_from': (2024, 12),
+        'paye_bands': [(24000, '10'), (32333, '25'), (500000, '30'), (800000, '32.5'), (None, '35')],
+        'personal_relief': 2400,
+        'nssf': {'rate': '6', 'lower_limit': 7000, 'upper_limit': 36000},
+        'health': {'scheme': 'SHIF', 'rate': '2.75', 'minimum': 300},
+        'insurance_relief': None,
+        'housing_levy': '1.5',
+        'deductible': ['nssf', 'shif', 'housing_levy'],
+    },
+    {
+        # NSSF year three limits
+        'version': 'KE-2025-02',
+        'effective_from': (2025, 2),
+        'paye_bands': [(24000, '10'), (32333, '25'), (500000, '30'), (800000, '32.5'), (None, '35')],
+        'personal_relief': 2400,
+        'nssf': {'rate': '6', 'lower_limit': 8000, 'upper_limit': 72000},
+        'health': {'scheme': 'SHIF', 'rate': '2.75', 'minimum': 300},
+        'insurance_relief': None,
+        'housing_levy': '1.5',
+        'deductible': ['nssf', 'shif', 'housing_levy'],
+    },
+]
+
+Deductions = namedtuple('Deductions', 'paye nssf shif housing_levy total')
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def from_cents(cents):
+    # An integer Decimal scaled by -2 already has exactly two places
+    return Decimal(cents).scaleb(-2)
+
+
+def _basis_points(percent):
+    """'32.5' -> 3250"""
+    return int(Decimal(percent) * 100)
+
+
+def _apply(cents, basis_points):
+    # Percentage of an amount in cents, rounded half up
+    return (cents * basis_points + 5000) // 10000
+
+
+class RateTable:
+    """
+    One version of RATE_TABLES compiled to integer cents and basis points,
+    with the tax due at the start of each PAYE band precomputed, so a
+    calculation is a couple of bisects and multiplications. The band and
+    NHIF lists are also kept as int64 arrays for the vectorised batch path.
+    """
+    def __init__(self, spec):
+        self.version = spec['version']
+        self.effective_from = spec['effective_from']
+
+        self.band_starts = [0]
+        self.band_rates = []
+        self.band_base_tax = [0]
+        for upper, rate in spec['paye_bands']:
+            self.band_rates.append(_basis_points(rate))
+            if upper is not None:
+                upper_cents = upper * 100
+                width = upper_cents - self.band_starts[-1]
+                self.band_base_tax.append(self.band_base_tax[-1] + _apply(width, self.band_rates[-1]))
+                self.band_starts.append(upper_cents)
+        self.personal_relief = spec['personal_relief'] * 100
+
+        nssf = spec['nssf']
+        self.nssf_rate = _basis_points(nssf['rate'])
+        self.nssf_lower = nssf['lower_limit'] * 100
+        self.nssf_upper = nssf['upper_limit'] * 100
+
+        health = spec['health']
+        self.health_scheme = health['scheme']
+        if self.health_scheme == 'NHIF':
+            self.nhif_starts = [lower * 100 for lower, _ in health['bands']]
+            self.nhif_amounts = [amount * 100 for _, amount in health['bands']]
+        else:
+            self.shif_rate = _basis_points(health['rate'])
+            self.shif_minimum = health['minimum'] * 100
+
+        relief = spec['insurance_relief']
+        self.insurance_relief_rate = _basis_points(relief['rate']) if relief else 0
+        self.insurance_relief_cap = relief['cap'] * 100 if relief else 0
+        self.housing_levy_rate = _basis_points(spec['housing_levy'])
+
+        deductible = set(spec['deductible'])
+        self.deduct_nssf = 'nssf' in deductible
+        self.deduct_shif = 'shif' in deductible
+        self.deduct_levy = 'housing_levy' in deductible
+
+        self._band_starts = np.array(self.band_starts, dtype=np.int64)
+        self._band_rates = np.array(self.band_rates, dtype=np.int64)
+        self._band_base_tax = np.array(self.band_base_tax, dtype=np.int64)
+        if self.health_scheme == 'NHIF':
+            self._nhif_starts = np.array(self.nhif_starts, dtype=np.int64)
+            self._nhif_amounts = np.array(self.nhif_amounts, dtype=np.int64)
+
+    def health_contribution(self, gross):
+        if self.health_scheme == 'NHIF':
+            return self.nhif_amounts[bisect_right(self.nhif_starts, gross) - 1]
+        return max(_apply(gross, self.shif_rate), self.shif_minimum)
+
+    def paye(self, taxable):
+        if taxable <= 0:
+            return 0
+        band = bisect_left(self.band_starts, taxable) - 1
+        return self.band_base_tax[band] + _apply(taxable - self.band_starts[band], self.band_rates[band])
+
+    def calculate_row(self, gross):
+        """
+        Return (paye, nssf, shif, housing_levy) in cents for one gross
+        monthly pay in cents. This is the path Salary.save() takes.
+        """
+        if gross <= 0:
+            return 0, 0, 0, 0
+        nssf = _apply(min(gross, self.nssf_lower), self.nssf_rate)
+        if gross > self.nssf_lower:
+            nssf += _apply(min(gross, self.nssf_upper) - self.nssf_lower, self.nssf_rate)
+        shif = self.health_contribution(gross)
+        levy = _apply(gross, self.housing_levy_rate)
+
+        taxable = gross
+        if self.deduct_nssf:
+            taxable -= nssf
+        if self.deduct_shif:
+            taxable -= shif
+        if self.deduct_levy:
+            taxable -= levy
+        tax = self.paye(taxable) - self.personal_relief
+        if self.insurance_relief_rate:
+            tax -= min(_apply(shif, self.insurance_relief_rate), self.insurance_relief_cap)
+        return max(tax, 0), nssf, shif, levy
+
+    def calculate_cents(self, grosses):
+        """
+        Return (paye, nssf, shif, housing_levy) in cents for each gross
+        monthly pay in cents, computed column-wise with numpy. This is the
+        batch path used for whole payroll runs and gives the same result
+        as calculate_row() for every value.
+        """
+        gross = np.asarray(grosses, dtype=np.int64)
+        if not gross.size:
+            return []
+        paid = gross > 0
+
+        # Tier II is zero for pay at or below the lower limit
+        nssf = (_apply(np.minimum(gross, self.nssf_lower), self.nssf_rate)
+                + _apply(np.clip(gross, self.nssf_lower, self.nssf_upper) - self.nssf_lower, self.nssf_rate))
+        if self.health_scheme == 'NHIF':
+            band = np.searchsorted(self._nhif_starts, gross, side='right') - 1
+            shif = self._nhif_amounts[np.maximum(band, 0)]
+        else:
+            shif = np.maximum(_apply(gross, self.shif_rate), self.shif_minimum)
+        levy = _apply(gross, self.housing_levy_rate)
+
+        taxable = gross.copy()
+        if self.deduct_nssf:
+            taxable -= nssf
+        if self.deduct_shif:
+            taxable -= shif
+        if self.deduct_levy:
+            taxable -= levy
+        band = np.maximum(np.searchsorted(self._band_starts, taxable, side='left') - 1, 0)
+        tax = np.where(
+            taxable > 0,
+            self._band_base_tax[band] + _apply(taxable - self._band_starts[band], self._band_rates[band]),
+            0
+        ) - self.personal_relief
+        if self.insurance_relief_rate:
+            tax -= np.minimum(_apply(shif, self.insurance_relief_rate), self.insurance_relief_cap)
+
+        columns = [np.maximum(tax, 0), nssf, shif, levy]
+        return list(zip(*(np.where(paid, column, 0).tolist() for column in columns)))
+
+
+@lru_cache(maxsize=None)
+def _compiled_tables():
+    tables = sorted((RateTable(spec) for spec in RATE_TABLES), key=lambda table: table.effective_from)
+    return tables, [table.effective_from for table in tables]
+
+
+def table_for(year, month):
+    """
+    The RateTable in force for a payroll period, or None before the first
+    """
+    tables, starts = _compiled_tables()
+    index = bisect_right(starts, (year, month)) - 1
+    return tables[index] if index >= 0 else None
+
+
+def statutory_deductions(gross, year, month):
+    """
+    Deductions (as Decimals) for one gross monthly pay, or None if no
+    table covers the period
+    """
+    table = table_for(year, month)
+    if table is None:
+        return None
+    return _to_deductions(table.calculate_row(to_cents(gross)))
+
+
+def statutory_deductions_batch(grosses, year, month):
+    """
+    Deductions for many gross pays of the same period, or None if no table
+    covers it
+    """
+    table = table_for(year, month)
+    if table is None:
+        return None
+    return [_to_deductions(row) for row in table.calculate_cents([to_cents(gross) for gross in grosses])]
+
+
+def _to_deductions(row):
+    paye, nssf, shif, levy = row
+    return Deductions(
+        paye=from_cents(paye), nssf=from_cents(nssf), shif=from_cents(shif),
+        housing_levy=from_cents(levy), total=from_cents(paye + nssf + shif + levy),
+    )
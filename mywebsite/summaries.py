@@ -0,0 +1,154 @@
+# summaries.py
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from .models import PayrollPeriodSummary, Salary
+
+AMOUNT_FIELDS = ('total_base', 'total_bonus', 'total_tax', 'total_net')
+
+
+def salary_contribution(salary):
+    """
+    What one Salary row adds to its period and department summaries. The
+    department is the one stored on the salary, not the employee's current
+    one, so the signals and rebuild_period always agree.
+    """
+    return {
+        'year': salary.year,
+        'month': salary.month,
+        'department_id': salary.department_id,
+        'total_base': salary.base_salary,
+        'total_bonus': salary.bonus,
+        'total_tax': salary.deductions,
+        'total_net': salary.net_salary,
+    }
+
+
+def stored_contribution(salary_pk):
+    """
+    The contribution of a Salary row as currently stored in the database,
+    or None if it does not exist yet
+    """
+    return Salary.objects.filter(pk=salary_pk).values(
+        'year', 'month', 'department_id',
+        total_base=F('base_salary'),
+        total_bonus=F('bonus'),
+        total_tax=F('deductions'),
+        total_net=F('net_salary'),
+    ).first()
+
+
+def apply_contribution(contribution, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one salary from the company-wide and
+    department summary rows of its period, creating them as needed.
+    """
+    period = {'year': contribution['year'], 'month': contribution['month']}
+    updates = {'employee_count': F('employee_count') + sign}
+    for field in AMOUNT_FIELDS:
+        updates[field] = F(field) + sign * Decimal(contribution[field])
+
+    with transaction.atomic():
+        total, _ = PayrollPeriodSummary.objects.get_or_create(department=None, is_total=True, **period)
+        department, _ = PayrollPeriodSummary.objects.get_or_create(
+            department_id=contribution['department_id'], is_total=False, **period
+        )
+        PayrollPeriodSummary.objects.filter(pk__in=[total.pk, department.pk]).update(**updates)
+
+
+def rebuild_period(year, month):
+    """
+    Recompute every summary row for one period from the Salary table with a
+    single grouped query
+    """
+    rows = Salary.objects.filter(year=year, month=month).values(
+        'department_id'
+    ).annotate(
+        employee_count=Count('id'),
+        total_base=Sum('base_salary'),
+        total_bonus=Sum('bonus'),
+        total_tax=Sum('deductions'),
+        total_net=Sum('net_salary'),
+    ).order_by()
+
+    summaries = []
+    company = PayrollPeriodSummary(year=year, month=month, department=None, is_total=True)
+    for row in rows:
+        summary = PayrollPeriodSummary(
+            year=year,
+            month=month,
+            department_id=row['department_id'],
+            is_total=False,
+            employee_count=row['employee_count'],
+        )
+        company.employee_count += row['employee_count']
+        for field in AMOUNT_FIELDS:
+            setattr(summary, field, row[field] or Decimal('0.00'))
+            setattr(company, field, getattr(company, field) + (row[field] or Decimal('0.00')))
+        summaries.append(summary)
+    if summaries:
+        summaries.append(company)
+
+    with transaction.atomic():
+        PayrollPeriodSummary.objects.filter(year=year, month=month).delete()
+        PayrollPeriodSummary.objects.bulk_create(summaries)
+    return len(summaries)
+
+
+def rebuild_all():
+    """
+    Rebuild summaries for every period that has salaries and drop the rest
+    """
+    periods = list(Salary.objects.values_list('year', 'month').distinct().order_by('year', 'month'))
+    stale = set(PayrollPeriodSummary.objects.values_list('year', 'month').distinct()) - set(periods)
+    for year, month in stale:
+        PayrollPeriodSummary.objects.filter(year=year, month=month).delete()
+    for year, month in periods:
+        rebuild_period(year, month)
+    return periods
+
+
+def period_report(year, month):
+    """
+    Return (payroll_data, department_data) for the monthly payroll report,
+    shaped like the aggregate()/values().annotate() results the report
+    templates expect
+    """
+    rows = PayrollPeriodSummary.objects.filter(
+        year=year, month=month
+    ).select_related('department').order_by('-total_net')
+
+    payroll_data = {'total_base': None, 'total_bonus': None, 'total_tax': None, 'total_net': None, 'employee_count': 0}
+    department_data = []
+    for row in rows:
+        if row.is_total:
+            payroll_data = {field: getattr(row, field) for field in AMOUNT_FIELDS}
+            payroll_data['employee_count'] = row.employee_count
+        elif row.employee_count:
+            department_data.append({
+                'employee__department__name': row.department.name if row.department else None,
+                'dept_total': row.total_net,
+                'dept_avg': row.average_net,
+                'employee_count': row.employee_count,
+            })
+    return payroll_data, department_data
+
+
+def latest_period():
+    """
+    Company-wide summary of the most recent month that has salaries
+    """
+    return PayrollPeriodSummary.objects.filter(
+        is_total=True, employee_count__gt=0
+    ).order_by('-year', '-month').first()
+
+
+def salary_years():
+    """
+    Years that have salaries, newest first, without scanning Salary
+    """
+    return PayrollPeriodSummary.objects.filter(
+        is_total=True, employee_count__gt=0
+    ).values_list('year', flat=True).distinct().order_by('-year')
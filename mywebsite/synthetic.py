@@ -0,0 +1,251 @@
+# synthetic.py
+import random
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import dashboard_metrics, ytd_ledger
+from .employee_search import index_employees
+from .leave_balances import rebuild_balances
+from .models import (
+    Attendance, CustomUser, Department, EmployeeRole, LeaveApplication, LeaveBalance, LeaveType, PaySlip, Salary
+)
+from .statutory import statutory_deductions_batch
+from .summaries import rebuild_all
+
+# Every synthetic record can be told apart from real data by these, so
+# the whole set can be removed again with clear_synthetic_data()
+USERNAME_PREFIX = 'syn_'
+DEPARTMENT_PREFIX = 'Synthetic '
+LEAVE_REASON = 'synthetic'
+
+BATCH_SIZE = 5000
+
+DEPARTMENT_NAMES = [
+    'Finance', 'Engineering', 'Sales', 'Operations', 'Human Resources',
+    'Marketing', 'Legal', 'Procurement', 'Customer Care', 'Logistics',
+]
+ROLE_LEVELS = [('Associate', 35000), ('Officer', 80000), ('Manager', 180000)]
+BANKS = ['KCB', 'Equity', 'Co-operative Bank', 'NCBA', 'Absa', 'Stanbic']
+LEAVE_TYPES = [('Annual', 21), ('Sick', 14), ('Compassionate', 5)]
+
+
+def month_range(start, end):
+    """
+    (year, month) pairs from start to end inclusive
+    """
+    year, month = start
+    periods = []
+    while (year, month) <= end:
+        periods.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return periods
+
+
+def _flush(model, rows, force=False):
+    if rows and (force or len(rows) >= BATCH_SIZE):
+        with transaction.atomic():
+            model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+        count = len(rows)
+        rows.clear()
+        return count
+    return 0
+
+
+def create_employees(rng, employees, departments):
+    """
+    Departments with three roles each and employees spread across them,
+    with bank and statutory numbers filled in
+    """
+    offset = Department.objects.filter(name__startswith=DEPARTMENT_PREFIX).count()
+    created_departments = Department.objects.bulk_create([
+        Department(
+            name=f"{DEPARTMENT_PREFIX}{DEPARTMENT_NAMES[n % len(DEPARTMENT_NAMES)]} {n + 1}",
+            description='Synthetic department',
+        )
+        for n in range(offset, offset + departments)
+    ])
+    # Re-read so the rows have primary keys on every database
+    created_departments = list(Department.objects.filter(
+        name__in=[department.name for department in created_departments]
+    ))
+    EmployeeRole.objects.bulk_create([
+        EmployeeRole(title=f"{level} ({department.name})", base_salary=Decimal(salary), department=department)
+        for department in created_departments for level, salary in ROLE_LEVELS
+    ])
+    roles = list(EmployeeRole.objects.filter(department__in=created_departments))
+
+    start = CustomUser.objects.filter(username__startswith=USERNAME_PREFIX).count()
+    last_id = CustomUser.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    users = []
+    for n in range(start, start + employees):
+        role = rng.choice(roles)
+        basic = role.base_salary * Decimal(rng.randint(80, 160)) / 100
+        users.append(CustomUser(
+            username=f"{USERNAME_PREFIX}{n}",
+            password='!',
+            first_name=f"Synthetic{n}",
+            last_name=rng.choice(['Otieno', 'Wanjiru', 'Kamau', 'Achieng', 'Mutua', 'Njeri', 'Kiprop']),
+            employee_id=f"SYN{n:07d}",
+            gender=rng.choice('MF'),
+            department=role.department,
+            role=role,
+            basic_salary=basic.quantize(Decimal('1')),
+            bank=rng.choice(BANKS),
+            bank_branch='Nairobi',
+            bank_account_number=f"{rng.randrange(10 ** 12):012d}",
+            kra_pin=f"A{n:09d}Z",
+            nssf_no=f"{n:09d}",
+            nhif_no=f"{n:08d}",
+        ))
+    CustomUser.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    created = list(CustomUser.objects.filter(
+        username__startswith=USERNAME_PREFIX, id__gt=last_id
+    ).order_by('id').values_list('id', 'basic_salary', 'department_id'))
+    # bulk_create skips the signal that indexes employees for search
+    index_employees(pk for pk, _, _ in created)
+    return created
+
+
+def create_salaries(employees, periods):
+    """
+    One Salary per employee per period, deducted through the statutory
+    batch path (or the flat rate before the first rate table)
+    """
+    created = 0
+    rows = []
+    grosses = [basic for _, basic, _ in employees]
+    tax_rate = Decimal('16.00')
+    for year, month in periods:
+        breakdowns = statutory_deductions_batch(grosses, year, month)
+        if breakdowns is None:
+            breakdowns = [Salary.flat_deductions(basic, Decimal('0.00'), tax_rate) for basic in grosses]
+        for (employee_id, basic, department_id), deductions in zip(employees, breakdowns):
+            salary = Salary(
+                employee_id=employee_id, department_id=department_id, base_salary=basic, tax_rate=tax_rate,
+                month=month, year=year
+            )
+            salary.apply_deductions(deductions)
+            rows.append(salary)
+        created += _flush(Salary, rows)
+    return created + _flush(Salary, rows, force=True)
+
+
+def create_attendance(rng, employee_ids, start, end, absence_rate=0.05):
+    """
+    An attendance row for every weekday from start to end: mostly present,
+    some absent and some on leave
+    """
+    created = 0
+    rows = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            opening = timezone.make_aware(datetime.combine(day, time(8)))
+            for employee_id in employee_ids:
+                draw = rng.random()
+                check_in = opening + timedelta(minutes=rng.randint(-30, 45))
+                rows.append(Attendance(
+                    employee_id=employee_id,
+                    date=day,
+                    check_in=check_in,
+                    check_out=check_in + timedelta(hours=9) if draw >= absence_rate else None,
+                    is_present=draw >= absence_rate,
+                    is_leave=draw < absence_rate / 2,
+                ))
+            created += _flush(Attendance, rows)
+        day += timedelta(days=1)
+    return created + _flush(Attendance, rows, force=True)
+
+
+def create_leave_applications(rng, employee_ids, years, per_year=3):
+    """
+    A few applications per employee per year, mostly approved
+    """
+    leave_types = [
+        LeaveType.objects.get_or_create(name=name, defaults={'max_days_per_year': days})[0]
+        for name, days in LEAVE_TYPES
+    ]
+    created = 0
+    rows = []
+    for employee_id in employee_ids:
+        for year in years:
+            for _ in range(per_year):
+                start_date = date(year, 1, 1) + timedelta(days=rng.randrange(350))
+                days = rng.randint(1, 5)
+                rows.append(LeaveApplication(
+                    employee_id=employee_id,
+                    leave_type=rng.choice(leave_types),
+                    start_date=start_date,
+                    end_date=start_date + timedelta(days=days - 1),
+                    days=days,
+                    reason=LEAVE_REASON,
+                    status=rng.choices(['APPROVED', 'PENDING', 'REJECTED'], weights=[8, 1, 1])[0],
+                ))
+        created += _flush(LeaveApplication, rows)
+    return created + _flush(LeaveApplication, rows, force=True)
+
+
+def generate_synthetic_data(employees=500, departments=10, years=2, seed=42, attendance=True, stdout=None):
+    """
+    Generate a synthetic company: departments, roles, employees, and
+    `years` years of salaries, attendance and leave up to today. Rows are
+    written with bulk_create, so the derived tables (payroll summaries,
+    year-to-date ledger, leave balances, dashboard metrics) are rebuilt at
+    the end. Returns the
+    number of rows created per model.
+    """
+    def report(message):
+        if stdout is not None:
+            stdout.write(message)
+
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    first_day = date(today.year - years, today.month, 1)
+    last_month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+
+    employee_rows = create_employees(rng, employees, departments)
+    report(f"  {len(employee_rows)} employees in {departments} departments")
+    employee_ids = [pk for pk, _, _ in employee_rows]
+
+    counts = {'employees': len(employee_rows), 'departments': departments}
+    counts['salaries'] = create_salaries(employee_rows, month_range((first_day.year, first_day.month), last_month))
+    report(f"  {counts['salaries']} salaries")
+    counts['attendance'] = create_attendance(rng, employee_ids, first_day, today) if attendance else 0
+    report(f"  {counts['attendance']} attendance rows")
+    counts['leave_applications'] = create_leave_applications(
+        rng, employee_ids, range(first_day.year, today.year + 1)
+    )
+    report(f"  {counts['leave_applications']} leave applications")
+
+    rebuild_all()
+    ytd_ledger.rebuild_all()
+    rebuild_balances()
+    dashboard_metrics.invalidate(*dashboard_metrics.METRICS)
+    return counts
+
+
+def clear_synthetic_data():
+    """
+    Remove everything generate_synthetic_data() created and rebuild the
+    derived tables. Returns the number of employees removed.
+    """
+    employees = CustomUser.objects.filter(username__startswith=USERNAME_PREFIX)
+    count = employees.count()
+    with transaction.atomic():
+        PaySlip.objects.filter(salary__employee__in=employees).delete()
+        # The bulk of the rows are deleted without per-row signals, just as
+        # they were bulk created; the derived tables are rebuilt below
+        for model in (Attendance, LeaveApplication, LeaveBalance, Salary):
+            rows = model.objects.filter(employee__in=employees)
+            rows._raw_delete(rows.db)
+        employees.delete()
+        EmployeeRole.objects.filter(department__name__startswith=DEPARTMENT_PREFIX).delete()
+        Department.objects.filter(name__startswith=DEPARTMENT_PREFIX).delete()
+    rebuild_all()
+    ytd_ledger.rebuild_all()
+    rebuild_balances()
+    dashboard_metrics.invalidate(*dashboard_metrics.METRICS)
+    return count
@@ -16,4 +16,13 @@ def div(value, arg):
     try:
         return float(value) / float(arg)
     except (ValueError, ZeroDivisionError):
-        return 0
\ No newline at end of file
+        return 0
+
+@register.filter
+def minutes_to_time(value):
+    """Format minutes after midnight as HH:MM"""
+    try:
+        minutes = int(round(float(value)))
+    except (ValueError, TypeError):
+        return ''
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
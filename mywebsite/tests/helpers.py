@@ -0,0 +1,48 @@
+# helpers.py
+"""
+Small factories shared by the test modules
+"""
+import shutil
+import tempfile
+from decimal import Decimal
+from itertools import count
+
+from django.test import override_settings
+
+from mywebsite.models import CustomUser, Department, Salary
+
+_sequence = count(1)
+
+
+def make_department(name=None, **kwargs):
+    return Department.objects.create(name=name or f"Department {next(_sequence)}", **kwargs)
+
+
+def make_employee(department=None, basic_salary=Decimal('50000.00'), **kwargs):
+    number = next(_sequence)
+    kwargs.setdefault('username', f"employee{number}")
+    kwargs.setdefault('employee_id', f"EMP{number:05d}")
+    kwargs.setdefault('gender', 'F')
+    return CustomUser.objects.create(department=department, basic_salary=basic_salary, **kwargs)
+
+
+def make_salary(employee, month=3, year=2025, base_salary=None, **kwargs):
+    return Salary.objects.create(
+        employee=employee, month=month, year=year,
+        base_salary=base_salary if base_salary is not None else employee.basic_salary, **kwargs
+    )
+
+
+class TempMediaMixin:
+    """
+    Point MEDIA_ROOT (and so the PDF cache and job files) at a throwaway
+    directory for the test case
+    """
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, PDF_CACHE_DIR=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.media_root = media_root
@@ -0,0 +1,109 @@
+import math
+from datetime import date, datetime
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from mywebsite.attendance_analytics import ABSENT, LEAVE, NO_RECORD, PRESENT, employee_month, load_month
+from mywebsite.models import Attendance
+from mywebsite.work_calendar import working_days_in_month
+
+from .helpers import make_department, make_employee
+
+
+def local(day, hour, minute=0):
+    return timezone.make_aware(datetime(2025, 3, day, hour, minute))
+
+
+def attend(employee, day, check_in=None, check_out=None, **flags):
+    return Attendance.objects.create(
+        employee=employee, date=date(2025, 3, day), check_in=check_in or local(day, 0),
+        check_out=check_out, **flags
+    )
+
+
+# Three hours ahead of the UTC the datetimes are stored and cast to text in,
+# so a check-in read without the conversion would be off by 180 minutes
+@override_settings(USE_TZ=True, TIME_ZONE='Africa/Nairobi', ATTENDANCE_DAY_START='08:00',
+                   ATTENDANCE_LATE_GRACE_MINUTES=15, ATTENDANCE_STANDARD_HOURS=8)
+class MonthMatrixTests(TestCase):
+    def setUp(self):
+        self.sales = make_department()
+        self.support = make_department()
+        self.alice = make_employee(department=self.sales)
+        self.bob = make_employee(department=self.sales)
+        self.carol = make_employee(department=self.support)
+        self.dan = make_employee()
+        self.former = make_employee(is_active_employee=False)
+        make_employee(is_active_employee=False)
+        self.working_days = working_days_in_month(2025, 3)
+
+        # Monday 3 March: on time with 1.5 hours overtime; Tuesday: late,
+        # never checked out; Wednesday: on leave
+        attend(self.alice, 3, local(3, 8, 5), local(3, 17, 35), is_present=True)
+        attend(self.alice, 4, local(4, 8, 30), is_present=True)
+        attend(self.alice, 5, is_leave=True)
+        # Checked in early enough to be the previous day in UTC
+        attend(self.bob, 3, local(3, 2, 30), local(3, 11, 30), is_present=True)
+        attend(self.dan, 3, local(3, 8, 16), local(3, 12, 16), is_present=True)
+        attend(self.dan, 6, is_present=True, is_leave=True)
+        attend(self.former, 3, is_present=False)
+
+    def test_matrix_cells(self):
+        matrix = load_month(2025, 3)
+        self.assertEqual(matrix.shape, (5, 31))
+        self.assertEqual(list(matrix.employee_ids), sorted([
+            self.alice.pk, self.bob.pk, self.carol.pk, self.dan.pk, self.former.pk
+        ]))
+
+        alice = matrix.index_of(self.alice.pk)
+        self.assertEqual(list(matrix.status[alice, 1:6]), [NO_RECORD, PRESENT, PRESENT, LEAVE, NO_RECORD])
+        self.assertAlmostEqual(float(matrix.hours[alice, 2]), 9.5)
+        self.assertTrue(math.isnan(matrix.hours[alice, 3]))
+        self.assertEqual(float(matrix.check_in[alice, 2]), 8 * 60 + 5)
+        self.assertEqual(float(matrix.check_in[matrix.index_of(self.bob.pk), 2]), 2 * 60 + 30)
+        self.assertEqual(matrix.status[matrix.index_of(self.former.pk), 2], ABSENT)
+        # Leave wins when a row has both flags
+        self.assertEqual(matrix.status[matrix.index_of(self.dan.pk), 5], LEAVE)
+        self.assertIsNone(matrix.index_of(-1))
+
+    def test_employee_figures(self):
+        matrix = load_month(2025, 3)
+        alice = matrix.employee(self.alice.pk)
+        self.assertEqual(alice['working_days'], self.working_days)
+        self.assertEqual((alice['days_present'], alice['leave_days'], alice['late_days']), (2, 1, 1))
+        self.assertEqual(alice['absent_days'], self.working_days - 3)
+        self.assertAlmostEqual(alice['hours_worked'], 9.5)
+        self.assertAlmostEqual(alice['overtime_hours'], 1.5)
+        self.assertAlmostEqual(alice['average_check_in'], (485 + 510) / 2)
+        self.assertAlmostEqual(alice['attendance_rate'], 2 / (self.working_days - 1))
+
+        # 08:16 is past the 15 minute grace period
+        self.assertEqual(matrix.employee(self.dan.pk)['late_days'], 1)
+        self.assertEqual(matrix.employee(self.bob.pk)['late_days'], 0)
+        carol = matrix.employee(self.carol.pk)
+        self.assertEqual((carol['days_present'], carol['attendance_rate']), (0, 0.0))
+        self.assertIsNone(carol['average_check_in'])
+
+        self.assertEqual(employee_month(self.alice, 2025, 3), alice)
+
+    def test_department_rates(self):
+        matrix = load_month(2025, 3)
+        departments = {row['department_id']: row for row in matrix.department_stats()}
+        self.assertEqual(set(departments), {self.sales.pk, self.support.pk, None})
+
+        sales = departments[self.sales.pk]
+        self.assertEqual((sales['employees'], sales['days_present'], sales['late_days']), (2, 3, 1))
+        self.assertAlmostEqual(sales['hours_worked'], 9.5 + 9)
+        self.assertAlmostEqual(sales['attendance_rate'], (2 / (self.working_days - 1) + 1 / self.working_days) / 2)
+        self.assertEqual(departments[self.support.pk]['attendance_rate'], 0.0)
+        # Dan and the former employee, who is only there for the day he was recorded
+        self.assertEqual(departments[None]['employees'], 2)
+
+        lowest = [int(matrix.employee_ids[position]) for position in matrix.lowest_attendance(limit=2)]
+        self.assertEqual(lowest, [self.carol.pk, self.former.pk])
+
+    def test_department_filter(self):
+        matrix = load_month(2025, 3, department=self.sales)
+        self.assertEqual(sorted(matrix.employee_ids), [self.alice.pk, self.bob.pk])
+        self.assertEqual(int(matrix.present.sum()), 3)
@@ -0,0 +1,167 @@
+import csv
+import io
+import zipfile
+from decimal import Decimal
+
+from django.contrib.auth.models import Permission
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from mywebsite.bankfiles import (
+    HASH_MODULUS, RECORD_WIDTH, _number, _text, build_bank_files, generate_payment_batch
+)
+from mywebsite.models import PaymentBatch, Salary
+
+from .helpers import make_employee
+
+
+class FieldTests(SimpleTestCase):
+    def test_text_is_ascii_upper_case_and_padded(self):
+        self.assertEqual(_text('  Njoroge  Kamau ', 16), 'NJOROGE KAMAU   ')
+        self.assertEqual(_text('Chébet', 8), 'CHEBET  ')
+
+    def test_text_and_numbers_are_never_cut(self):
+        with self.assertRaises(ValueError):
+            _text('x' * 21, 20)
+        with self.assertRaises(ValueError):
+            _number(1234567, 6)
+        self.assertEqual(_number(42, 6), '000042')
+
+
+class BankFileTests(TestCase):
+    def setUp(self):
+        self.alice = make_employee(
+            employee_id='EMP1', first_name='Alice', last_name='Wanjiru', bank='KCB', bank_branch='Moi Avenue',
+            bank_account_number='1100-2233-44',
+        )
+        self.bob = make_employee(
+            employee_id='EMP2', first_name='Bob', last_name='Otieno', bank='kcb ', bank_branch='Kisumu',
+            bank_account_name='Robert Otieno', bank_account_number='5566778899',
+        )
+        self.carol = make_employee(
+            employee_id='EMP3', first_name='Carol', last_name='Mutua', bank='Equity', bank_branch='Thika',
+            bank_account_number='0123456789',
+        )
+        for employee, base_salary in ((self.alice, '52000.50'), (self.bob, '47000.00'), (self.carol, '39000.25')):
+            Salary.objects.create(
+                employee=employee, base_salary=Decimal(base_salary), month=3, year=2025,
+                tax_rate=Decimal('10.00'), deduction_method='FLAT',
+            )
+
+    def files_by_bank(self, file_format='fixed'):
+        files, skipped = build_bank_files(3, 2025, file_format, reference='PB0000000001')
+        return {bank_file.bank: bank_file for bank_file in files}, skipped
+
+    def test_fixed_width_record_layout(self):
+        files, skipped = self.files_by_bank()
+        self.assertEqual(skipped, [])
+        self.assertEqual(sorted(files), ['EQUITY', 'KCB'])
+
+        lines = files['KCB'].content.decode('ascii').split('\r\n')
+        self.assertEqual(lines[-1], '')
+        header, first, second, trailer = lines[:-1]
+        self.assertTrue(all(len(line) == RECORD_WIDTH for line in (header, first, second, trailer)))
+
+        self.assertEqual(header[0], 'H')
+        self.assertEqual(header[1:36].rstrip(), 'KCB')
+        self.assertEqual(header[36:42], '202503')
+        self.assertEqual(header[50:62], 'PB0000000001')
+
+        self.assertEqual(first[0:7], 'D000001')
+        self.assertEqual(first[7:27].rstrip(), 'MOI AVENUE')
+        self.assertEqual(first[27:47].rstrip(), '1100-2233-44')
+        self.assertEqual(first[47:82].rstrip(), 'ALICE WANJIRU')
+        self.assertEqual(first[82:97], '000000004680045')
+        self.assertEqual(first[97:117].rstrip(), 'EMP1')
+        self.assertEqual(second[0:7], 'D000002')
+        self.assertEqual(second[47:82].rstrip(), 'ROBERT OTIENO')
+        self.assertEqual(second[82:97], '000000004230000')
+
+        self.assertEqual(trailer[0:7], 'T000002')
+        self.assertEqual(int(trailer[7:25]), 4230000 + 4680045)
+        self.assertEqual(int(trailer[25:43]), 5566778899 + 1100223344)
+        self.assertEqual(files['KCB'].total, 4230000 + 4680045)
+
+    def test_hash_total_matches_the_written_accounts(self):
+        files, _ = self.files_by_bank()
+        for bank_file in files.values():
+            details = [line for line in bank_file.content.decode('ascii').split('\r\n') if line.startswith('D')]
+            written = sum(int(''.join(filter(str.isdigit, line[27:47]))) for line in details) % HASH_MODULUS
+            self.assertEqual(bank_file.hash_total, written)
+
+    def test_csv_format_has_the_same_totals(self):
+        fixed, _ = self.files_by_bank()
+        files, _ = self.files_by_bank('csv')
+        rows = list(csv.reader(io.StringIO(files['KCB'].content.decode('ascii'))))
+        self.assertEqual(rows[0], ['branch', 'account_number', 'account_name', 'amount', 'reference'])
+        self.assertEqual(rows[1], ['MOI AVENUE', '1100-2233-44', 'ALICE WANJIRU', '46800.45', 'EMP1'])
+        self.assertEqual(rows[-1], ['TOTAL', '2', '', '89100.45', str(fixed['KCB'].hash_total)])
+        self.assertEqual(files['KCB'].hash_total, fixed['KCB'].hash_total)
+
+    def test_details_too_wide_for_the_fixed_format_are_skipped(self):
+        self.alice.bank_account_number = '1' * 35
+        self.alice.save()
+        self.bob.bank_branch = 'Kenyatta Avenue Branch Office'
+        self.bob.save()
+
+        files, skipped = self.files_by_bank()
+        self.assertEqual(sorted(skipped), [
+            ('EMP1', 'account number longer than 20 characters'),
+            ('EMP2', 'branch longer than 20 characters'),
+        ])
+        self.assertEqual(sorted(files), ['EQUITY'])
+
+        # The CSV format has no widths to exceed
+        files, skipped = self.files_by_bank('csv')
+        self.assertEqual(skipped, [])
+        self.assertEqual(files['KCB'].hash_total, (int('1' * 35) + 5566778899) % HASH_MODULUS)
+
+    def test_missing_bank_details_are_skipped(self):
+        self.carol.bank_account_number = 'n/a'
+        self.carol.save()
+        _, skipped = self.files_by_bank()
+        self.assertEqual(skipped, [('EMP3', 'missing account number')])
+
+    def test_payment_batch_records_control_totals(self):
+        self.carol.bank = ''
+        self.carol.save()
+        batch, data = generate_payment_batch(3, 2025)
+
+        self.assertEqual((batch.bank_count, batch.record_count, batch.skipped_count), (1, 2, 1))
+        self.assertEqual(batch.total_amount, Decimal('89100.45'))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertEqual(sorted(archive.namelist()), ['exceptions.csv', 'kcb_202503.txt', 'summary.csv'])
+            self.assertIn('EMP3,missing bank', archive.read('exceptions.csv').decode())
+
+
+class BankPaymentFilesViewTests(TestCase):
+    def setUp(self):
+        employee = make_employee(bank='KCB', bank_branch='Moi Avenue', bank_account_number='1100223344')
+        Salary.objects.create(employee=employee, base_salary=Decimal('50000.00'), month=3, year=2025)
+        clerk = make_employee()
+        clerk.user_permissions.add(Permission.objects.get(codename='add_paymentbatch'))
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(clerk)
+        self.url = reverse('bank_payment_files')
+
+    def test_get_does_not_create_a_batch(self):
+        self.assertEqual(self.client.get(self.url, {'month': 3, 'year': 2025}).status_code, 405)
+        self.assertFalse(PaymentBatch.objects.exists())
+
+    def test_post_needs_the_csrf_token(self):
+        self.assertEqual(self.client.post(self.url, {'month': 3, 'year': 2025}).status_code, 403)
+        self.assertFalse(PaymentBatch.objects.exists())
+
+    def test_post_creates_one_batch(self):
+        token = 'k' * 32
+        self.client.cookies['csrftoken'] = token
+        response = self.client.post(self.url, {'month': 3, 'year': 2025, 'csrfmiddlewaretoken': token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="bank_payments_2025_03.zip"')
+        batch = PaymentBatch.objects.get()
+        self.assertEqual(response['X-Payment-Batch'], str(batch.pk))
+        self.assertEqual((batch.month, batch.year, batch.record_count), (3, 2025, 1))
+
+        response = self.client.post(self.url, {'month': 13, 'year': 2025, 'csrfmiddlewaretoken': token})
+        self.assertEqual(response.status_code, 400)
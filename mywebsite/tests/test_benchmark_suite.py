@@ -0,0 +1,32 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from mywebsite.statutory import table_for
+
+from .helpers import make_department, make_employee, make_salary
+
+
+class BenchmarkSuiteTests(TestCase):
+    def setUp(self):
+        department = make_department()
+        for _ in range(3):
+            make_salary(make_employee(department=department), month=3, year=2025)
+
+    def test_payroll_section_runs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'results.json')
+            call_command('benchmark_suite', '--only', 'payroll', '--repeat', '2', '--output', output,
+                         stdout=io.StringIO())
+            with open(output) as fh:
+                results = json.load(fh)
+
+        self.assertEqual(results['period'], '2025-03')
+        self.assertEqual([case['name'] for case in results['payroll']], [
+            'build_salaries (statutory)', 'build_salaries (flat)', f"statutory engine ({table_for(2025, 3).version})",
+        ])
+        self.assertTrue(all(case['rows'] == 3 for case in results['payroll']))
@@ -0,0 +1,80 @@
+import io
+from datetime import date, datetime, time
+
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from mywebsite.attendance import employees_in_scope, mark_attendance
+from mywebsite.models import Attendance
+
+from .helpers import make_department, make_employee
+
+# Friday 28 February to Tuesday 4 March 2025: two weekend days in the middle
+START, END = date(2025, 2, 28), date(2025, 3, 4)
+
+
+class MarkAttendanceTests(TestCase):
+    def setUp(self):
+        self.sales = make_department()
+        self.staff = [make_employee(department=self.sales) for _ in range(2)]
+        self.other = make_employee(department=make_department())
+        make_employee(department=self.sales, is_active_employee=False)
+
+    def flags(self, employee, day):
+        return Attendance.objects.filter(employee=employee, date=day).values_list('is_present', 'is_leave').get()
+
+    def test_marks_every_day_for_the_department(self):
+        created, updated = mark_attendance(employees_in_scope(self.sales), START, END)
+        self.assertEqual((created, updated), (10, 0))
+        self.assertEqual(Attendance.objects.filter(employee__in=self.staff, is_leave=True).count(), 10)
+        self.assertFalse(Attendance.objects.filter(employee=self.other).exists())
+
+    def test_existing_rows_only_have_their_flags_changed(self):
+        check_in = timezone.make_aware(datetime(2025, 3, 3, 8, 5))
+        Attendance.objects.create(employee=self.staff[0], date=date(2025, 3, 3), check_in=check_in, is_present=True)
+
+        created, updated = mark_attendance(employees_in_scope(self.sales), START, END, status='LEAVE')
+        self.assertEqual((created, updated), (9, 1))
+        row = Attendance.objects.get(employee=self.staff[0], date=date(2025, 3, 3))
+        self.assertEqual((row.check_in, row.is_present, row.is_leave), (check_in, False, True))
+
+        mark_attendance(employees_in_scope(self.sales), START, START, status='PRESENT')
+        self.assertEqual(self.flags(self.staff[1], START), (True, False))
+
+    def test_working_days_only_skips_weekends(self):
+        Attendance.objects.create(
+            employee=self.staff[0], date=date(2025, 3, 1),
+            check_in=timezone.make_aware(datetime.combine(date(2025, 3, 1), time.min))
+        )
+        created, updated = mark_attendance(employees_in_scope(), START, END, working_days_only=True)
+        # Three working days for the three active employees; the Saturday row is left alone
+        self.assertEqual((created, updated), (9, 0))
+        self.assertEqual(self.flags(self.staff[0], date(2025, 3, 1)), (False, False))
+        self.assertFalse(Attendance.objects.filter(date=date(2025, 3, 2)).exists())
+
+    def test_command_marks_a_department(self):
+        out = io.StringIO()
+        call_command('mark_attendance', '2025-03-03', '--department', self.sales.name, '--status', 'ABSENT', stdout=out)
+        self.assertIn('2 created, 0 updated', out.getvalue())
+        self.assertEqual(Attendance.objects.filter(date=date(2025, 3, 3), is_present=False, is_leave=False).count(), 2)
+
+    def test_view_marks_the_whole_company(self):
+        clerk = make_employee()
+        clerk.user_permissions.add(Permission.objects.get(codename='add_attendance'))
+        self.client.force_login(clerk)
+
+        response = self.client.post(reverse('bulk_mark_attendance'), {
+            'department': '', 'start_date': '2025-03-03', 'end_date': '2025-03-04', 'status': 'LEAVE',
+        })
+        self.assertRedirects(response, reverse('attendance_list'), fetch_redirect_response=False)
+        # Four active employees including the clerk, two days each
+        self.assertEqual(Attendance.objects.filter(is_leave=True).count(), 8)
+
+        response = self.client.post(reverse('bulk_mark_attendance'), {
+            'start_date': '2025-03-04', 'end_date': '2025-03-03', 'status': 'LEAVE',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
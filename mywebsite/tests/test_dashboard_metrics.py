@@ -0,0 +1,67 @@
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from mywebsite import dashboard_metrics
+from mywebsite.models import Department
+
+from .helpers import make_department
+
+
+@override_settings(DASHBOARD_STATS_SAMPLE_RATE=1)
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        dashboard_metrics.get_cache().clear()
+        self.addCleanup(dashboard_metrics.get_cache().clear)
+
+    def test_metrics_are_served_from_the_cache_until_invalidated(self):
+        make_department()
+        self.assertEqual(dashboard_metrics.get_metrics(['total_departments'])['total_departments'], 1)
+
+        # A write that bypasses the signals is not seen until invalidation
+        Department.objects.bulk_create([Department(name='Bulk')])
+        self.assertEqual(dashboard_metrics.get_metrics(['total_departments'])['total_departments'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            dashboard_metrics.invalidate('total_departments')
+        self.assertEqual(dashboard_metrics.get_metrics(['total_departments'])['total_departments'], 2)
+
+        stats = dashboard_metrics.cache_stats()['total_departments']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_stats_command_refuses_a_process_local_cache(self):
+        self.assertFalse(dashboard_metrics.cache_is_shared())
+        with self.assertRaisesMessage(CommandError, "local to each process"):
+            call_command('dashboard_cache_stats', stdout=StringIO())
+
+    def test_stats_command_reads_a_shared_cache(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory},
+        }):
+            try:
+                self.assertTrue(dashboard_metrics.cache_is_shared())
+                dashboard_metrics.get_metrics(['total_employees'])
+                dashboard_metrics.get_metrics(['total_employees'])
+                out = StringIO()
+                call_command('dashboard_cache_stats', stdout=out)
+            finally:
+                caches['default'].clear()
+                caches['default'].close()
+        line = next(line for line in out.getvalue().splitlines() if line.startswith('total_employees'))
+        self.assertEqual(line.split()[2:], ['1', '1', '50.0%'])
+
+    @override_settings(DASHBOARD_STATS_SAMPLE_RATE=10)
+    def test_sampled_loads_are_weighted_by_the_rate(self):
+        with mock.patch.object(dashboard_metrics.random, 'randrange', side_effect=[3, 0, 7]):
+            for _ in range(3):
+                dashboard_metrics.get_metrics(['total_employees'])
+        stats = dashboard_metrics.cache_stats()['total_employees']
+        self.assertEqual((stats['hits'], stats['misses']), (10, 0))
+
+    @override_settings(DASHBOARD_STATS_SAMPLE_RATE=0)
+    def test_counting_can_be_turned_off(self):
+        dashboard_metrics.get_metrics(['total_employees'])
+        self.assertEqual(dashboard_metrics.cache_stats()['total_employees']['misses'], 0)
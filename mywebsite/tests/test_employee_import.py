@@ -0,0 +1,152 @@
+import io
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from mywebsite import jobs
+from mywebsite.employee_import import import_employees, set_default_passwords, write_error_report
+from mywebsite.exports import stream_xlsx
+from mywebsite.models import CustomUser, EmployeeRole, Job
+
+from .helpers import TempMediaMixin, make_department, make_employee
+
+HEADER = 'username,employee_id,gender,department,role,date_of_birth,basic_salary\n'
+
+
+def csv_file(*lines):
+    return io.BytesIO((HEADER + ''.join(line + '\n' for line in lines)).encode())
+
+
+def xlsx_file(header, rows):
+    return io.BytesIO(b''.join(stream_xlsx('Employees', header, rows)))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EmployeeImportTests(TestCase):
+    def setUp(self):
+        self.sales = make_department('Sales')
+        self.support = make_department('Support')
+        self.sales_rep = EmployeeRole.objects.create(title='Representative', base_salary=1, department=self.sales)
+        self.support_rep = EmployeeRole.objects.create(title='Representative', base_salary=1, department=self.support)
+        self.manager = EmployeeRole.objects.create(title='Manager', base_salary=1, department=self.sales)
+
+    def test_valid_rows_are_created(self):
+        result = import_employees(csv_file(
+            'amina,E100,Female,sales,representative,1990-05-01,65000',
+            'brian,E101,M,,manager,,',
+        ))
+        self.assertEqual((result.rows, result.created, result.failed), (2, 2, 0))
+        amina = CustomUser.objects.get(username='amina')
+        self.assertEqual((amina.gender, amina.department, amina.role), ('F', self.sales, self.sales_rep))
+        self.assertEqual(amina.date_of_birth, date(1990, 5, 1))
+        self.assertFalse(amina.has_usable_password())
+        self.assertEqual(CustomUser.objects.get(username='brian').role, self.manager)
+
+    def test_bad_rows_are_reported_with_their_line(self):
+        result = import_employees(csv_file(
+            'amina,E100,F,,,,',
+            ',E101,F,,,,',
+            'carol,E102,X,Finance,,31/12/1990,lots',
+            'dan,E103,M,,,,',
+        ))
+        self.assertEqual((result.created, result.failed), (2, 2))
+        self.assertEqual([(line, username) for line, username, _, _ in result.errors], [(3, ''), (4, 'carol')])
+        message = result.errors[1][3]
+        for problem in ("gender:", "department: unknown department 'Finance'", "date_of_birth:", "basic_salary:"):
+            self.assertIn(problem, message)
+
+        report = io.StringIO()
+        write_error_report(result, report)
+        self.assertEqual(report.getvalue().splitlines()[0], 'line,username,employee_id,errors')
+        self.assertTrue(report.getvalue().splitlines()[2].startswith('4,carol,E102,'))
+
+    def test_duplicates_in_the_file_and_the_database(self):
+        make_employee(username='taken', employee_id='E900')
+        result = import_employees(csv_file(
+            'amina,E100,F,,,,',
+            'amina,E101,F,,,,',
+            'bakari,E100,M,,,,',
+            'taken,E200,F,,,,',
+            'cheru,E900,F,,,,',
+        ), batch_size=2)
+        self.assertEqual(result.created, 1)
+        errors = {line: message for line, _, _, message in result.errors}
+        self.assertEqual(sorted(errors), [3, 4, 5, 6])
+        self.assertIn("username: 'amina' appears more than once", errors[3])
+        self.assertIn("employee_id: 'E100' appears more than once", errors[4])
+        self.assertIn("username: 'taken' already exists", errors[5])
+        self.assertIn("employee_id: 'E900' already exists", errors[6])
+
+    def test_unknown_and_ambiguous_roles(self):
+        result = import_employees(csv_file(
+            'amina,E100,F,Support,Representative,,',
+            'bakari,E101,M,,Representative,,',
+            'cheru,E102,F,,Janitor,,',
+        ))
+        self.assertEqual(CustomUser.objects.get(username='amina').role, self.support_rep)
+        self.assertEqual([error[3] for error in result.errors], [
+            "role: unknown or ambiguous role 'Representative'",
+            "role: unknown or ambiguous role 'Janitor'",
+        ])
+
+    def test_bad_header_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, "Missing required columns: gender"):
+            import_employees(io.BytesIO(b'username,employee_id\n'))
+        with self.assertRaisesMessage(ValueError, "Unknown columns: salary"):
+            import_employees(io.BytesIO(b'username,employee_id,gender,salary\n'))
+
+    def test_xlsx_with_date_cells(self):
+        # 33000 days after 1899-12-30; dates may also be typed as text
+        workbook = xlsx_file(
+            ['username', 'employee_id', 'gender', 'date_of_birth', 'joined_date'],
+            [('amina', 'E100', 'Female', 33000, '2024-01-15'), ('', '', '', '', ''), ('bakari', 'E101', 'Q', '', '')],
+        )
+        result = import_employees(workbook, 'xlsx')
+        self.assertEqual((result.rows, result.created), (2, 1))
+        amina = CustomUser.objects.get(username='amina')
+        self.assertEqual((amina.date_of_birth, amina.joined_date), (date(1990, 5, 7), date(2024, 1, 15)))
+        # Spreadsheet line numbers, with the blank row skipped
+        self.assertEqual(result.errors[0][:2], (4, 'bakari'))
+
+    def test_default_passwords_skip_users_with_their_own(self):
+        result = import_employees(csv_file('amina,E100,F,,,,', 'bakari,E101,M,,,,'))
+        CustomUser.objects.filter(username='bakari').update(password=make_password('chosen-by-bakari'))
+
+        self.assertEqual(set_default_passwords(result.created_ids, workers=1), 1)
+        self.assertTrue(CustomUser.objects.get(username='amina').check_password('12345678'))
+        self.assertTrue(CustomUser.objects.get(username='bakari').check_password('chosen-by-bakari'))
+        self.assertEqual(set_default_passwords(result.created_ids, workers=1), 0)
+
+
+@override_settings(JOB_QUEUE_ASYNC=True, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                   EMPLOYEE_IMPORT_HASH_WORKERS=1)
+class EmployeeImportViewTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(CustomUser.objects.create_superuser('admin', password=None, gender='F'))
+
+    def upload(self, name, data):
+        return self.client.post(reverse('import_employees'), {'file': SimpleUploadedFile(name, data)})
+
+    def test_upload_runs_the_import_job(self):
+        response = self.upload('staff.csv', (HEADER + 'amina,E100,F,,,,\nbakari,E100,M,,,,\n').encode())
+        job = Job.objects.get()
+        self.assertRedirects(response, reverse('job_detail', args=[job.pk]), fetch_redirect_response=False)
+        self.assertFalse(CustomUser.objects.filter(username='amina').exists())
+
+        self.assertEqual(jobs.work('worker', burst=True), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'SUCCEEDED')
+        self.assertTrue(CustomUser.objects.get(username='amina').check_password('12345678'))
+        self.assertEqual((job.result['created'], job.result['failed'], job.result['passwords_set']), (1, 1, 1))
+        self.assertEqual(job.result_name, 'employee_import_errors.csv')
+
+    def test_wrong_file_is_rejected_before_queueing(self):
+        for name, data in (('staff.txt', b''), ('staff.csv', b'name\n'), ('staff.xlsx', b'not a zip')):
+            response = self.upload(name, data)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, f"Cannot import {name}")
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,135 @@
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from mywebsite import employee_search
+from mywebsite.employee_search import (
+    INDEX_TABLE, autocomplete, filter_employees, index_employees, query_words, ranked_ids, rebuild_index,
+    search_document,
+)
+from mywebsite.models import CustomUser
+
+from .helpers import make_department, make_employee
+
+
+def indexed_ids():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT rowid FROM {INDEX_TABLE} ORDER BY rowid")
+        return [pk for pk, in cursor.fetchall()]
+
+
+class SearchDocumentTests(SimpleTestCase):
+    def test_phone_numbers_are_indexed_in_every_spelling(self):
+        document = search_document({
+            'first_name': 'Jane', 'last_name': 'Wanjiru', 'employee_id': 'E7',
+            'phone_number': '+254 712 345-678', 'mobile_phone': '0733 000111', 'middle_name': '',
+        })
+        self.assertEqual(
+            document, 'Jane Wanjiru E7 +254 712 345-678 254712345678 0712345678 0733 000111 0733000111'
+        )
+
+    def test_query_words(self):
+        self.assertEqual(query_words(' Wanj, "0712"* o\'neil '), ['wanj', '0712', 'o', 'neil'])
+        self.assertEqual(len(query_words('a ' * 20)), employee_search.MAX_QUERY_WORDS)
+        self.assertEqual(query_words(None), [])
+
+
+class EmployeeSearchTests(TestCase):
+    def setUp(self):
+        self.assertEqual(employee_search.search_backend(), 'fts5')
+        self.jane = make_employee(
+            first_name='Jane', last_name='Wanjiru', phone_number='+254712345678', national_id='31234567'
+        )
+        self.kamaul = make_employee(first_name='Peter', last_name='Kamaulu')
+        self.kamau = make_employee(first_name='John', last_name='Kamau', kra_pin='A001234567Z')
+
+    def search(self, text):
+        return list(filter_employees(CustomUser.objects.order_by('id'), text).values_list('id', flat=True))
+
+    def test_every_word_is_matched_as_a_prefix(self):
+        self.assertEqual(self.search('wanj 0712'), [self.jane.pk])
+        self.assertEqual(self.search('WANJIRU 2547123'), [self.jane.pk])
+        self.assertEqual(self.search('kama'), [self.kamaul.pk, self.kamau.pk])
+        self.assertEqual(self.search('a0012'), [self.kamau.pk])
+        self.assertEqual(self.search('jane kamau'), [])
+        # Quotes and operators are not words, so they cannot break the MATCH syntax
+        self.assertEqual(self.search('"jane*" ^ (-'), [self.jane.pk])
+        self.assertEqual(self.search('jane OR kamau'), [])
+        self.assertEqual(self.search('  '), [self.jane.pk, self.kamaul.pk, self.kamau.pk])
+
+    def test_whole_words_rank_first(self):
+        self.assertEqual(ranked_ids('kamau'), [self.kamau.pk, self.kamaul.pk])
+        self.assertEqual(ranked_ids('kamau', limit=1), [self.kamau.pk])
+
+    def test_signals_keep_the_index_in_step(self):
+        self.jane.last_name = 'Otieno'
+        self.jane.save()
+        self.assertEqual(self.search('wanjiru'), [])
+        self.assertEqual(self.search('otie'), [self.jane.pk])
+
+        with mock.patch.object(employee_search, 'index_employee') as index_employee:
+            self.jane.save(update_fields=['basic_salary'])
+        index_employee.assert_not_called()
+
+        self.kamaul.delete()
+        self.assertEqual(indexed_ids(), [self.jane.pk, self.kamau.pk])
+
+    def test_bulk_inserts_are_indexed_explicitly(self):
+        bulk = CustomUser.objects.bulk_create([
+            CustomUser(username='bulk1', employee_id='B1', gender='F', first_name='Achieng'),
+            CustomUser(username='bulk2', employee_id='B2', gender='M', first_name='Mwangi'),
+        ])
+        self.assertEqual(self.search('achieng'), [])
+        self.assertEqual(index_employees([employee.pk for employee in bulk]), 2)
+        self.assertEqual(self.search('achieng'), [bulk[0].pk])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {INDEX_TABLE}")
+        self.assertEqual(rebuild_index(), 5)
+        self.assertEqual(self.search('mwan'), [bulk[1].pk])
+        self.assertEqual(len(indexed_ids()), 5)
+
+    def test_fallback_without_an_index(self):
+        with mock.patch.dict(employee_search._backends, {'default': 'fallback'}):
+            # Substrings of the stored values only: no local phone spelling
+            self.assertEqual(self.search('anjir 2547'), [self.jane.pk])
+            self.assertEqual(self.search('wanj 0712'), [])
+            self.assertEqual(ranked_ids('kamau'), [self.kamaul.pk, self.kamau.pk])
+            self.assertEqual(index_employees([self.jane.pk]), 0)
+
+    def test_autocomplete_rows(self):
+        self.kamau.department = make_department('Finance')
+        self.kamau.save()
+        rows = autocomplete('kamau')
+        self.assertEqual([row['id'] for row in rows], [self.kamau.pk, self.kamaul.pk])
+        self.assertEqual(rows[0]['department__name'], 'Finance')
+        self.assertEqual(autocomplete('nobody'), [])
+
+
+class EmployeeSearchViewTests(TestCase):
+    def setUp(self):
+        self.jane = make_employee(first_name='Jane', last_name='Wanjiru', employee_id='E100')
+        self.clerk = make_employee()
+        self.client.force_login(self.clerk)
+        self.url = reverse('employee_search')
+
+    def test_needs_permission(self):
+        self.assertEqual(self.client.get(self.url, {'q': 'jane'}).status_code, 403)
+
+    def test_results(self):
+        self.clerk.user_permissions.add(Permission.objects.get(codename='view_customuser'))
+        response = self.client.get(self.url, {'q': 'wanj'})
+        self.assertEqual(response.json(), {'results': [{
+            'employee_id': 'E100', 'name': 'Jane Wanjiru', 'department': None, 'active': True,
+            'url': reverse('employee_profile', args=['E100']),
+        }]})
+
+        for _ in range(25):
+            make_employee(first_name='Wanjiku')
+        self.assertEqual(len(self.client.get(self.url, {'q': 'wanj', 'limit': 50}).json()['results']), 20)
+        self.assertEqual(len(self.client.get(self.url, {'q': 'wanj', 'limit': 0}).json()['results']), 1)
+        self.assertEqual(self.client.get(self.url, {'q': 'wanj', 'limit': 'all'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url).json(), {'results': []})
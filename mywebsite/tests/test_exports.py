@@ -0,0 +1,119 @@
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from mywebsite import exports
+from mywebsite.models import Attendance, LeaveApplication, LeaveType, Salary
+
+from .helpers import make_department, make_employee, make_salary
+
+
+def read_csv(chunks):
+    text = ''.join(chunks)
+    assert text.startswith('﻿')
+    return list(csv.reader(io.StringIO(text[1:])))
+
+
+def read_xlsx(chunks):
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+    sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+    return [
+        re.findall(r'<t xml:space="preserve">(.*?)</t>|<v>(.*?)</v>', row)
+        for row in re.findall(r'<row>(.*?)</row>', sheet)
+    ]
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.sales = make_department('Sales')
+        self.employee = make_employee(department=self.sales, username='=HYPERLINK("http://x")', employee_id='E1')
+        self.salary = make_salary(self.employee, month=3, year=2025)
+
+    def export(self, name, file_format='csv'):
+        model = exports.EXPORTS[name][0]
+        return exports.stream_export(name, model.objects.all(), file_format)
+
+    def test_salaries_keep_the_department_they_were_paid_under(self):
+        self.employee.department = make_department('Marketing')
+        self.employee.save()
+
+        header, row = read_csv(self.export('salaries'))
+        self.assertEqual(row[header.index('Department')], 'Sales')
+        self.assertEqual(row[header.index('Net Salary')], str(Salary.objects.get().net_salary))
+
+    def test_csv_text_cells_cannot_start_a_formula(self):
+        leave_type = LeaveType.objects.create(name='Annual', max_days_per_year=21)
+        LeaveApplication.objects.create(
+            employee=self.employee, leave_type=leave_type, start_date=date(2025, 3, 3),
+            end_date=date(2025, 3, 4), days=2, reason='@SUM(A1:A9)'
+        )
+        header, row = read_csv(self.export('leave_applications'))
+        self.assertEqual(row[header.index('Username')], '\'=HYPERLINK("http://x")')
+        self.assertEqual(row[header.index('Reason')], "'@SUM(A1:A9)")
+        self.assertEqual(row[header.index('Days')], '2')
+
+        rows = read_csv(exports.stream_csv(['a', 'b', 'c', 'd'], [('+1', '-x', Decimal('-5.00'), 'plain')]))
+        self.assertEqual(rows[1], ["'+1", "'-x", '-5.00', 'plain'])
+
+    def test_xlsx_rows(self):
+        Attendance.objects.create(
+            employee=self.employee, date=date(2025, 3, 3),
+            check_in=timezone.make_aware(datetime.combine(date(2025, 3, 3), time(8, 30))), is_present=True
+        )
+        header, row = read_xlsx(self.export('attendance', 'xlsx'))
+        self.assertEqual([text for text, _ in header][:3], ['Employee ID', 'Username', 'Department'])
+        self.assertEqual([text or number for text, number in row], [
+            'E1', '=HYPERLINK("http://x")', 'Sales', '2025-03-03', '2025-03-03 08:30:00', '', 'Yes', 'No',
+        ])
+
+    def test_rows_are_streamed_in_chunks(self):
+        for month in range(4, 7):
+            make_salary(self.employee, month=month, year=2025)
+        with mock.patch.object(exports, 'CHUNK_SIZE', 2):
+            chunks = list(self.export('salaries'))
+        # The header straight away, then two rows per chunk
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [1, 2, 2, 0])
+        self.assertEqual(len(read_csv(chunks)), 5)
+
+
+class ExportViewTests(TestCase):
+    def setUp(self):
+        clerk = make_employee()
+        clerk.user_permissions.add(*Permission.objects.filter(codename__in=['view_salary', 'view_attendance']))
+        self.client.force_login(clerk)
+        make_salary(clerk, month=3, year=2025)
+        make_salary(clerk, month=4, year=2025)
+
+    def test_filtered_salary_export(self):
+        response = self.client.get(reverse('export_salaries'), {'year': '2025', 'month': '03'})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="salaries_2025_3.csv"')
+        self.assertEqual(len(read_csv(chunk.decode() for chunk in response.streaming_content)), 2)
+
+        response = self.client.get(reverse('export_salaries'), {'format': 'xlsx'})
+        self.assertEqual(response['Content-Type'], exports.XLSX_CONTENT_TYPE)
+        self.assertEqual(len(read_xlsx(response.streaming_content)), 3)
+
+    def test_filename_uses_the_parsed_dates(self):
+        response = self.client.get(reverse('export_attendance'), {'start': '2025-03-01', 'end': '2025-03-31'})
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename="attendance_2025-03-01_2025-03-31.csv"'
+        )
+
+    def test_bad_parameters_are_rejected(self):
+        for params in (
+            {'start': '2025-03-01"; filename="evil.exe'},
+            {'end': 'tomorrow'},
+            {'status': 'x\r\nSet-Cookie: a=b'},
+            {'month': '13'},
+            {'format': 'pdf'},
+        ):
+            self.assertEqual(self.client.get(reverse('export_salaries'), params).status_code, 400, params)
@@ -0,0 +1,76 @@
+import json
+from datetime import date, datetime
+
+from django.contrib.auth.models import Permission
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from mywebsite.ingest import ingest_events, parse_json_events
+from mywebsite.models import Attendance
+from mywebsite.payslips import days_present_by_employee
+
+from .helpers import make_employee
+
+EVENTS = json.dumps([
+    {'employee_id': 'DEV001', 'timestamp': '2025-03-03T08:01:00', 'type': 'IN'},
+    {'employee_id': 'DEV001', 'timestamp': '2025-03-03T17:05:00', 'type': 'OUT'},
+])
+
+
+@override_settings(ATTENDANCE_INGEST_TOKENS=['device-secret'])
+class IngestAttendanceTests(TestCase):
+    def setUp(self):
+        make_employee(employee_id='DEV001')
+        self.clerk = make_employee(employee_id='CLERK1')
+        self.clerk.user_permissions.add(Permission.objects.get(codename='add_attendance'))
+        self.client = Client(enforce_csrf_checks=True)
+        self.url = reverse('ingest_attendance')
+
+    def post(self, body=EVENTS, content_type='application/json', **headers):
+        return self.client.post(self.url, body, content_type=content_type, headers=headers)
+
+    def test_device_token_skips_csrf(self):
+        response = self.post(authorization='Token device-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_wrong_token_is_rejected(self):
+        self.client.force_login(self.clerk)
+        response = self.post(authorization='Token guessed')
+        self.assertEqual(response.status_code, 401)
+
+    def test_anonymous_post_is_rejected(self):
+        self.assertEqual(self.post().status_code, 401)
+
+    def test_session_post_without_csrf_token_is_rejected(self):
+        self.client.force_login(self.clerk)
+        response = self.post(content_type='text/plain')
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_session_post_with_csrf_token(self):
+        self.client.force_login(self.clerk)
+        token = 'k' * 32
+        self.client.cookies['csrftoken'] = token
+        response = self.post(x_csrftoken=token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+
+class UpsertAttendanceTests(TestCase):
+    def setUp(self):
+        self.employee = make_employee(employee_id='DEV001')
+
+    def test_check_in_clears_a_leave_placeholder(self):
+        Attendance.objects.create(
+            employee=self.employee, date=date(2025, 3, 3),
+            check_in=timezone.make_aware(datetime(2025, 3, 3)), is_leave=True
+        )
+        ingest_events(parse_json_events(EVENTS.encode()))
+
+        row = Attendance.objects.get()
+        self.assertEqual((row.is_present, row.is_leave), (True, False))
+        self.assertEqual(row.check_in, timezone.make_aware(datetime(2025, 3, 3, 8, 1)))
+        self.assertEqual(days_present_by_employee(3, 2025), {self.employee.pk: 1})
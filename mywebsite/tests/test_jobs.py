@@ -0,0 +1,176 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from mywebsite import jobs
+from mywebsite.models import Job
+
+from .helpers import make_employee
+
+
+class Flaky:
+    """
+    Test handler that fails the first `failures` calls, then succeeds
+    """
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+        self.sleep = 0
+
+    def __call__(self, job):
+        self.calls += 1
+        time.sleep(self.sleep)
+        if self.calls <= self.failures:
+            raise RuntimeError(f"failure {self.calls}")
+        return {'calls': self.calls}
+
+
+@override_settings(JOB_QUEUE_ASYNC=True, JOB_MAX_ATTEMPTS=3, JOB_RETRY_DELAY=30, JOB_TIMEOUT=60)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.handler = Flaky()
+        patcher = mock.patch.dict(jobs.HANDLERS, {'test': self.handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.alice = make_employee()
+        self.bob = make_employee()
+
+    def test_enqueue_reuses_the_same_users_pending_job(self):
+        job = jobs.enqueue('test', {'year': 2025}, created_by=self.alice)
+        self.assertEqual(jobs.enqueue('test', {'year': 2025}, created_by=self.alice), job)
+        self.assertNotEqual(jobs.enqueue('test', {'year': 2024}, created_by=self.alice), job)
+
+    def test_enqueue_does_not_share_jobs_between_users(self):
+        alice_job = jobs.enqueue('test', {'year': 2025}, created_by=self.alice)
+        bob_job = jobs.enqueue('test', {'year': 2025}, created_by=self.bob)
+        self.assertNotEqual(alice_job, bob_job)
+        self.assertEqual(bob_job.created_by, self.bob)
+
+        self.client.force_login(self.bob)
+        self.assertEqual(self.client.get(reverse('job_status', args=[bob_job.pk])).status_code, 200)
+        self.assertEqual(self.client.get(reverse('job_status', args=[alice_job.pk])).status_code, 404)
+
+    def test_enqueue_rejects_unknown_kinds(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('nonsense', {})
+
+    def test_a_job_is_claimed_once(self):
+        job = jobs.enqueue('test', {})
+        claimed = jobs.claim(job.pk, 'worker-1')
+        self.assertEqual((claimed.status, claimed.worker, claimed.attempts), ('RUNNING', 'worker-1', 1))
+        self.assertIsNone(jobs.claim(job.pk, 'worker-2'))
+
+    def test_claim_next_takes_the_oldest_runnable_job(self):
+        later = jobs.enqueue('test', {'n': 1})
+        later.run_after = timezone.now() + timedelta(minutes=5)
+        later.save()
+        first = jobs.enqueue('test', {'n': 2})
+        second = jobs.enqueue('test', {'n': 3})
+
+        self.assertEqual(jobs.claim_next('worker').pk, first.pk)
+        self.assertEqual(jobs.claim_next('worker').pk, second.pk)
+        self.assertIsNone(jobs.claim_next('worker'))
+
+    def test_run_job_records_success(self):
+        job = jobs.run_job(jobs.claim(jobs.enqueue('test', {}).pk, 'worker'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.error), ('SUCCEEDED', {'calls': 1}, ''))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_failures_are_retried_with_backoff_until_attempts_run_out(self):
+        self.handler.failures = 5
+        job = jobs.enqueue('test', {})
+        with self.assertLogs('mywebsite.jobs', 'ERROR'):
+            for attempt in (1, 2):
+                before = timezone.now()
+                jobs.run_job(jobs.claim(job.pk, 'worker'))
+                job.refresh_from_db()
+                self.assertEqual((job.status, job.attempts), ('QUEUED', attempt))
+                self.assertGreaterEqual(job.run_after, before + timedelta(seconds=30 * 2 ** (attempt - 1)))
+                self.assertEqual(job.error, f"RuntimeError: failure {attempt}")
+            jobs.run_job(jobs.claim(job.pk, 'worker'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 3))
+        self.assertIsNone(jobs.claim(job.pk, 'worker'))
+
+    def test_inline_jobs_run_once_without_retries(self):
+        self.handler.failures = 1
+        with override_settings(JOB_QUEUE_ASYNC=False), self.assertLogs('mywebsite.jobs', 'ERROR'):
+            job = jobs.enqueue('test', {})
+        self.assertEqual((job.status, job.attempts, job.max_attempts), ('FAILED', 1, 1))
+
+    def make_stale(self, job):
+        long_ago = timezone.now() - timedelta(minutes=5)
+        Job.objects.filter(pk=job.pk).update(started_at=long_ago, heartbeat_at=long_ago)
+
+    def test_requeue_stale_hands_a_slow_job_to_another_worker(self):
+        slow = jobs.claim(jobs.enqueue('test', {}).pk, 'slow')
+        self.make_stale(slow)
+        self.assertEqual(jobs.requeue_stale(), (1, 0))
+
+        fast = jobs.claim(slow.pk, 'fast')
+        self.assertEqual(fast.attempts, 2)
+        jobs.run_job(fast)
+
+        # The slow worker finishes last; its outcome must not overwrite
+        self.handler.failures = 10
+        with self.assertLogs('mywebsite.jobs', 'WARNING'):
+            result = jobs.run_job(slow)
+        self.assertEqual((result.status, result.worker, result.result), ('SUCCEEDED', 'fast', {'calls': 1}))
+
+    def test_slow_worker_keeps_a_requeued_job_nobody_claimed(self):
+        slow = jobs.claim(jobs.enqueue('test', {}).pk, 'slow')
+        self.make_stale(slow)
+        jobs.requeue_stale()
+
+        jobs.run_job(slow)
+        slow.refresh_from_db()
+        self.assertEqual(slow.status, 'SUCCEEDED')
+        self.assertIsNone(jobs.claim(slow.pk, 'fast'))
+
+    def test_a_slow_job_that_keeps_beating_is_not_requeued(self):
+        slow = jobs.claim(jobs.enqueue('test', {}).pk, 'slow')
+        self.make_stale(slow)
+        jobs.beat(slow)
+        self.assertEqual(jobs.requeue_stale(), (0, 0))
+        self.assertEqual(Job.objects.get(pk=slow.pk).status, 'RUNNING')
+
+    def test_beats_only_count_for_the_current_attempt(self):
+        slow = jobs.claim(jobs.enqueue('test', {}).pk, 'slow')
+        self.make_stale(slow)
+        jobs.requeue_stale()
+        fast = jobs.claim(slow.pk, 'fast')
+        self.make_stale(fast)
+
+        jobs.beat(slow)
+        self.assertEqual(jobs.requeue_stale(), (1, 0))
+
+    def test_run_job_beats_while_the_handler_runs(self):
+        job = jobs.claim(jobs.enqueue('test', {}).pk, 'worker')
+        self.handler.sleep = 0.2
+        with override_settings(JOB_HEARTBEAT_INTERVAL=0.02), mock.patch.object(jobs, 'beat') as beat:
+            jobs.run_job(job)
+        self.assertGreater(beat.call_count, 1)
+        beat.assert_called_with(job)
+        # Stopped with the handler
+        calls = beat.call_count
+        time.sleep(0.05)
+        self.assertEqual(beat.call_count, calls)
+
+    def test_requeue_stale_fails_jobs_without_attempts_left(self):
+        job = jobs.enqueue('test', {})
+        Job.objects.filter(pk=job.pk).update(max_attempts=1)
+        self.make_stale(jobs.claim(job.pk, 'worker'))
+        self.assertEqual(jobs.requeue_stale(), (0, 1))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error), ('FAILED', 'Timed out'))
+
+    def test_work_runs_the_queue_in_burst_mode(self):
+        for n in range(3):
+            jobs.enqueue('test', {'n': n})
+        self.assertEqual(jobs.work('worker', burst=True), 3)
+        self.assertEqual(Job.objects.filter(status='SUCCEEDED').count(), 3)
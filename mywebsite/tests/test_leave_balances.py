@@ -0,0 +1,76 @@
+from datetime import date
+
+from django.test import TestCase
+
+from mywebsite.leave_balances import days_used, rebuild_balances
+from mywebsite.models import LeaveApplication, LeaveBalance, LeaveType
+
+from .helpers import make_employee
+
+
+class LeaveBalanceTests(TestCase):
+    def setUp(self):
+        self.employee = make_employee()
+        self.annual = LeaveType.objects.create(name='Annual', max_days_per_year=21)
+        self.sick = LeaveType.objects.create(name='Sick', max_days_per_year=14)
+
+    def apply(self, start, end, days, leave_type=None, status='PENDING'):
+        return LeaveApplication.objects.create(
+            employee=self.employee, leave_type=leave_type or self.annual,
+            start_date=start, end_date=end, days=days, reason='Rest', status=status,
+        )
+
+    def ledger(self):
+        # Rows emptied by the signals stay at zero where a rebuild drops them
+        return sorted(LeaveBalance.objects.exclude(days_pending=0, days_approved=0).values_list(
+            'employee_id', 'leave_type_id', 'year', 'days_pending', 'days_approved'
+        ))
+
+    def assertMatchesRebuild(self):
+        incremental = self.ledger()
+        rebuild_balances()
+        self.assertEqual(incremental, self.ledger())
+
+    def test_pending_and_approved_days_count(self):
+        self.apply(date(2025, 3, 3), date(2025, 3, 7), 5)
+        self.apply(date(2025, 4, 1), date(2025, 4, 2), 2, status='APPROVED')
+        self.apply(date(2025, 5, 5), date(2025, 5, 5), 1, status='REJECTED')
+
+        self.assertEqual(days_used(self.employee.pk, self.annual.pk, 2025), 7)
+        balance = LeaveBalance.objects.get(employee=self.employee, leave_type=self.annual, year=2025)
+        self.assertEqual((balance.days_pending, balance.days_approved), (5, 2))
+        self.assertMatchesRebuild()
+
+    def test_status_type_and_year_changes_move_days(self):
+        application = self.apply(date(2025, 3, 3), date(2025, 3, 7), 5)
+        application.status = 'APPROVED'
+        application.save()
+        application.leave_type = self.sick
+        application.save()
+        application.start_date, application.end_date, application.days = date(2026, 1, 5), date(2026, 1, 6), 2
+        application.save()
+
+        self.assertEqual(days_used(self.employee.pk, self.annual.pk, 2025), 0)
+        self.assertEqual(days_used(self.employee.pk, self.sick.pk, 2025), 0)
+        self.assertEqual(days_used(self.employee.pk, self.sick.pk, 2026), 2)
+        self.assertMatchesRebuild()
+
+        application.status = 'REJECTED'
+        application.save()
+        self.assertEqual(days_used(self.employee.pk, self.sick.pk, 2026), 0)
+        self.assertMatchesRebuild()
+
+    def test_deleting_an_application_returns_its_days(self):
+        kept = self.apply(date(2025, 3, 3), date(2025, 3, 4), 2, status='APPROVED')
+        removed = self.apply(date(2025, 6, 2), date(2025, 6, 6), 5)
+        removed.delete()
+
+        self.assertEqual(days_used(self.employee.pk, self.annual.pk, 2025), kept.days)
+        self.assertMatchesRebuild()
+
+    def test_missing_row_is_seeded_from_applications(self):
+        self.apply(date(2025, 3, 3), date(2025, 3, 5), 3, status='APPROVED')
+        LeaveBalance.objects.all().delete()
+
+        self.assertEqual(days_used(self.employee.pk, self.annual.pk, 2025), 3)
+        self.assertMatchesRebuild()
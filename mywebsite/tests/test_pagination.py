@@ -0,0 +1,81 @@
+from datetime import date, datetime, time, timedelta
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from mywebsite.models import Attendance
+from mywebsite.pagination import keyset_paginate
+
+from .helpers import make_employee
+
+ORDERING = ['-date', '-id']
+
+
+def attend(employee, day):
+    return Attendance.objects.create(
+        employee=employee, date=day, check_in=timezone.make_aware(datetime.combine(day, time(8))), is_present=True
+    )
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        employees = [make_employee() for _ in range(3)]
+        # Three rows share each date, so the id tie-breaker matters
+        for offset in range(4):
+            for employee in employees:
+                attend(employee, date(2025, 3, 3) + timedelta(days=offset))
+        self.expected = list(Attendance.objects.order_by(*ORDERING).values_list('id', flat=True))
+
+    def page(self, query='', **params):
+        request = self.factory.get(f"/attendance/?{query}", params)
+        return keyset_paginate(Attendance.objects.all(), request, ORDERING)
+
+    def walk(self, page, direction):
+        pages = [page]
+        while getattr(page, f"has_{direction}"):
+            page = self.page(getattr(page, f"{direction}_query"))
+            pages.append(page)
+        return pages
+
+    def ids(self, page):
+        return [row.id for row in page]
+
+    def test_forward_walk_visits_every_row_once(self):
+        pages = self.walk(self.page(page_size=5), 'next')
+        self.assertEqual([len(page) for page in pages], [5, 5, 2])
+        self.assertEqual([row_id for page in pages for row_id in self.ids(page)], self.expected)
+        self.assertFalse(pages[0].has_previous)
+        self.assertTrue(pages[-1].has_previous)
+
+    def test_backward_walk_returns_the_same_pages(self):
+        forward = self.walk(self.page(page_size=5), 'next')
+        backward = self.walk(forward[-1], 'previous')
+        self.assertEqual([self.ids(page) for page in backward[1:]], [self.ids(page) for page in forward[-2::-1]])
+        self.assertFalse(backward[-1].has_previous)
+
+    def test_cursor_replaces_other_cursors_and_keeps_filters(self):
+        page = self.page(page_size=5, after='stale', status='x')
+        self.assertIn('status=x', page.next_query)
+        self.assertEqual(page.next_query.count('after='), 1)
+        self.assertNotIn('stale', page.next_query)
+
+    def test_invalid_cursor_falls_back_to_the_first_page(self):
+        for cursor in ('!!!', 'WzFd', 'e30'):
+            page = self.page(page_size=5, after=cursor)
+            self.assertEqual(self.ids(page), self.expected[:5])
+            self.assertFalse(page.has_previous)
+
+    @override_settings(PAGINATION_PAGE_SIZE=4, PAGINATION_MAX_PAGE_SIZE=6)
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.page()), 4)
+        self.assertEqual(len(self.page(page_size=100)), 6)
+        self.assertEqual(len(self.page(page_size=0)), 1)
+        self.assertEqual(len(self.page(page_size='many')), 4)
+
+    def test_list_view_pages_by_cursor(self):
+        first = self.client.get(reverse('attendance_list'), {'page_size': 5})
+        self.assertEqual([row.id for row in first.context['attendances']], self.expected[:5])
+        second = self.client.get(f"{reverse('attendance_list')}?{first.context['page'].next_query}")
+        self.assertEqual([row.id for row in second.context['attendances']], self.expected[5:10])
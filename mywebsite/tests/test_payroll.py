@@ -0,0 +1,63 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+
+from mywebsite import payroll
+from mywebsite.models import PayrollPeriodSummary, PayrollRun, Salary
+from mywebsite.summaries import rebuild_period
+
+from .helpers import make_department, make_employee
+
+
+class ExecutePayrollRunTests(TestCase):
+    def setUp(self):
+        department = make_department()
+        self.employees = [make_employee(department, basic_salary=Decimal('40000.00') + i) for i in range(5)]
+
+    def summary_totals(self):
+        return list(PayrollPeriodSummary.objects.order_by('is_total', 'department_id').values_list(
+            'department_id', 'is_total', 'employee_count', 'total_base', 'total_net'
+        ))
+
+    def test_completed_run_creates_salaries_and_summaries(self):
+        run = payroll.run_payroll(3, 2025, chunk_size=2)
+
+        self.assertEqual(run.status, 'COMPLETED')
+        self.assertEqual(run.salaries_created, 5)
+        self.assertEqual(Salary.objects.filter(month=3, year=2025).count(), 5)
+        total = PayrollPeriodSummary.objects.get(year=2025, month=3, is_total=True)
+        self.assertEqual(total.employee_count, 5)
+
+    def test_failed_run_still_refreshes_summaries_for_committed_chunks(self):
+        build_salaries = payroll.build_salaries
+        calls = []
+
+        def fail_on_second_chunk(run, employees):
+            calls.append(len(employees))
+            if len(calls) == 2:
+                raise RuntimeError("database went away")
+            return build_salaries(run, employees)
+
+        with mock.patch.object(payroll, 'build_salaries', side_effect=fail_on_second_chunk), \
+                self.assertLogs('mywebsite.payroll', 'ERROR'):
+            run = payroll.run_payroll(3, 2025, chunk_size=2)
+
+        self.assertEqual(run.status, 'FAILED')
+        self.assertEqual(run.salaries_created, 2)
+        total = PayrollPeriodSummary.objects.get(year=2025, month=3, is_total=True)
+        self.assertEqual(total.employee_count, 2)
+
+        incremental = self.summary_totals()
+        rebuild_period(2025, 3)
+        self.assertEqual(incremental, self.summary_totals())
+
+    def test_rerun_only_pays_missing_employees(self):
+        with mock.patch.object(payroll, 'build_salaries', side_effect=RuntimeError("boom")), \
+                self.assertLogs('mywebsite.payroll', 'ERROR'):
+            payroll.run_payroll(3, 2025)
+        run = payroll.run_payroll(3, 2025, chunk_size=2)
+
+        self.assertEqual(run.status, 'COMPLETED')
+        self.assertEqual(Salary.objects.filter(month=3, year=2025).count(), 5)
+        self.assertEqual(PayrollRun.objects.count(), 2)
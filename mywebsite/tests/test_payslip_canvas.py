@@ -0,0 +1,65 @@
+import io
+from decimal import Decimal
+
+from django.contrib.auth.models import Permission
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from pypdf import PdfReader
+
+from mywebsite import payslips
+
+from .helpers import TempMediaMixin, make_employee, make_salary
+
+
+def page_texts(data):
+    return [page.extract_text() for page in PdfReader(io.BytesIO(data)).pages]
+
+
+class PayslipCanvasTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        make_salary(make_employee(username='wanjiku', kra_pin='A012345678Z'), base_salary=Decimal('100000.00'))
+        make_salary(make_employee(username='otieno'), base_salary=Decimal('45000.00'), bonus=Decimal('5000.00'))
+        self.salaries = list(payslips.month_salaries(3, 2025))
+
+    def test_one_page_per_salary(self):
+        fh = io.BytesIO()
+        self.assertEqual(payslips.write_payslips_pdf(self.salaries, fh, title="March"), 2)
+
+        texts = page_texts(fh.getvalue())
+        self.assertEqual(len(texts), 2)
+        for salary, text in zip(self.salaries, texts):
+            self.assertIn(f"EMP: {salary.employee.username.upper()}", text)
+            self.assertIn(f"Ksh {salary.net_salary:.2f}", text)
+            self.assertIn("PAYSLIP | MAR 2025", text)
+        by_employee = {salary.employee.username: text for salary, text in zip(self.salaries, texts)}
+        self.assertIn("KRA PIN: A012345678Z", by_employee['wanjiku'])
+        self.assertNotIn("KRA PIN", by_employee['otieno'])
+        self.assertIn("BONUS:\nKsh 5000.00", by_employee['otieno'])
+
+    @override_settings(PAYSLIP_RENDERER='reportlab')
+    def test_reportlab_renderer_for_single_payslips(self):
+        salary = self.salaries[0]
+        texts = page_texts(payslips.payslip_pdf(salary))
+        self.assertEqual(len(texts), 1)
+        self.assertIn("NET PAY:", texts[0])
+
+        with override_settings(PAYSLIP_RENDERER='html'):
+            html_key = payslips.payslip_cache_key(salary)
+        self.assertNotEqual(payslips.payslip_cache_key(salary), html_key)
+
+    @override_settings(PAYSLIP_RENDERER='latex')
+    def test_unknown_renderer_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            payslips.payslip_pdf(self.salaries[0])
+
+    def test_print_file_from_the_export_view(self):
+        clerk = make_employee()
+        clerk.user_permissions.add(Permission.objects.get(codename='view_salary'))
+        self.client.force_login(clerk)
+
+        response = self.client.get(reverse('export_payslips'), {'month': 3, 'year': 2025, 'format': 'pdf'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(len(page_texts(b''.join(response.streaming_content))), 2)
@@ -0,0 +1,80 @@
+import csv
+import io
+import zipfile
+from unittest import mock
+
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from pypdf import PdfReader
+
+from mywebsite import payslips
+
+from .helpers import TempMediaMixin, make_employee, make_salary
+
+
+def read_zip(data):
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    manifest = list(csv.DictReader(io.StringIO(archive.read('manifest.csv').decode())))
+    return archive, manifest
+
+
+class PayslipZipTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.salaries = [
+            make_salary(make_employee(username=name, first_name=name.title()), month=3, year=2025)
+            for name in ('akinyi', 'baraka')
+        ]
+
+    def test_stream_contains_one_pdf_per_salary_and_a_manifest(self):
+        stats = {}
+        data = b''.join(payslips.stream_payslip_zip(payslips.month_salaries(3, 2025), workers=1, stats=stats))
+
+        archive, manifest = read_zip(data)
+        self.assertEqual(sorted(archive.namelist()), [
+            'manifest.csv', 'payslip_akinyi_3_2025.pdf', 'payslip_baraka_3_2025.pdf',
+        ])
+        for name in ('payslip_akinyi_3_2025.pdf', 'payslip_baraka_3_2025.pdf'):
+            self.assertTrue(archive.read(name).startswith(b'%PDF'))
+        self.assertEqual([row['status'] for row in manifest], ['ok', 'ok'])
+        self.assertEqual([int(row['salary_id']) for row in manifest], [salary.pk for salary in self.salaries])
+        self.assertEqual((stats['documents'], stats['failed']), (2, 0))
+
+    def test_render_failures_are_listed_in_the_manifest(self):
+        with mock.patch.object(payslips, 'payslip_pdf', side_effect=[None, b'%PDF-1.4 stub']):
+            data = b''.join(payslips.stream_payslip_zip(payslips.month_salaries(3, 2025), workers=1))
+        archive, manifest = read_zip(data)
+        self.assertEqual([row['status'] for row in manifest], ['error', 'ok'])
+        self.assertEqual(sorted(archive.namelist()), ['manifest.csv', 'payslip_baraka_3_2025.pdf'])
+
+    def test_process_pool_keeps_the_salary_order(self):
+        rendered = list(payslips.iter_rendered_payslips(list(payslips.month_salaries(3, 2025)), workers=2))
+        self.assertEqual([salary.pk for salary, *_ in rendered], [salary.pk for salary in self.salaries])
+        self.assertTrue(all(pdf.startswith(b'%PDF') for _, _, pdf, _ in rendered))
+
+    def test_export_view_streams_the_month(self):
+        clerk = make_employee()
+        clerk.user_permissions.add(Permission.objects.get(codename='view_salary'))
+        self.client.force_login(clerk)
+
+        response = self.client.get(reverse('export_payslips'), {'month': 3, 'year': 2025})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="payslips_2025_03.zip"')
+        archive, manifest = read_zip(b''.join(response.streaming_content))
+        self.assertEqual(len(manifest), 2)
+
+        self.assertEqual(self.client.get(reverse('export_payslips'), {'month': 13}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('export_payslips'), {'format': 'docx'}).status_code, 400)
+
+    def test_export_command_writes_a_zip(self):
+        output = f"{self.media_root}/payslips.zip"
+        out = io.StringIO()
+        call_command('export_payslips', '--month', '3', '--year', '2025', '--workers', '1', '--output', output,
+                     stdout=out)
+        self.assertIn('Wrote 2 payslips (0 failed)', out.getvalue())
+        with open(output, 'rb') as fh:
+            archive, _ = read_zip(fh.read())
+        self.assertEqual(len(archive.namelist()), 3)
+        self.assertEqual(len(PdfReader(io.BytesIO(archive.read('payslip_akinyi_3_2025.pdf'))).pages), 1)
@@ -0,0 +1,87 @@
+from datetime import date, datetime
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from mywebsite import payslips
+from mywebsite.models import Attendance, CalendarOverride, PaySlip
+from mywebsite.work_calendar import working_days_in_month
+
+from .helpers import make_department, make_employee, make_salary
+
+
+class GeneratePayslipsTests(TestCase):
+    def setUp(self):
+        self.sales = make_department()
+        self.salaries = [make_salary(make_employee(department=self.sales), month=3, year=2025) for _ in range(3)]
+
+    def slips(self):
+        return {
+            slip.salary_id: (slip.receipt_number, slip.issue_date, slip.total_working_days, slip.days_present)
+            for slip in PaySlip.objects.all()
+        }
+
+    def test_new_payslips_share_one_block_of_receipt_numbers(self):
+        with mock.patch.object(
+            payslips, 'allocate_receipt_numbers', wraps=payslips.allocate_receipt_numbers
+        ) as allocate:
+            result = payslips.generate_payslips(3, 2025, issue_date=date(2025, 3, 28))
+        allocate.assert_called_once_with(3)
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (3, 0, 0))
+
+        numbers = sorted(receipt for receipt, *_ in self.slips().values())
+        self.assertEqual(numbers, [payslips.receipt_number(2025, 3, n) for n in range(1, 4)])
+        working_days = working_days_in_month(2025, 3)
+        self.assertEqual({slip[1:] for slip in self.slips().values()}, {(date(2025, 3, 28), working_days, 0)})
+
+    def test_rerun_keeps_receipts_and_issue_dates(self):
+        payslips.generate_payslips(3, 2025, issue_date=date(2025, 3, 28))
+        before = self.slips()
+
+        result = payslips.generate_payslips(3, 2025, issue_date=date(2025, 4, 2))
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (0, 0, 3))
+        self.assertEqual(self.slips(), before)
+
+    def test_only_changed_payslips_are_written(self):
+        payslips.generate_payslips(3, 2025, issue_date=date(2025, 3, 28))
+        before = self.slips()
+        changed = self.salaries[1]
+        Attendance.objects.create(
+            employee=changed.employee, date=date(2025, 3, 3),
+            check_in=timezone.make_aware(datetime(2025, 3, 3, 8)), is_present=True
+        )
+
+        with mock.patch.object(PaySlip.objects, 'bulk_update', wraps=PaySlip.objects.bulk_update) as bulk_update:
+            result = payslips.generate_payslips(3, 2025, issue_date=date(2025, 4, 2))
+        self.assertEqual((result['created'], result['updated'], result['unchanged']), (0, 1, 2))
+        self.assertEqual([slip.salary_id for slip in bulk_update.call_args.args[0]], [changed.pk])
+
+        after = self.slips()
+        self.assertEqual(after[changed.pk], before[changed.pk][:3] + (1,))
+        self.assertEqual({pk: after[pk] for pk in after if pk != changed.pk},
+                         {pk: before[pk] for pk in before if pk != changed.pk})
+
+    def test_later_salaries_get_the_next_block(self):
+        payslips.generate_payslips(3, 2025)
+        late = [make_salary(make_employee(department=self.sales), month=3, year=2025) for _ in range(2)]
+
+        result = payslips.generate_payslips(3, 2025)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual(
+            sorted(self.slips()[salary.pk][0] for salary in late),
+            [payslips.receipt_number(2025, 3, 4), payslips.receipt_number(2025, 3, 5)]
+        )
+
+    def test_working_days_follow_the_salary_department(self):
+        # Sales closed for a weekday; the employee moves to another department afterwards
+        CalendarOverride.objects.create(date=date(2025, 3, 12), department=self.sales, name="Stocktake")
+        moved = self.salaries[0].employee
+        moved.department = make_department()
+        moved.save()
+
+        payslips.generate_payslips(3, 2025)
+        self.assertEqual(
+            self.slips()[self.salaries[0].pk][2], working_days_in_month(2025, 3, self.sales.pk)
+        )
+        self.assertEqual(working_days_in_month(2025, 3, self.sales.pk), working_days_in_month(2025, 3) - 1)
@@ -0,0 +1,88 @@
+import os
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from mywebsite import pdf_cache, views
+from mywebsite.models import Salary
+from mywebsite.payslips import PAYSLIP_TEMPLATE, payslip_cache_key
+
+from .helpers import TempMediaMixin, make_employee, make_salary
+
+
+class PdfCacheTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.salary = make_salary(make_employee())
+
+    def test_key_follows_the_rows_and_extra_context(self):
+        key = pdf_cache.cache_key(PAYSLIP_TEMPLATE, [self.salary])
+        self.assertEqual(key, pdf_cache.cache_key(PAYSLIP_TEMPLATE, [self.salary]))
+
+        self.salary.bonus = Decimal('100.00')
+        self.assertNotEqual(key, pdf_cache.cache_key(PAYSLIP_TEMPLATE, [self.salary]))
+        self.assertNotEqual(key, pdf_cache.cache_key(PAYSLIP_TEMPLATE, [self.salary], {'company': 'Other'}))
+
+    def test_ignored_fields_do_not_change_the_key(self):
+        employee = self.salary.employee
+        key = pdf_cache.cache_key(PAYSLIP_TEMPLATE, [employee])
+        employee.password = 'changed'
+        self.assertEqual(key, pdf_cache.cache_key(PAYSLIP_TEMPLATE, [employee]))
+
+    def test_get_or_render_renders_once(self):
+        namespace = pdf_cache.payslip_namespace(self.salary.pk)
+        render = mock.Mock(return_value=b'%PDF-1.4 stub')
+
+        self.assertEqual(pdf_cache.get_or_render(namespace, 'abc', render), b'%PDF-1.4 stub')
+        self.assertEqual(pdf_cache.get_or_render(namespace, 'abc', render), b'%PDF-1.4 stub')
+        render.assert_called_once_with()
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'pdf_cache', *namespace)), ['abc.pdf'])
+
+    def test_failed_render_is_not_cached(self):
+        namespace = pdf_cache.payslip_namespace(self.salary.pk)
+        self.assertIsNone(pdf_cache.get_or_render(namespace, 'abc', lambda: None))
+        self.assertIsNone(pdf_cache.get(namespace, 'abc'))
+
+    def test_saving_a_salary_drops_its_namespace(self):
+        namespace = pdf_cache.payslip_namespace(self.salary.pk)
+        other = make_salary(make_employee())
+        other_namespace = pdf_cache.payslip_namespace(other.pk)
+        pdf_cache.get_or_render(namespace, 'abc', lambda: b'one')
+        pdf_cache.get_or_render(other_namespace, 'abc', lambda: b'two')
+
+        self.salary.bonus = Decimal('100.00')
+        self.salary.save()
+        self.assertIsNone(pdf_cache.get(namespace, 'abc'))
+        self.assertEqual(pdf_cache.get(other_namespace, 'abc'), b'two')
+
+
+class PayslipPdfViewTests(TempMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.salary = make_salary(make_employee())
+        self.url = reverse('generate_payslip_pdf', args=[self.salary.pk])
+
+    def test_served_from_cache_with_etag(self):
+        with mock.patch.object(views, 'payslip_pdf', return_value=b'%PDF-1.4 stub') as render:
+            response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, b'%PDF-1.4 stub')
+            stored = Salary.objects.select_related('employee').get(pk=self.salary.pk)
+            self.assertEqual(response['ETag'], f'"{payslip_cache_key(stored)}"')
+
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            self.assertEqual(render.call_count, 1)
+
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(not_modified.status_code, 304)
+
+    def test_changed_salary_gets_a_new_etag(self):
+        with mock.patch.object(views, 'payslip_pdf', return_value=b'%PDF-1.4 stub'):
+            etag = self.client.get(self.url)['ETag']
+            self.salary.bonus = Decimal('100.00')
+            self.salary.save()
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
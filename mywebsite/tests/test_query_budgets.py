@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from mywebsite.models import Attendance, CustomUser, Salary
+from mywebsite.querybudget import count_queries, max_queries
+
+from .helpers import make_department, make_employee
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class ListViewQueryBudgetTests(TestCase):
+    """
+    The list views run a fixed number of queries however many rows they
+    show; each stays within its declared query_budget
+    """
+    def setUp(self):
+        self.admin = CustomUser.objects.create_superuser(
+            'admin', 'admin@example.com', None, employee_id='ADM001', gender='M'
+        )
+        Salary.objects.create(employee=self.admin, base_salary=Decimal('90000.00'), month=3, year=2025)
+        self.departments = [make_department() for _ in range(3)]
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        day = date(2025, 3, 3)
+        for i in range(count):
+            employee = make_employee(self.departments[i % 3])
+            Salary.objects.create(employee=employee, base_salary=Decimal('50000.00'), month=3, year=2025)
+            Attendance.objects.create(
+                employee=employee, date=day + timedelta(days=i % 5), is_present=True,
+                check_in=timezone.make_aware(timezone.datetime(2025, 3, 3, 8, 0)),
+            )
+
+    def query_count(self, url):
+        with count_queries() as counter:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(counter)
+
+    def test_employee_list(self):
+        self.add_rows(12)
+        with max_queries(6):
+            response = self.client.get(reverse('employee_list'))
+        self.assertEqual(len(response.context['employees']), 13)
+
+    def test_employee_list_filtered(self):
+        self.add_rows(12)
+        with max_queries(6):
+            response = self.client.get(reverse('employee_list'), {'department': self.departments[0].name})
+        self.assertEqual(len(response.context['employees']), 4)
+
+    def test_admin_salary_list(self):
+        self.add_rows(12)
+        with max_queries(8):
+            response = self.client.get(reverse('admin_salary_list'), {'month': 3, 'year': 2025})
+        self.assertEqual(len(response.context['salaries']), 13)
+
+    def test_salary_list(self):
+        self.add_rows(3)
+        with max_queries(4):
+            response = self.client.get(reverse('salary_list'))
+        self.assertEqual(len(response.context['salaries']), 1)
+
+    def test_attendance_list(self):
+        self.add_rows(12)
+        with max_queries(4):
+            response = self.client.get(reverse('attendance_list'))
+        self.assertEqual(len(response.context['attendances']), 12)
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        urls = [
+            reverse('employee_list'),
+            reverse('admin_salary_list') + '?month=3&year=2025',
+            reverse('attendance_list'),
+        ]
+        self.add_rows(3)
+        few = [self.query_count(url) for url in urls]
+        self.add_rows(12)
+        self.assertEqual([self.query_count(url) for url in urls], few)
@@ -0,0 +1,120 @@
+import random
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from mywebsite.models import Salary
+from mywebsite.statutory import (
+    RATE_TABLES, Deductions, statutory_deductions, statutory_deductions_batch, table_for
+)
+
+from .helpers import make_employee
+
+
+def deductions(paye, nssf, shif, housing_levy):
+    values = [Decimal(value) for value in (paye, nssf, shif, housing_levy)]
+    return Deductions(*values, total=sum(values))
+
+
+class RateTableSelectionTests(SimpleTestCase):
+    def test_table_in_force_for_each_period(self):
+        self.assertIsNone(table_for(2024, 1))
+        self.assertEqual(table_for(2024, 2).version, 'KE-2024-02')
+        self.assertEqual(table_for(2024, 9).version, 'KE-2024-02')
+        self.assertEqual(table_for(2024, 10).version, 'KE-2024-10')
+        self.assertEqual(table_for(2025, 1).version, 'KE-2024-12')
+        self.assertEqual(table_for(2030, 6).version, 'KE-2025-02')
+
+    def test_no_table_means_no_statutory_deductions(self):
+        self.assertIsNone(statutory_deductions(Decimal('50000'), 2023, 12))
+        self.assertIsNone(statutory_deductions_batch([Decimal('50000')], 2023, 12))
+
+
+class PayeBandTests(SimpleTestCase):
+    def setUp(self):
+        self.table = table_for(2025, 3)
+
+    def test_tax_at_band_boundaries(self):
+        # In cents: 10% up to 24,000, 25% up to 32,333, 30% up to 500,000
+        self.assertEqual(self.table.paye(0), 0)
+        self.assertEqual(self.table.paye(2400000), 240000)
+        self.assertEqual(self.table.paye(2400004), 240001)
+        self.assertEqual(self.table.paye(3233300), 240000 + 208325)
+        self.assertEqual(self.table.paye(50000000), 240000 + 208325 + 14030010)
+        self.assertEqual(self.table.paye(80000000), 240000 + 208325 + 14030010 + 9750000)
+        self.assertEqual(self.table.paye(100000000), 240000 + 208325 + 14030010 + 9750000 + 7000000)
+
+    def test_tax_is_continuous_across_bands(self):
+        for start in self.table.band_starts[1:]:
+            below, at, above = (self.table.paye(start + offset) for offset in (-100, 0, 100))
+            self.assertLess(below, at)
+            self.assertLess(at, above)
+
+
+class StatutoryDeductionTests(SimpleTestCase):
+    def test_shif_period_with_deductible_levies(self):
+        # NSSF 480 + 3,840; SHIF 2.75%; levy 1.5%; all three off taxable pay
+        # of 91,430, taxed 2,400 + 2,083.25 + 17,729.10 less 2,400 relief
+        self.assertEqual(
+            statutory_deductions(Decimal('100000.00'), 2025, 3),
+            deductions('19812.35', '4320.00', '2750.00', '1500.00'),
+        )
+
+    def test_nhif_period_with_insurance_relief(self):
+        # Only NSSF is deductible; 15% of the 1,200 NHIF comes off the tax
+        self.assertEqual(
+            statutory_deductions(Decimal('50000.00'), 2024, 5),
+            deductions('6555.35', '2160.00', '1200.00', '750.00'),
+        )
+
+    def test_relief_never_makes_tax_negative(self):
+        self.assertEqual(
+            statutory_deductions(Decimal('20000.00'), 2025, 3),
+            deductions('0.00', '1200.00', '550.00', '300.00'),
+        )
+
+    def test_shif_minimum(self):
+        self.assertEqual(statutory_deductions(Decimal('10000.00'), 2025, 3).shif, Decimal('300.00'))
+
+    def test_zero_pay_has_no_deductions(self):
+        self.assertEqual(statutory_deductions(Decimal('0'), 2025, 3), deductions('0', '0', '0', '0'))
+
+    def test_batch_matches_single_calculations(self):
+        grosses = [Decimal(value) for value in ('0', '7999.99', '15000', '32333', '72000.01', '250000', '1000000')]
+        for year, month in ((2024, 5), (2024, 11), (2025, 1), (2025, 6)):
+            self.assertEqual(
+                statutory_deductions_batch(grosses, year, month),
+                [statutory_deductions(gross, year, month) for gross in grosses],
+            )
+
+    def test_vectorised_path_matches_the_row_path(self):
+        rng = random.Random(15)
+        grosses = [rng.randrange(-100, 120000000) for _ in range(5000)]
+        # Every limit and band edge, and a cent either side
+        for spec in RATE_TABLES:
+            table = table_for(*spec['effective_from'])
+            edges = table.band_starts + [table.nssf_lower, table.nssf_upper] + getattr(table, 'nhif_starts', [])
+            grosses += [edge + offset for edge in edges for offset in (-1, 0, 1)]
+        for spec in RATE_TABLES:
+            table = table_for(*spec['effective_from'])
+            self.assertEqual(table.calculate_cents(grosses), [table.calculate_row(gross) for gross in grosses])
+        self.assertEqual(table.calculate_cents([]), [])
+
+
+class SalaryDeductionTests(TestCase):
+    def test_statutory_salary_stores_the_breakdown(self):
+        salary = Salary.objects.create(
+            employee=make_employee(), base_salary=Decimal('90000.00'), bonus=Decimal('10000.00'), month=3, year=2025
+        )
+        self.assertEqual(
+            (salary.paye, salary.nssf, salary.shif, salary.housing_levy, salary.deductions),
+            tuple(deductions('19812.35', '4320.00', '2750.00', '1500.00')),
+        )
+        self.assertEqual(salary.net_salary, Decimal('71617.65'))
+
+    def test_periods_before_the_first_table_use_the_flat_rate(self):
+        salary = Salary.objects.create(
+            employee=make_employee(), base_salary=Decimal('50000.00'), tax_rate=Decimal('16.00'), month=6, year=2023
+        )
+        self.assertEqual((salary.paye, salary.nssf, salary.deductions), (Decimal('8000.00'), 0, Decimal('8000.00')))
+        self.assertEqual(salary.net_salary, Decimal('42000.00'))
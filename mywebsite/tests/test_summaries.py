@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from mywebsite.models import PayrollPeriodSummary, Salary
+from mywebsite.summaries import rebuild_period
+
+from .helpers import make_department, make_employee
+
+
+class PayrollSummaryTests(TestCase):
+    def setUp(self):
+        self.finance = make_department('Finance')
+        self.sales = make_department('Sales')
+        self.alice = make_employee(self.finance, basic_salary=Decimal('60000.00'))
+        self.bob = make_employee(self.sales, basic_salary=Decimal('45000.00'))
+
+    def pay(self, employee, month, base_salary, year=2025):
+        return Salary.objects.create(
+            employee=employee, base_salary=base_salary, month=month, year=year,
+            tax_rate=Decimal('10.00'), deduction_method='FLAT'
+        )
+
+    def summary_rows(self, year=2025, month=1):
+        # The signals leave emptied rows at zero where a rebuild drops them
+        return sorted(PayrollPeriodSummary.objects.filter(year=year, month=month, employee_count__gt=0).values_list(
+            'department_id', 'is_total', 'employee_count', 'total_base', 'total_bonus', 'total_tax', 'total_net'
+        ), key=lambda row: (row[1], row[0] or 0))
+
+    def assertMatchesRebuild(self, year=2025, month=1):
+        incremental = self.summary_rows(year, month)
+        rebuild_period(year, month)
+        self.assertEqual(incremental, self.summary_rows(year, month))
+
+    def test_salary_records_the_employee_department(self):
+        salary = self.pay(self.alice, 1, Decimal('60000.00'))
+        self.assertEqual(salary.department_id, self.finance.pk)
+
+    def test_incremental_totals_match_rebuild(self):
+        self.pay(self.alice, 1, Decimal('60000.00'))
+        salary = self.pay(self.bob, 1, Decimal('45000.00'))
+        salary.bonus = Decimal('5000.00')
+        salary.save()
+
+        total = PayrollPeriodSummary.objects.get(year=2025, month=1, is_total=True)
+        self.assertEqual(total.employee_count, 2)
+        self.assertEqual(total.total_base, Decimal('105000.00'))
+        self.assertEqual(total.total_net, Decimal('99500.00'))
+        self.assertMatchesRebuild()
+
+    def test_moving_an_employee_keeps_past_totals(self):
+        january = self.pay(self.alice, 1, Decimal('60000.00'))
+        self.pay(self.bob, 1, Decimal('45000.00'))
+
+        self.alice.department = self.sales
+        self.alice.save()
+        february = self.pay(self.alice, 2, Decimal('60000.00'))
+        self.assertEqual(february.department_id, self.sales.pk)
+
+        # Editing and then deleting the January salary takes it out of
+        # Finance, where it was counted
+        january.bonus = Decimal('1000.00')
+        january.save()
+        self.assertMatchesRebuild()
+        january.delete()
+        finance = PayrollPeriodSummary.objects.get(year=2025, month=1, department=self.finance)
+        self.assertEqual((finance.employee_count, finance.total_net), (0, Decimal('0.00')))
+        self.assertMatchesRebuild()
+        self.assertMatchesRebuild(month=2)
+
+    def test_deleting_a_department_regroups_its_salaries(self):
+        self.pay(self.alice, 1, Decimal('60000.00'))
+        self.pay(self.bob, 1, Decimal('45000.00'))
+
+        self.finance.delete()
+
+        unassigned = PayrollPeriodSummary.objects.get(year=2025, month=1, department=None, is_total=False)
+        self.assertEqual(unassigned.total_base, Decimal('60000.00'))
+        self.assertMatchesRebuild()
@@ -0,0 +1,98 @@
+import random
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase, TestCase
+
+from mywebsite.models import CalendarOverride
+from mywebsite.work_calendar import (
+    business_days, company_calendar, easter_sunday, is_working_day, public_holidays, working_dates,
+    working_days_in_month,
+)
+
+from .helpers import make_department
+
+
+class PublicHolidayTests(SimpleTestCase):
+    def test_easter(self):
+        self.assertEqual(easter_sunday(2023), date(2023, 4, 9))
+        self.assertEqual(easter_sunday(2024), date(2024, 3, 31))
+        self.assertEqual(easter_sunday(2025), date(2025, 4, 20))
+        self.assertEqual(easter_sunday(2038), date(2038, 4, 25))
+
+    def test_fixed_and_easter_holidays(self):
+        holidays = public_holidays(2025)
+        self.assertEqual(holidays[date(2025, 4, 18)], "Good Friday")
+        self.assertEqual(holidays[date(2025, 4, 21)], "Easter Monday")
+        self.assertEqual(holidays[date(2025, 10, 20)], "Mashujaa Day")
+        self.assertEqual(holidays[date(2025, 12, 12)], "Jamhuri Day")
+        # Eight fixed dates, two Easter days, and Madaraka Day on a Sunday
+        self.assertEqual(len(holidays), 11)
+        self.assertEqual(holidays[date(2025, 6, 2)], "Madaraka Day (observed)")
+
+    def test_sunday_holiday_is_observed_on_the_next_free_day(self):
+        holidays = public_holidays(2022)
+        # Christmas on a Sunday: Monday is Boxing Day, so Tuesday is observed
+        self.assertEqual(holidays[date(2022, 12, 27)], "Christmas Day (observed)")
+        self.assertEqual(public_holidays(2023)[date(2023, 1, 2)], "New Year's Day (observed)")
+
+    def test_observed_day_stays_in_the_year(self):
+        # 31 December is never a holiday, so nothing spills into January
+        for year in range(2000, 2060):
+            self.assertTrue(all(day.year == year for day in public_holidays(year)))
+
+
+class BusinessDayTests(TestCase):
+    def setUp(self):
+        company_calendar.clear()
+        self.addCleanup(company_calendar.clear)
+
+    def test_working_days_in_a_month(self):
+        self.assertEqual(working_days_in_month(2025, 3), 21)
+        # Good Friday and Easter Monday
+        self.assertEqual(working_days_in_month(2025, 4), 20)
+
+    def test_business_days_across_a_year_end(self):
+        # Ten weekdays less Christmas, Boxing Day and New Year's Day
+        self.assertEqual(business_days(date(2025, 12, 22), date(2026, 1, 2)), 7)
+        self.assertEqual(business_days(date(2025, 12, 25), date(2025, 12, 26)), 0)
+        self.assertEqual(business_days(date(2025, 3, 5), date(2025, 3, 4)), 0)
+        self.assertEqual(business_days(date(2025, 3, 3), date(2025, 3, 3)), 1)
+
+    def test_business_days_match_a_day_by_day_count(self):
+        rng = random.Random(7)
+        holidays = {}
+        for _ in range(200):
+            start = date(2023, 1, 1) + timedelta(days=rng.randrange(1100))
+            end = start + timedelta(days=rng.randrange(-5, 500))
+            expected = 0
+            day = start
+            while day <= end:
+                if day.year not in holidays:
+                    holidays[day.year] = public_holidays(day.year)
+                if day.weekday() < 5 and day not in holidays[day.year]:
+                    expected += 1
+                day += timedelta(days=1)
+            self.assertEqual(business_days(start, end), expected, (start, end))
+            self.assertEqual(len(working_dates(start, end)), expected)
+
+    def test_company_and_department_overrides(self):
+        warehouse = make_department('Warehouse')
+        CalendarOverride.objects.create(date=date(2025, 3, 3), name='Idd-ul-Fitr', is_working_day=False)
+        CalendarOverride.objects.create(
+            date=date(2025, 3, 8), department=warehouse, name='Stock take', is_working_day=True
+        )
+
+        self.assertFalse(is_working_day(date(2025, 3, 3)))
+        self.assertEqual(working_days_in_month(2025, 3), 20)
+        self.assertTrue(is_working_day(date(2025, 3, 8), warehouse))
+        self.assertEqual(working_days_in_month(2025, 3, warehouse), 21)
+
+    def test_department_working_weekdays(self):
+        shop = make_department('Shop', working_weekdays='012345')
+        # Five Saturdays in March 2025
+        self.assertEqual(working_days_in_month(2025, 3, shop), 26)
+        self.assertEqual(working_days_in_month(2025, 3), 21)
+
+        shop.working_weekdays = '0123'
+        shop.save()
+        self.assertEqual(working_days_in_month(2025, 3, shop), 17)
@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from mywebsite import payroll, ytd_ledger
+from mywebsite.models import Salary, YearToDateLedger
+
+from .helpers import make_employee
+
+FIELDS = ('employee_id', 'year', 'month_count', *ytd_ledger.AMOUNT_FIELDS)
+
+
+class YearToDateLedgerTests(TestCase):
+    def setUp(self):
+        self.alice = make_employee(basic_salary=Decimal('85000.00'))
+        self.bob = make_employee(basic_salary=Decimal('42000.00'))
+
+    def pay(self, employee, month, base_salary, year=2025, **kwargs):
+        return Salary.objects.create(employee=employee, base_salary=base_salary, month=month, year=year, **kwargs)
+
+    def ledger(self, year=2025):
+        # Rows emptied by the signals stay at zero where a rebuild drops them
+        return sorted(YearToDateLedger.objects.filter(year=year, month_count__gt=0).values_list(*FIELDS))
+
+    def assertMatchesRebuild(self, year=2025):
+        incremental = self.ledger(year)
+        ytd_ledger.rebuild_year(year)
+        self.assertEqual(incremental, self.ledger(year))
+
+    def test_salaries_add_up_per_employee_and_year(self):
+        january = self.pay(self.alice, 1, Decimal('85000.00'))
+        february = self.pay(self.alice, 2, Decimal('85000.00'), bonus=Decimal('5000.00'))
+        self.pay(self.alice, 12, Decimal('80000.00'), year=2024)
+        self.pay(self.bob, 1, Decimal('42000.00'))
+
+        row = ytd_ledger.employee_year(self.alice, 2025)
+        self.assertEqual(row.month_count, 2)
+        self.assertEqual(row.total_gross, Decimal('175000.00'))
+        self.assertEqual(row.total_paye, january.paye + february.paye)
+        self.assertEqual(row.total_net, january.net_salary + february.net_salary)
+        self.assertMatchesRebuild()
+        self.assertMatchesRebuild(2024)
+
+    def test_edits_and_deletes_keep_the_ledger_in_step(self):
+        salary = self.pay(self.alice, 1, Decimal('85000.00'))
+        self.pay(self.bob, 1, Decimal('42000.00'))
+
+        salary.bonus = Decimal('12000.00')
+        salary.save()
+        self.assertMatchesRebuild()
+
+        # Moving a salary to another year moves it between ledger rows
+        salary.year = 2024
+        salary.save()
+        self.assertMatchesRebuild()
+        self.assertMatchesRebuild(2024)
+
+        salary.delete()
+        self.assertIsNone(ytd_ledger.employee_year(self.alice, 2024))
+        self.assertMatchesRebuild(2024)
+
+    def test_payroll_run_bulk_inserts_are_added(self):
+        self.pay(self.alice, 1, Decimal('85000.00'))
+        payroll.run_payroll(2, 2025, chunk_size=1)
+        payroll.run_payroll(3, 2025)
+
+        self.assertEqual(ytd_ledger.employee_year(self.alice, 2025).month_count, 3)
+        self.assertEqual(ytd_ledger.employee_year(self.bob, 2025).month_count, 2)
+        self.assertMatchesRebuild()
+
+    def test_rebuild_all_drops_years_without_salaries(self):
+        self.pay(self.alice, 1, Decimal('85000.00'))
+        YearToDateLedger.objects.create(employee=self.bob, year=2019, month_count=1)
+
+        self.assertEqual(ytd_ledger.rebuild_all(), [2025])
+        self.assertFalse(YearToDateLedger.objects.filter(year=2019).exists())
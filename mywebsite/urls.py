@@ -10,11 +10,14 @@ urlpatterns = [
 
     # Dashboard URL
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/cache-stats/', views.dashboard_cache_stats, name='dashboard_cache_stats'),
     path('user_dashboard/', views.user_dashboard, name='user_dashboard'),
 
     # Employee Management URLs
     path('employees/', views.employee_list, name='employee_list'),
     path('employee/add/', views.add_employee, name='add_employee'),
+    path('employees/import/', views.import_employees, name='import_employees'),
+    path('employees/search/', views.employee_search, name='employee_search'),
     path('employees/register/', views.register_employee, name='register_employee'),
     path('employees/profile/<str:employee_id>/', views.employee_profile, name='employee_profile'),
     path('update-employee/<str:employee_id>/', views.update_employee, name='update_employee'),
@@ -22,7 +25,10 @@ urlpatterns = [
 
     # Attendance URLs
     path('attendance/mark/', views.mark_attendance_for_today, name='mark_attendance'),
+    path('attendance/bulk-mark/', views.bulk_mark_attendance, name='bulk_mark_attendance'),
+    path('attendance/ingest/', views.ingest_attendance, name='ingest_attendance'),
     path('attendance/', views.attendance_list, name='attendance_list'),
+    path('attendance/export/', views.export_attendance, name='export_attendance'),
     path('my-attendance/', views.user_attendance_list, name='user_attendance_list'),
 
     # Leave Management URLs
@@ -31,6 +37,7 @@ urlpatterns = [
     path('User/leaves/history/', views.user_leave_history, name='user_leave_history'),
     #admin leaves list
     path('leave-applications/', views.leave_application_list, name='leave_application_list'),
+    path('leave-applications/export/', views.export_leave_applications, name='export_leave_applications'),
     path('leave-applications/<int:pk>/', views.leave_application_detail, name='leave_application_detail'),
     path('leave-applications/<int:pk>/update-status/', views.update_leave_status, name='update_leave_status'),
 
@@ -40,6 +47,9 @@ urlpatterns = [
     path('general-salaries/', views.admin_salary_list, name='admin_salary_list'),
     path('salary/add/', views.add_salary, name='add_salary'),
     path('payslip/<int:salary_id>/pdf/', views.generate_payslip_pdf, name='generate_payslip_pdf'),
+    path('payslips/export/', views.export_payslips, name='export_payslips'),
+    path('salaries/export/', views.export_salaries, name='export_salaries'),
+    path('salaries/bank-files/', views.bank_payment_files, name='bank_payment_files'),
 
     path('departments/', views.department_list, name='department_list'),
     path('departments/add/', views.department_create, name='department_create'),
@@ -47,7 +57,13 @@ urlpatterns = [
     path('departments/<int:pk>/edit/', views.department_update, name='department_update'),
 
     path('reports/monthly/', views.monthly_payroll_report, name='monthly_payroll_report'),
+    path('reports/attendance/', views.attendance_report, name='attendance_report'),
     path('reports/tax-certificate/', views.employee_tax_certificate, name='tax_certificate'),
     path('reports/tax-certificate/<int:year>/', views.employee_tax_certificate, name='tax_certificate_year'),
     path('reports/tax-certificate/<int:employee_id>/<int:year>/', views.employee_tax_certificate, name='tax_certificate_full'),
+    path('reports/annual-tax-returns/export/', views.export_annual_tax_returns, name='export_annual_tax_returns'),
+
+    path('jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:job_id>/status/', views.job_status, name='job_status'),
+    path('jobs/<int:job_id>/download/', views.job_download, name='job_download'),
 ]
\ No newline at end of file
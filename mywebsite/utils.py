@@ -1,30 +1,23 @@
 # utils.py
-from io import BytesIO
+from io import RawIOBase
 from django.http import HttpResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
 from django.conf import settings
 import os
 
+from .pdf_render import render_pdf
+
 def render_to_pdf(template_src, context_dict={}):
-    template = get_template(template_src)
-    html = template.render(context_dict)
-    result = BytesIO()
-    
-    # Handle logo path
-    logo_path = os.path.join(settings.STATIC_ROOT, 'img/logo.png')
-    
-    pdf = pisa.pisaDocument(
-        html,
-        dest=result,
-        encoding='UTF-8',
-        link_callback=lambda uri, _: os.path.join(settings.STATIC_ROOT, uri.replace(settings.STATIC_URL, ''))
-    )
-    
-    if not pdf.err:
-        return HttpResponse(result.getvalue(), content_type='application/pdf')
+    pdf = render_pdf_bytes(template_src, context_dict)
+    if pdf is not None:
+        return HttpResponse(pdf, content_type='application/pdf')
     return None
 
+def render_pdf_bytes(template_src, context_dict={}):
+    """
+    Render a template to PDF and return the raw bytes, or None on error
+    """
+    return render_pdf(template_src, context_dict)
+
 def fetch_resources(uri, rel):
     """
     Callback to allow xhtml2pdf/reportlab to retrieve images, stylesheets, etc.
@@ -36,4 +29,30 @@ def fetch_resources(uri, rel):
     else:
         path = None
 
-    return path
\ No newline at end of file
+    return path
+
+
+class ZipStream(RawIOBase):
+    """
+    Write-only, unseekable buffer for zipfile. Whatever has been written
+    since the last drain() is handed out and forgotten.
+    """
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
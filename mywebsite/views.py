@@ -1,11 +1,12 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
 from .forms import CustomUserRegistrationForm
 from .models import *
 import logging
 from django.utils.timezone import now
+from django.db import transaction
 from django.db.models import Count
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth import get_user_model
@@ -22,6 +23,27 @@ from .forms import (
     EmployeeProfileForm,
     LeaveApplicationForm
 )
+from .summaries import latest_period, salary_years
+from . import dashboard_metrics
+from .pagination import keyset_paginate
+from .employee_search import autocomplete, filter_employees
+from .querybudget import query_budget
+from .attendance import employees_in_scope, mark_attendance
+from .ingest import ingest_events, parse_csv_events, parse_json_events
+from .leave_balances import get_balance as get_leave_balance
+from .filters import (
+    InvalidFilter, filename_suffix, filter_annual_returns, filter_attendance, filter_leave_applications,
+    filter_salaries
+)
+from .exports import CSV_CONTENT_TYPE, XLSX_CONTENT_TYPE, stream_export
+from .bankfiles import generate_payment_batch
+from django.http import HttpResponseBadRequest
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.middleware.csrf import CsrfViewMiddleware
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 import datetime
 logger = logging.getLogger(__name__)
 
@@ -111,40 +133,26 @@ def user_login(request):
     return render(request, 'login.html')
 
 @login_required
+@query_budget(8)
 def dashboard(request):
     """
-    Main dashboard view
+    Main dashboard view. The company-wide counts come from the metrics
+    cache; only the current user's attendance is queried on every load.
     """
     today = timezone.now().date()
-    total_employees = CustomUser.objects.count()
-    total_departments = Department.objects.count()
-
-    # Count employees on leave (Approved leaves with current date in range)
-    employees_on_leave = LeaveApplication.objects.filter(
-        status='APPROVED',
-        start_date__lte=now().date(),
-        end_date__gte=now().date()
-    ).count()
-
-    # Get latest payroll data
-    latest_payroll = Salary.objects.order_by('-year', '-month').first()
-    
-    if latest_payroll:
-        payroll_summary = Salary.objects.filter(
-            month=latest_payroll.month,
-            year=latest_payroll.year
-        ).aggregate(
-            total_net=Sum('net_salary')
-        )
-        payroll_amount = payroll_summary['total_net'] or 0
-    else:
-        payroll_amount = 0
-        latest_payroll = None
+    metrics = dashboard_metrics.get_metrics()
+    total_employees = metrics['total_employees']
+    total_departments = metrics['total_departments']
+
+    # Employees on leave (Approved leaves with current date in range)
+    employees_on_leave = metrics['employees_on_leave']
+
+    # Latest payroll data from the precomputed period summary
+    latest_payroll = metrics['latest_payroll']
+    payroll_amount = latest_payroll.total_net if latest_payroll else 0
     
-    # For counting distinct employees present today (works with all databases)
-    employees_present_today = Attendance.objects.filter(
-        date=today
-    ).values_list('employee', flat=True).distinct().count()
+    # Distinct employees present today
+    employees_present_today = metrics['employees_present_today']
     
     # Calculate attendance percentage (with protection against division by zero)
     attendance_percentage = 0
@@ -175,6 +183,17 @@ def dashboard(request):
 
 
 @login_required
+def dashboard_cache_stats(request):
+    """
+    Hit rates of the cached dashboard metrics, for staff
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Not authorized'}, status=403)
+    return JsonResponse({'metrics': dashboard_metrics.cache_stats()})
+
+
+@login_required
+@query_budget(8)
 def user_dashboard(request):
     """
     Display a summary of the logged-in user's information.
@@ -220,40 +239,74 @@ def register_employee(request):
     return render(request, 'employees/register_employee.html', {'form': form})
 
 @login_required
+@query_budget(6)
 def employee_list(request):
     """
     List all employees
     """
-    employees = CustomUser.objects.all()
+    employees = CustomUser.objects.select_related('department', 'role')
     
     # Optional filtering
     department = request.GET.get('department')
     role = request.GET.get('role')
+    query = request.GET.get('q', '').strip()
     
     if department:
         employees = employees.filter(department__name=department)
     if role:
         employees = employees.filter(role__title=role)
+    if query:
+        # Name, employee ID, national ID, KRA PIN or phone, by word prefix
+        employees = filter_employees(employees, query)
+
+    page = keyset_paginate(employees, request, ['id'])
     
     context = {
-        'employees': employees,
+        'employees': page,
+        'page': page,
+        'query': query,
         'departments': Department.objects.all(),
         'roles': EmployeeRole.objects.all()
     }
     return render(request, 'employees/employee_list.html', context)
 
+
 @login_required
+@permission_required('mywebsite.view_customuser', raise_exception=True)
+@query_budget(5)
+def employee_search(request):
+    """
+    JSON autocomplete: the employees best matching ?q=, up to ?limit= (20)
+    """
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 10)), 20))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    results = [
+        {
+            'employee_id': row['employee_id'],
+            'name': f"{row['first_name']} {row['last_name']}".strip() or row['username'],
+            'department': row['department__name'],
+            'active': row['is_active_employee'],
+            'url': reverse('employee_profile', args=[row['employee_id']]) if row['employee_id'] else None,
+        }
+        for row in autocomplete(request.GET.get('q', ''), limit)
+    ]
+    return JsonResponse({'results': results})
+
+@login_required
+@query_budget(7)
 def employee_profile(request, employee_id):
     """
     Employee profile view
     """
-    employee = get_object_or_404(CustomUser, employee_id=employee_id)
+    employee = get_object_or_404(CustomUser.objects.select_related('department', 'role'), employee_id=employee_id)
     
     context = {
         'employee': employee,
         'attendance_records': Attendance.objects.filter(employee=employee)[:10],
         'salary_history': Salary.objects.filter(employee=employee),
-        'leave_history': LeaveApplication.objects.filter(employee=employee)
+        'leave_history': LeaveApplication.objects.filter(employee=employee).select_related('leave_type')
     }
     return render(request, 'employees/employee_profile.html', context)
 
@@ -295,24 +348,34 @@ def delete_employee(request, employee_id):
 @login_required
 def apply_leave(request):
     if request.method == 'POST':
-        form = LeaveApplicationForm(request.POST)
+        form = LeaveApplicationForm(request.POST, employee=request.user)
         if form.is_valid():
-            # Manually calculate days
             start_date = form.cleaned_data['start_date']
-            end_date = form.cleaned_data['end_date']
-            
-            # Calculate number of days (inclusive of start and end dates)
-            days = (end_date - start_date).days + 1
+            # Working days in the range, from the employee's department calendar
+            days = form.cleaned_data['days']
             
             leave_application = form.save(commit=False)
             leave_application.employee = request.user
             leave_application.days = days  # Explicitly set days
-            leave_application.save()
-
-            messages.success(request, "Leave application submitted successfully!")
-            return redirect('user_leave_history')
+            leave_type = leave_application.leave_type
+
+            # Re-check the limit with the ledger row locked so two concurrent
+            # submissions cannot both pass the form's check
+            with transaction.atomic():
+                balance, _ = get_leave_balance(request.user.pk, leave_type.pk, start_date.year, lock=True)
+                within_limit = balance.days_used + days <= leave_type.max_days_per_year
+                if within_limit:
+                    leave_application.save()
+
+            if within_limit:
+                messages.success(request, "Leave application submitted successfully!")
+                return redirect('user_leave_history')
+            form.add_error(None, (
+                f"Your {leave_type.name} balance changed while this application was being submitted. "
+                f"Remaining days: {leave_type.max_days_per_year - balance.days_used} days"
+            ))
     else:
-        form = LeaveApplicationForm()
+        form = LeaveApplicationForm(employee=request.user)
 
     return render(request, 'apply_leave.html', {'form': form})
 
@@ -328,27 +391,11 @@ def mark_attendance_for_today(request):
             end_date = form.cleaned_data['end_date']
             reason = form.cleaned_data.get('reason', '')
 
-            # Create leave entries for each day in the range
-            current_date = start_date
-            while current_date <= end_date:
-                # Check if attendance record already exists
-                attendance, created = Attendance.objects.get_or_create(
-                    employee=request.user,
-                    date=current_date,
-                    defaults={
-                        'check_in': current_date,
-                        'is_present': False,
-                        'is_leave': True
-                    }
-                )
-
-                # Update existing record if not created
-                if not created:
-                    attendance.is_leave = True
-                    attendance.is_present = False
-                    attendance.save()
-
-                current_date += timedelta(days=1)
+            # Create or update leave entries for every working day in the range in one upsert
+            mark_attendance(
+                CustomUser.objects.filter(pk=request.user.pk), start_date, end_date, status='LEAVE',
+                working_days_only=True
+            )
 
             messages.success(request, f"Attendance  applied successfully from {start_date} to {end_date}")
             return redirect('user_dashboard')  # Redirect to leave history page
@@ -359,10 +406,101 @@ def mark_attendance_for_today(request):
 
 
 @login_required
+@permission_required('mywebsite.add_attendance', raise_exception=True)
+def bulk_mark_attendance(request):
+    """
+    Mark attendance for a department or the whole company, e.g. a public holiday
+    """
+    if request.method == 'POST':
+        form = BulkAttendanceForm(request.POST)
+        if form.is_valid():
+            department = form.cleaned_data['department']
+            start_date = form.cleaned_data['start_date']
+            end_date = form.cleaned_data['end_date']
+
+            created, updated = mark_attendance(
+                employees_in_scope(department), start_date, end_date,
+                status=form.cleaned_data['status']
+            )
+
+            scope = department.name if department else "all departments"
+            messages.success(
+                request,
+                f"Attendance marked for {scope} from {start_date} to {end_date}: "
+                f"{created} records created, {updated} updated"
+            )
+            return redirect('attendance_list')
+    else:
+        form = BulkAttendanceForm()
+
+    return render(request, 'bulk_mark_attendance.html', {'form': form})
+
+
+def _ingest_denied(request):
+    """
+    None if the request may post events, else the error response. Devices
+    authenticate with 'Authorization: Token <token>' from
+    ATTENDANCE_INGEST_TOKENS; staff can also post while logged in. Only the
+    token path skips CSRF: a session post must carry the CSRF token like
+    any form, or another site could post events through a logged-in
+    browser.
+    """
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Token '):
+        token = header[len('Token '):].strip()
+        if any(constant_time_compare(token, allowed) for allowed in settings.ATTENDANCE_INGEST_TOKENS):
+            return None
+        return JsonResponse({'error': 'Not authorized'}, status=401)
+    if not (request.user.is_authenticated and request.user.has_perm('mywebsite.add_attendance')):
+        return JsonResponse({'error': 'Not authorized'}, status=401)
+    if CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {}) is not None:
+        return JsonResponse({'error': 'CSRF verification failed'}, status=403)
+    return None
+
+
+@csrf_exempt
+@require_POST
+def ingest_attendance(request):
+    """
+    Accept a batch of device clock-in/clock-out events as JSON or CSV
+    """
+    denied = _ingest_denied(request)
+    if denied is not None:
+        return denied
+
+    try:
+        if request.content_type == 'text/csv':
+            events = parse_csv_events(request.body.decode('utf-8-sig'))
+        else:
+            events = parse_json_events(request.body)
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({'error': f'Invalid payload: {e}'}, status=400)
+
+    if len(events) > settings.ATTENDANCE_INGEST_MAX_EVENTS:
+        return JsonResponse(
+            {'error': f'Batch too large, maximum is {settings.ATTENDANCE_INGEST_MAX_EVENTS} events'},
+            status=413
+        )
+
+    batch = ingest_events(events, source=request.headers.get('X-Device-Id', ''))
+    return JsonResponse({
+        'batch_id': batch.pk,
+        'received': batch.events_received,
+        'rejected': batch.events_rejected,
+        'unknown_employees': batch.unknown_employees,
+        'created': batch.rows_created,
+        'updated': batch.rows_updated,
+        'duration_ms': round(batch.duration_ms, 2),
+        'events_per_second': round(batch.events_per_second, 1),
+    })
+
+
+@login_required
+@query_budget(4)
 def user_leave_history(request):
     leave_applications = LeaveApplication.objects.filter(
         employee=request.user
-    ).order_by('-applied_on')
+    ).select_related('leave_type').order_by('-applied_on')
 
     return render(request, 'employees/user_leave_history.html', {
         'leave_applications': leave_applications
@@ -370,12 +508,19 @@ def user_leave_history(request):
 
 
 #list of all leaves applied 
+@query_budget(4)
 def leave_application_list(request):
-    leave_applications = LeaveApplication.objects.all()
-    return render(request, 'leave_application_list.html', {'leave_applications': leave_applications})
-
+    leave_applications = LeaveApplication.objects.select_related('employee', 'leave_type')
+    try:
+        leave_applications = filter_leave_applications(leave_applications, request.GET)
+    except InvalidFilter as e:
+        return HttpResponseBadRequest(str(e))
+    page = keyset_paginate(leave_applications, request, ['-applied_on', '-id'])
+    return render(request, 'leave_application_list.html', {'leave_applications': page, 'page': page})
+
+@query_budget(4)
 def leave_application_detail(request, pk):
-    leave_application = get_object_or_404(LeaveApplication, pk=pk)
+    leave_application = get_object_or_404(LeaveApplication.objects.select_related('employee', 'leave_type'), pk=pk)
     return render(request, 'leave_application_detail.html', {'leave_application': leave_application})
 
 def update_leave_status(request, pk):
@@ -390,11 +535,12 @@ def update_leave_status(request, pk):
     return redirect('leave_application_detail', pk=pk)
 
 @login_required
+@query_budget(4)
 def leave_history(request):
     """
     Employee leave history view
     """
-    leaves = LeaveApplication.objects.filter(employee=request.user)
+    leaves = LeaveApplication.objects.filter(employee=request.user).select_related('leave_type')
     
     context = {
         'leaves': leaves
@@ -402,18 +548,26 @@ def leave_history(request):
     return render(request, 'leave_history.html', context)
 
 # list of attendances  for admin 
+@query_budget(4)
 def attendance_list(request):
-    attendances = Attendance.objects.all().order_by('-date')
-    return render(request, 'attendance_list.html', {'attendances': attendances})
+    try:
+        attendances = filter_attendance(Attendance.objects.select_related('employee'), request.GET)
+    except InvalidFilter as e:
+        return HttpResponseBadRequest(str(e))
+    page = keyset_paginate(attendances, request, ['-date', '-id'])
+    return render(request, 'attendance_list.html', {'attendances': page, 'page': page})
 
 
 @login_required
+@query_budget(4)
 def user_attendance_list(request):
-    attendances = Attendance.objects.filter(employee=request.user).order_by('-date')
-    return render(request, 'user_attendance_list.html', {'attendances': attendances})
+    attendances = Attendance.objects.filter(employee=request.user)
+    page = keyset_paginate(attendances, request, ['-date', '-id'])
+    return render(request, 'user_attendance_list.html', {'attendances': page, 'page': page})
 
 #salary
 @login_required
+@query_budget(4)
 def salary_list(request):
     salaries = Salary.objects.filter(employee=request.user).order_by('-year', '-month')
     return render(request, 'salary_list.html', {'salaries': salaries})
@@ -423,9 +577,10 @@ from django.shortcuts import render
 from mywebsite.models import Salary
 from datetime import datetime
 
+@query_budget(8)
 def admin_salary_list(request):
-    # Get the latest month and year from the database
-    latest_salary = Salary.objects.order_by('-year', '-month').first()
+    # Get the latest month and year from the period summaries
+    latest_salary = latest_period()
     latest_month = latest_salary.month if latest_salary else datetime.today().month
     latest_year = latest_salary.year if latest_salary else datetime.today().year
 
@@ -433,15 +588,17 @@ def admin_salary_list(request):
     selected_month = request.GET.get('month', latest_month)
     selected_year = request.GET.get('year', latest_year)
 
-    # Get salaries based on the selected month and year
-    salaries = Salary.objects.filter(month=selected_month, year=selected_year).order_by('-year', '-month')
+    # Get salaries based on the selected month and year, one page at a time
+    salaries = Salary.objects.filter(month=selected_month, year=selected_year).select_related('employee')
+    page = keyset_paginate(salaries, request, ['-year', '-month', '-id'])
 
     # Pass months and years for dropdown filters
     months = list(range(1, 13))  # Months 1-12
-    years = Salary.objects.values_list('year', flat=True).distinct().order_by('-year')
+    years = salary_years()
 
     return render(request, 'admin_salary_list.html', {
-        'salaries': salaries,
+        'salaries': page,
+        'page': page,
         'months': months,
         'years': years,
         'selected_month': int(selected_month),
@@ -464,39 +621,169 @@ def add_salary(request):
     return render(request, 'add_salary.html', {'form': form})
 
 # views.py
+import tempfile
+
 from django.shortcuts import get_object_or_404
 from .models import Salary
 from .utils import render_to_pdf
-from django.http import HttpResponse
+from . import pdf_cache
+from .payslips import (
+    payslip_cache_key, payslip_filename, payslip_pdf,
+    month_salaries, stream_payslip_zip, write_payslips_pdf
+)
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.template.loader import render_to_string
 
+@query_budget(4)
 def generate_payslip_pdf(request, salary_id):
-    salary = get_object_or_404(Salary, id=salary_id)
-    
-    gross_salary = salary.base_salary + salary.bonus
-    tax_amount = salary.deductions
-    
-    context = {
-        'salary': salary,
-        'gross_salary': gross_salary,
-        'tax_amount': tax_amount,
-        'company_name': 'SwiftPay',
-        'company_address': 'Kenyatta Business Rd, Nairobi',
-        'logo': 'img/logo.png',  # Make sure your logo is simple and small
-    }
-    
-    # Use the new receipt template
-    pdf = render_to_pdf('receipt_payslip.html', context)
+    salary = get_object_or_404(Salary.objects.select_related('employee'), id=salary_id)
+
+    # Closed months never change, so serve from the PDF cache and let the
+    # browser revalidate with the content hash as ETag
+    key = payslip_cache_key(salary)
+    etag = f'"{key}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified:
+        return not_modified
+
+    pdf = pdf_cache.get_or_render(
+        pdf_cache.payslip_namespace(salary.pk), key,
+        lambda: payslip_pdf(salary)
+    )
     
     if pdf:
         response = HttpResponse(pdf, content_type='application/pdf')
-        filename = f"payslip_{salary.employee.username}_{salary.month}_{salary.year}.pdf"
+        filename = payslip_filename(salary)
         content = f"inline; filename={filename}"
         response['Content-Disposition'] = content
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
         return response
     return HttpResponse("Error generating PDF", status=500)
 
 
+@login_required
+@permission_required('mywebsite.view_salary', raise_exception=True)
+def export_payslips(request):
+    """
+    Stream every payslip for a month as one ZIP file, or with ?format=pdf
+    as a single PDF with one payslip per page for printing
+    """
+    try:
+        month = int(request.GET.get('month', datetime.today().month))
+        year = int(request.GET.get('year', datetime.today().year))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid month or year specified")
+    file_format = request.GET.get('format', 'zip')
+    if not (1 <= month <= 12) or file_format not in ('zip', 'pdf'):
+        return HttpResponseBadRequest("Invalid month, year or format specified")
+
+    salaries = month_salaries(month, year)
+    if file_format == 'pdf':
+        fh = tempfile.TemporaryFile()
+        write_payslips_pdf(salaries.iterator(chunk_size=500), fh, f"Payslips {year}-{month:02d}")
+        fh.seek(0)
+        return FileResponse(
+            fh, as_attachment=True, filename=f"payslips_{year}_{month:02d}.pdf", content_type='application/pdf'
+        )
+
+    response = StreamingHttpResponse(
+        stream_payslip_zip(salaries.iterator(chunk_size=500)),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="payslips_{year}_{month:02d}.zip"'
+    return response
+
+
+@login_required
+@permission_required('mywebsite.add_paymentbatch', raise_exception=True)
+@require_POST
+def bank_payment_files(request):
+    """
+    Generate the bank EFT files for a month's net salaries as one ZIP.
+    Every call records a new PaymentBatch, so it only answers the POST from
+    the salary list's form, never a prefetch, crawler or page refresh.
+    """
+    try:
+        month = int(request.POST.get('month', datetime.today().month))
+        year = int(request.POST.get('year', datetime.today().year))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid month or year specified")
+    file_format = request.POST.get('format', 'fixed')
+    if not (1 <= month <= 12) or file_format not in dict(PaymentBatch.FORMAT_CHOICES):
+        return HttpResponseBadRequest("Invalid month, year or format specified")
+
+    batch, data = generate_payment_batch(month, year, file_format, created_by=request.user)
+    response = HttpResponse(data, content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="bank_payments_{year}_{month:02d}.zip"'
+    response['X-Payment-Batch'] = str(batch.pk)
+    return response
+
+
+def _export_response(request, name, queryset, apply_filters):
+    """
+    Stream one of the exports.EXPORTS as CSV (default) or XLSX (?format=xlsx)
+    after applying the list view's filters from the query string
+    """
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in ('csv', 'xlsx'):
+        return HttpResponseBadRequest("Format must be csv or xlsx")
+    try:
+        queryset = apply_filters(queryset, request.GET)
+        suffix = filename_suffix(request.GET)
+    except InvalidFilter as e:
+        return HttpResponseBadRequest(str(e))
+
+    response = StreamingHttpResponse(
+        stream_export(name, queryset, file_format),
+        content_type=XLSX_CONTENT_TYPE if file_format == 'xlsx' else CSV_CONTENT_TYPE
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}{suffix}.{file_format}"'
+    return response
+
+
+@login_required
+@permission_required('mywebsite.view_salary', raise_exception=True)
+def export_salaries(request):
+    """
+    Salaries as CSV/XLSX, e.g. ?year=2025 for a full year or ?year=&month=
+    """
+    return _export_response(request, 'salaries', Salary.objects.all(), filter_salaries)
+
+
+@login_required
+@permission_required('mywebsite.view_attendance', raise_exception=True)
+def export_attendance(request):
+    """
+    Attendance as CSV/XLSX with the attendance list filters
+    """
+    return _export_response(request, 'attendance', Attendance.objects.all(), filter_attendance)
+
+
+@login_required
+@permission_required('mywebsite.view_leaveapplication', raise_exception=True)
+def export_leave_applications(request):
+    """
+    Leave applications as CSV/XLSX with the leave list filters
+    """
+    return _export_response(request, 'leave_applications', LeaveApplication.objects.all(), filter_leave_applications)
+
+
+@login_required
+@permission_required('mywebsite.view_salary', raise_exception=True)
+def export_annual_tax_returns(request):
+    """
+    P9-style annual returns, one row per employee and year read from the
+    year-to-date ledger, as CSV/XLSX, e.g. ?year=2025
+    """
+    ledger = YearToDateLedger.objects.filter(month_count__gt=0)
+    return _export_response(request, 'annual_tax_returns', ledger, filter_annual_returns)
+
+
+
+from .attendance_analytics import employee_month
+
 
 @login_required
 def payslip(request):
@@ -504,10 +791,12 @@ def payslip(request):
     View to display payslips
     """
     # Get the latest salary record for the user
-    latest_salary = Salary.objects.filter(employee=request.user).order_by('-id').first()
+    latest_salary = Salary.objects.filter(employee=request.user).select_related('payslip').order_by('-id').first()
     
     context = {
-        'salary': latest_salary
+        'salary': latest_salary,
+        # Attendance over the salary's month
+        'attendance': employee_month(request.user, latest_salary.year, latest_salary.month) if latest_salary else None,
     }
     return render(request, 'payslip.html', context)
 
@@ -553,9 +842,15 @@ from django.db.models import Sum, Count , Avg
 from .models import Salary
 from datetime import datetime
 from django.http import HttpResponseBadRequest
+from .jobs import enqueue
+from .reports import (
+    attendance_report_context, cached_tax_certificate, monthly_report_context, tax_certificate_context,
+    tax_certificate_filename,
+)
 
 @login_required
 @permission_required('payroll.view_salary', raise_exception=True)
+@query_budget(6)
 def monthly_payroll_report(request):
     # Default to current month/year if not specified
     current_year = datetime.now().year
@@ -570,85 +865,39 @@ def monthly_payroll_report(request):
     if not (1 <= month <= 12) or year < 2000 or year > current_year + 1:
         return HttpResponseBadRequest("Invalid month or year specified")
     
-    # Main payroll aggregation
-    payroll_data = Salary.objects.filter(
-        year=year,
-        month=month
-    ).aggregate(
-        total_base=Sum('base_salary'),
-        total_bonus=Sum('bonus'),
-        total_tax=Sum('deductions'),
-        total_net=Sum('net_salary'),
-        employee_count=Count('employee', distinct=True)
-    )
-    
-    # Department breakdown
-    department_data = Salary.objects.filter(
-        year=year,
-        month=month
-    ).values(
-        'employee__department__name'
-    ).annotate(
-        dept_total=Sum('net_salary'),
-        dept_avg=Avg('net_salary'),
-        employee_count=Count('employee')
-    ).order_by('-dept_total')
-    
-    # Top earners
-    top_earners = Salary.objects.filter(
-        year=year,
-        month=month
-    ).select_related('employee').order_by('-net_salary')[:10]
-    
-    context = {
-        'report_month': month,
-        'report_year': year,
-        'month_name': datetime(year, month, 1).strftime('%B'),
-        'payroll_data': payroll_data,
-        'department_data': department_data,
-        'top_earners': top_earners,
-        'available_years': range(2020, current_year + 1),
-        'company_name': "SwiftPay",  # Add your company name
-        'company_address': "Kenyatta Business Rd, Nairobi",  # Add your address
-    }
-
-    # Handle PDF generation
+    # The PDF is rendered by a background job; the job page polls for it
     if pdf_format:
-        try:
-            from django.template.loader import get_template
-            from xhtml2pdf import pisa
-            import os
-            from django.conf import settings
-
-            # Set PDF response headers
-            response = HttpResponse(content_type='application/pdf')
-            filename = f"payroll_report_{year}_{month}.pdf"
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-            # Add logo path to context
-            context['logo_path'] = os.path.join(settings.STATIC_ROOT, 'img/logo.png')
-
-            # Render PDF template
-            template = get_template('reports/monthly_summary_pdf.html')
-            html = template.render(context)
-
-            # Create PDF
-            pisa_status = pisa.CreatePDF(
-                html,
-                dest=response,
-                encoding='UTF-8',
-                link_callback=lambda uri, _: os.path.join(settings.STATIC_ROOT, uri.replace(settings.STATIC_URL, ''))
-            )
+        job = enqueue('monthly_payroll_report_pdf', {'year': year, 'month': month}, created_by=request.user)
+        return redirect('job_detail', job_id=job.pk)
 
-            if pisa_status.err:
-                return HttpResponse('PDF generation failed', status=500)
-            return response
+    context = monthly_report_context(year, month)
+    return render(request, 'reports/monthly_summary.html', context)
 
-        except Exception as e:
-            logger.error(f"PDF generation error: {str(e)}")
-            return HttpResponse(f'PDF generation error: {str(e)}', status=500)
 
-    return render(request, 'reports/monthly_summary.html', context)
+@login_required
+@permission_required('mywebsite.view_attendance', raise_exception=True)
+@query_budget(8)
+def attendance_report(request):
+    """
+    Monthly attendance rates, lateness and overtime per department, and per
+    employee for one department (?department=<id>) or the lowest rates
+    company-wide
+    """
+    today = datetime.now()
+    try:
+        year = int(request.GET.get('year', today.year))
+        month = int(request.GET.get('month', today.month))
+    except ValueError:
+        return HttpResponseBadRequest("Invalid month or year specified")
+    if not (1 <= month <= 12) or year < 2000 or year > today.year + 1:
+        return HttpResponseBadRequest("Invalid month or year specified")
+
+    department = None
+    if request.GET.get('department'):
+        department = get_object_or_404(Department, pk=request.GET['department'])
+
+    context = attendance_report_context(year, month, department)
+    return render(request, 'reports/attendance_report.html', context)
 
 
 # views.py
@@ -672,67 +921,116 @@ def employee_tax_certificate(request, employee_id=None, year=None):
     if employee != request.user and not request.user.has_perm('payroll.view_salary'):
         return HttpResponseForbidden("You don't have permission to view this report")
     
-    # Get all salary records for the year
-    salaries = Salary.objects.filter(
-        employee=employee,
-        year=report_year
-    ).order_by('month')
-    
-    # Calculate YTD totals
-    ytd_totals = salaries.aggregate(
-        total_base=Sum('base_salary'),
-        total_bonus=Sum('bonus'),
-        total_tax=Sum('deductions'),
-        total_net=Sum('net_salary')
-    )
-    
-    # Calculate effective tax rate
-    gross_income = (ytd_totals['total_base'] or Decimal('0')) + (ytd_totals['total_bonus'] or Decimal('0'))
-    tax_paid = ytd_totals['total_tax'] or Decimal('0')
-    effective_tax_rate = (tax_paid / gross_income * 100) if gross_income > 0 else 0
-    
-    context = {
-        'employee': employee,
-        'report_year': report_year,
-        'salaries': salaries,
-        'ytd_totals': ytd_totals,
-        'gross_income': gross_income,
-        'effective_tax_rate': round(effective_tax_rate, 2),
-        'available_years': range(2020, current_year + 1),
-    }
-    
-    # PDF response if requested
+    context = tax_certificate_context(employee, report_year)
+
+    # PDF response if requested: served straight from the PDF cache when
+    # it has been rendered before, otherwise rendered by a background job
     if request.GET.get('format') == 'pdf':
-        from .utils import render_to_pdf
-        pdf = render_to_pdf('reports/tax_certificate_pdf.html', context)
-        if pdf:
-            filename = f"Tax_Certificate_{employee.username}_{report_year}.pdf"
-            response = HttpResponse(pdf, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="{filename}"'
-            return response
+        key, pdf = cached_tax_certificate(context)
+        etag = f'"{key}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified:
+            return not_modified
+
+        if pdf is None:
+            job = enqueue('tax_certificate_pdf', {'employee_id': employee.pk, 'year': report_year},
+                          created_by=request.user)
+            return redirect('job_detail', job_id=job.pk)
+
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{tax_certificate_filename(employee, report_year)}"'
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
     
     return render(request, 'reports/tax_certificate.html', context)
 
 
-from django.template.loader import get_template
-from xhtml2pdf import pisa
-from django.conf import settings
-import os
+from django.http import FileResponse, Http404
+from django.urls import reverse
 
-def generate_tax_certificate_pdf(request, context):
-    template = get_template('reports/tax_certificate_pdf.html')
-    html = template.render(context)
-    
-    # Handle logo path
-    logo_path = os.path.join(settings.STATIC_ROOT, 'img/logo.png')
-    context['logo_path'] = logo_path
-    
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="Tax_Certificate_{context["employee"].id}_{context["report_year"]}.pdf"'
-    
-    pisa_status = pisa.CreatePDF(
-        html,
-        dest=response,
-        link_callback=lambda uri, _: os.path.join(settings.MEDIA_ROOT, uri.replace(settings.MEDIA_URL, '')))
-    
-    return response
\ No newline at end of file
+
+def _user_job(request, job_id):
+    """
+    A job its creator (or staff) may see; 404 for anyone else
+    """
+    job = get_object_or_404(Job, pk=job_id)
+    if job.created_by_id != request.user.pk and not request.user.is_staff:
+        raise Http404("No such job")
+    return job
+
+
+def _job_status(job):
+    return {
+        'id': job.pk,
+        'kind': job.kind,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'error': job.error,
+        'result': job.result,
+        'download_url': reverse('job_download', args=[job.pk]) if job.result_file else None,
+    }
+
+
+@login_required
+@query_budget(4)
+def job_detail(request, job_id):
+    """
+    Status page for a background job; polls job_status until it finishes
+    """
+    job = _user_job(request, job_id)
+    return render(request, 'job_detail.html', {'job': job, 'status': _job_status(job)})
+
+
+@login_required
+@query_budget(4)
+def job_status(request, job_id):
+    return JsonResponse(_job_status(_user_job(request, job_id)))
+
+
+@login_required
+@query_budget(4)
+def job_download(request, job_id):
+    job = _user_job(request, job_id)
+    if job.status != 'SUCCEEDED' or not job.result_file:
+        raise Http404("The job has no result")
+    return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=job.result_name or None)
+
+
+import zipfile
+
+from django.core.files.storage import default_storage
+from .employee_import import IMPORT_FIELDS, REQUIRED_COLUMNS, file_format, read_rows
+
+
+@login_required
+@permission_required('mywebsite.add_customuser', raise_exception=True)
+@query_budget(8)
+def import_employees(request):
+    """
+    Upload a CSV or XLSX file of employees; the import runs as a background job whose
+    result file lists the rejected rows
+    """
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        if upload is None:
+            messages.error(request, "Choose a CSV or XLSX file to import.")
+        else:
+            # Catch a wrong file or header now rather than in the job
+            try:
+                rows = read_rows(upload, file_format(upload.name))
+                next(rows, None)
+                rows.close()
+            except (ValueError, zipfile.BadZipFile, KeyError) as e:
+                messages.error(request, f"Cannot import {upload.name}: {e}")
+            else:
+                upload.seek(0)
+                path = default_storage.save(f"imports/{upload.name}", upload)
+                job = enqueue('employee_import', {'path': path}, created_by=request.user)
+                return redirect('job_detail', job_id=job.pk)
+
+    return render(request, 'employees/import_employees.html', {
+        'fields': IMPORT_FIELDS,
+        'required': REQUIRED_COLUMNS,
+    })
@@ -0,0 +1,241 @@
+# work_calendar.py
+"""
+The company's working-day calendar.
+
+A day is a working day when its weekday is in WORKING_WEEKDAYS (or the
+department's own working_weekdays) and it is not a Kenyan public holiday,
+unless a CalendarOverride for the company or the department says
+otherwise. Each (year, department) is compiled once into a per-day mask and
+its running total, so counting the working days between two dates is two
+array lookups per calendar year spanned, whatever the length of the range.
+"""
+import calendar
+import threading
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.conf import settings
+
+from .models import CalendarOverride, Department
+
+# (month, day, name) of the fixed-date public holidays under the Public
+# Holidays Act; 10 October was Moi/Utamaduni Day before it became Mazingira
+# Day in 2024. Idd-ul-Fitr follows the moon and is gazetted each year, so it
+# is entered as a CalendarOverride.
+KENYA_FIXED_HOLIDAYS = [
+    (1, 1, "New Year's Day"),
+    (5, 1, "Labour Day"),
+    (6, 1, "Madaraka Day"),
+    (10, 10, "Mazingira Day"),
+    (10, 20, "Mashujaa Day"),
+    (12, 12, "Jamhuri Day"),
+    (12, 25, "Christmas Day"),
+    (12, 26, "Boxing Day"),
+]
+
+DEFAULT_WORKING_WEEKDAYS = '01234'
+
+
+def easter_sunday(year):
+    """
+    Gregorian Easter Sunday (anonymous Gregorian algorithm)
+    """
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def public_holidays(year):
+    """
+    date -> name of the year's statutory public holidays. A holiday that
+    falls on a Sunday is also observed on the next day that is not a
+    holiday itself.
+    """
+    easter = easter_sunday(year)
+    holidays = {
+        easter - timedelta(days=2): "Good Friday",
+        easter + timedelta(days=1): "Easter Monday",
+    }
+    for month, day, name in KENYA_FIXED_HOLIDAYS:
+        holidays[date(year, month, day)] = name
+    for day, name in sorted(holidays.items()):
+        if day.weekday() == 6:
+            observed = day + timedelta(days=1)
+            while observed in holidays:
+                observed += timedelta(days=1)
+            if observed.year == year:
+                holidays[observed] = f"{name} (observed)"
+    return holidays
+
+
+def _weekday_set(value):
+    return {int(char) for char in value}
+
+
+class YearCalendar:
+    """
+    One calendar year for one department: mask[i] is True when the i-th
+    day of the year is a working day, and totals[i] counts the working days
+    before it
+    """
+    def __init__(self, year, mask):
+        self.year = year
+        self.first = date(year, 1, 1)
+        self.mask = mask
+        self.totals = np.concatenate(([0], np.cumsum(mask, dtype=np.int32)))
+
+    @property
+    def working_days(self):
+        return int(self.totals[-1])
+
+    def is_working_day(self, day):
+        return bool(self.mask[(day - self.first).days])
+
+    def count(self, start, end):
+        """
+        Working days from start to end inclusive, both within the year
+        """
+        return int(self.totals[(end - self.first).days + 1] - self.totals[(start - self.first).days])
+
+    def month_mask(self, month):
+        start = (date(self.year, month, 1) - self.first).days
+        return self.mask[start:start + calendar.monthrange(self.year, month)[1]]
+
+
+def build_year(year, weekdays, holidays=(), overrides=None):
+    """
+    Compile a YearCalendar from working weekdays (Monday=0), holiday dates
+    and {date: is_working_day} overrides, applied in that order
+    """
+    days = 366 if calendar.isleap(year) else 365
+    first = date(year, 1, 1)
+    mask = np.isin((np.arange(days) + first.weekday()) % 7, sorted(weekdays))
+    for day in holidays:
+        mask[(day - first).days] = False
+    for day, is_working_day in (overrides or {}).items():
+        mask[(day - first).days] = is_working_day
+    return YearCalendar(year, mask)
+
+
+class WorkCalendar:
+    """
+    Per-process cache of compiled YearCalendars by (year, department id).
+    Cleared when an override or a department is saved or deleted in this
+    process, and rebuilt after max_age seconds to pick up changes made by
+    other processes.
+    """
+    def __init__(self, max_age=None):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._reset()
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self._years = {}
+        self._overrides = {}
+        self._weekdays = None
+        self._loaded_at = time.monotonic()
+
+    def _max_age(self):
+        if self.max_age is not None:
+            return self.max_age
+        return getattr(settings, 'WORK_CALENDAR_MAX_AGE', 300)
+
+    def _department_weekdays(self, department_id):
+        if self._weekdays is None:
+            self._weekdays = {
+                pk: _weekday_set(value)
+                for pk, value in Department.objects.exclude(working_weekdays='').values_list('id', 'working_weekdays')
+            }
+        default = _weekday_set(getattr(settings, 'WORKING_WEEKDAYS', DEFAULT_WORKING_WEEKDAYS))
+        return self._weekdays.get(department_id, default)
+
+    def _year_overrides(self, year):
+        # department id (None for company-wide) -> {date: is_working_day},
+        # for every department in one query
+        if year not in self._overrides:
+            overrides = {}
+            for department_id, day, is_working_day in CalendarOverride.objects.filter(
+                date__year=year
+            ).values_list('department_id', 'date', 'is_working_day'):
+                overrides.setdefault(department_id, {})[day] = is_working_day
+            self._overrides[year] = overrides
+        return self._overrides[year]
+
+    def year(self, year, department=None):
+        """
+        The YearCalendar of a department (instance or id; None for the
+        company default)
+        """
+        department_id = getattr(department, 'pk', department)
+        with self._lock:
+            if time.monotonic() - self._loaded_at > self._max_age():
+                self._reset()
+            key = (year, department_id)
+            if key not in self._years:
+                overrides = self._year_overrides(year)
+                merged = dict(overrides.get(None, {}))
+                if department_id is not None:
+                    merged.update(overrides.get(department_id, {}))
+                self._years[key] = build_year(
+                    year, self._department_weekdays(department_id), public_holidays(year), merged
+                )
+            return self._years[key]
+
+
+company_calendar = WorkCalendar()
+
+
+def is_working_day(day, department=None):
+    return company_calendar.year(day.year, department).is_working_day(day)
+
+
+def business_days(start_date, end_date, department=None):
+    """
+    Working days from start_date to end_date inclusive (0 if end is
+    before start)
+    """
+    total = 0
+    for year in range(start_date.year, end_date.year + 1):
+        first = max(start_date, date(year, 1, 1))
+        last = min(end_date, date(year, 12, 31))
+        if first <= last:
+            total += company_calendar.year(year, department).count(first, last)
+    return total
+
+
+def working_dates(start_date, end_date, department=None):
+    """
+    The working days from start_date to end_date inclusive, as dates
+    """
+    dates = []
+    for year in range(start_date.year, end_date.year + 1):
+        year_calendar = company_calendar.year(year, department)
+        first = max(start_date, date(year, 1, 1))
+        last = min(end_date, date(year, 12, 31))
+        offsets = np.flatnonzero(year_calendar.mask[(first - year_calendar.first).days:(last - year_calendar.first).days + 1])
+        dates.extend(first + timedelta(days=int(offset)) for offset in offsets)
+    return dates
+
+
+def month_mask(year, month, department=None):
+    """
+    Bool array with one entry per day of the month, True on working days
+    """
+    return company_calendar.year(year, department).month_mask(month)
+
+
+def working_days_in_month(year, month, department=None):
+    return int(month_mask(year, month, department).sum())
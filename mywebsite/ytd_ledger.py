@@ -0,0 +1,160 @@
+# ytd_ledger.py
+"""
+Year-to-date payroll totals per employee (YearToDateLedger).
+
+Salary signals move a salary's amounts between ledger rows as it is
+created, edited or deleted. bulk_create skips those signals, so payroll
+runs add their salaries with add_salaries() in the same transaction.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import Salary, YearToDateLedger
+
+# Ledger field -> the Salary expression it totals
+AMOUNT_FIELDS = {
+    'total_base': F('base_salary'),
+    'total_bonus': F('bonus'),
+    'total_gross': F('base_salary') + F('bonus'),
+    'total_paye': F('paye'),
+    'total_nssf': F('nssf'),
+    'total_shif': F('shif'),
+    'total_housing_levy': F('housing_levy'),
+    'total_tax': F('deductions'),
+    'total_net': F('net_salary'),
+}
+
+
+def salary_contribution(salary):
+    """
+    What one Salary row adds to its employee's ledger row
+    """
+    return {
+        'employee_id': salary.employee_id,
+        'year': salary.year,
+        'total_base': salary.base_salary,
+        'total_bonus': salary.bonus,
+        'total_gross': salary.base_salary + salary.bonus,
+        'total_paye': salary.paye,
+        'total_nssf': salary.nssf,
+        'total_shif': salary.shif,
+        'total_housing_levy': salary.housing_levy,
+        'total_tax': salary.deductions,
+        'total_net': salary.net_salary,
+    }
+
+
+def stored_contribution(salary_pk):
+    """
+    The contribution of a Salary row as currently stored in the database,
+    or None if it does not exist yet
+    """
+    return Salary.objects.filter(pk=salary_pk).values('employee_id', 'year', **AMOUNT_FIELDS).first()
+
+
+def _updates(contribution, sign):
+    updates = {'month_count': F('month_count') + sign}
+    for field in AMOUNT_FIELDS:
+        updates[field] = F(field) + sign * Decimal(contribution[field])
+    return updates
+
+
+def add_contribution(contribution):
+    with transaction.atomic():
+        row, _ = YearToDateLedger.objects.get_or_create(
+            employee_id=contribution['employee_id'], year=contribution['year']
+        )
+        YearToDateLedger.objects.filter(pk=row.pk).update(**_updates(contribution, 1))
+
+
+def remove_contribution(contribution):
+    """
+    Take a salary out of its ledger row. Update-only: when the employee
+    is being deleted the row may already be gone and must not come back.
+    """
+    YearToDateLedger.objects.filter(
+        employee_id=contribution['employee_id'], year=contribution['year']
+    ).update(**_updates(contribution, -1))
+
+
+def add_salaries(salaries):
+    """
+    Add bulk-created salaries to the ledger with one read and one bulk
+    write per call; returns the number of ledger rows touched
+    """
+    deltas = {}
+    for salary in salaries:
+        contribution = salary_contribution(salary)
+        delta = deltas.setdefault(
+            (salary.employee_id, salary.year),
+            {'month_count': 0, **{field: Decimal('0.00') for field in AMOUNT_FIELDS}}
+        )
+        delta['month_count'] += 1
+        for field in AMOUNT_FIELDS:
+            delta[field] += contribution[field]
+    if not deltas:
+        return 0
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {
+            (row.employee_id, row.year): row
+            for row in YearToDateLedger.objects.select_for_update().filter(
+                year__in={year for _, year in deltas},
+                employee_id__in={employee_id for employee_id, _ in deltas},
+            )
+        }
+        created = []
+        changed = []
+        for (employee_id, year), delta in deltas.items():
+            row = existing.get((employee_id, year))
+            if row is None:
+                created.append(YearToDateLedger(employee_id=employee_id, year=year, **delta))
+                continue
+            for field, value in delta.items():
+                setattr(row, field, getattr(row, field) + value)
+            row.updated_on = now
+            changed.append(row)
+        YearToDateLedger.objects.bulk_create(created, batch_size=1000)
+        YearToDateLedger.objects.bulk_update(
+            changed, ['month_count', *AMOUNT_FIELDS, 'updated_on'], batch_size=1000
+        )
+    return len(deltas)
+
+
+def rebuild_year(year):
+    """
+    Recompute every ledger row for one year from the Salary table with a
+    single grouped query
+    """
+    rows = Salary.objects.filter(year=year).values('employee_id').annotate(
+        month_count=Count('id'),
+        **{field: Sum(expression) for field, expression in AMOUNT_FIELDS.items()}
+    ).order_by()
+    ledger = [YearToDateLedger(year=year, **row) for row in rows]
+
+    with transaction.atomic():
+        YearToDateLedger.objects.filter(year=year).delete()
+        YearToDateLedger.objects.bulk_create(ledger, batch_size=1000)
+    return len(ledger)
+
+
+def rebuild_all():
+    """
+    Rebuild the ledger for every year that has salaries and drop the rest
+    """
+    years = list(Salary.objects.values_list('year', flat=True).distinct().order_by('year'))
+    YearToDateLedger.objects.exclude(year__in=years).delete()
+    for year in years:
+        rebuild_year(year)
+    return years
+
+
+def employee_year(employee, year):
+    """
+    The employee's ledger row for the year, or None if nothing was paid
+    """
+    return YearToDateLedger.objects.filter(employee=employee, year=year, month_count__gt=0).first()